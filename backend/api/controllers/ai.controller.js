@@ -259,3 +259,23 @@ exports.getPredictionsByType = asyncHandler(async (req, res, next) => {
         data: predictions,
     });
 });
+
+/**
+ * @desc    Get the latest published forecast of a type that is still valid
+ * @route   GET /api/ai/predictions/:type/latest
+ */
+exports.getLatestPrediction = asyncHandler(async (req, res, next) => {
+    const prediction = await AIPrediction.findOne({
+        predictionType: req.params.type,
+        validUntil: { $gte: new Date() },
+    }).sort({ predictionDate: -1 });
+
+    if (!prediction) {
+        return next(new ErrorResponse(`No current ${req.params.type} forecast`, 404));
+    }
+
+    res.status(200).json({
+        success: true,
+        data: prediction,
+    });
+});
@@ -60,6 +60,14 @@ const aiPredictionSchema = new mongoose.Schema(
             algorithm: { type: String, trim: true },
             features: [{ type: String }],
         },
+        // Set on forecasts published by the predictive analytics service
+        validUntil: {
+            type: Date,
+        },
+        source: {
+            type: String,
+            trim: true,
+        },
     },
     {
         timestamps: true,
@@ -70,6 +78,7 @@ const aiPredictionSchema = new mongoose.Schema(
 aiPredictionSchema.index({ predictionType: 1 });
 aiPredictionSchema.index({ predictionDate: -1 });
 aiPredictionSchema.index({ 'forecastPeriod.from': 1, 'forecastPeriod.to': 1 });
+aiPredictionSchema.index({ predictionType: 1, validUntil: -1, predictionDate: -1 });
 
 const AIPrediction = mongoose.model('AIPrediction', aiPredictionSchema);
 
@@ -74,4 +74,10 @@ router.get('/predictions', authorize('admin'), aiController.getAllPredictions);
  */
 router.get('/predictions/:type', authorize('admin'), aiController.getPredictionsByType);
 
+/**
+ * @route   GET /api/ai/predictions/:type/latest
+ * @desc    Get the latest valid forecast published by the ML service
+ */
+router.get('/predictions/:type/latest', authorize('admin'), aiController.getLatestPrediction);
+
 module.exports = router;
@@ -0,0 +1,60 @@
+"""
+Configuration for the HIS Load-Test Suite
+Target hosts, seeding volumes and saturation criteria shared by all load-test tools
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class LoadTestConfig:
+    """Configuration class for the load-test suite"""
+
+    # Target services (defaults match the local uvicorn ports of each service)
+    PREDICT_HOST = os.getenv('LOADTEST_PREDICT_HOST', 'http://localhost:5002')
+    REVENUE_HOST = os.getenv('LOADTEST_REVENUE_HOST', 'http://localhost:5001')
+    OCR_HOST = os.getenv('LOADTEST_OCR_HOST', 'http://localhost:8000')
+
+    # Seeded MongoDB (never point this at a shared database - the seeder drops collections)
+    MONGODB_URI = os.getenv('LOADTEST_MONGODB_URI', 'mongodb://localhost:27017/his_loadtest')
+    DB_NAME = os.getenv('LOADTEST_DB_NAME', 'his_loadtest')
+
+    # Seeding volumes
+    SEED_CONFIG = {
+        'random_seed': int(os.getenv('LOADTEST_RANDOM_SEED', 42)),
+        'history_days': int(os.getenv('LOADTEST_HISTORY_DAYS', 180)),
+        'opd_appointments_per_day': int(os.getenv('LOADTEST_OPD_PER_DAY', 120)),
+        'lab_tests_per_day': int(os.getenv('LOADTEST_LAB_PER_DAY', 200)),
+        'admissions_per_day': int(os.getenv('LOADTEST_ADMISSIONS_PER_DAY', 12)),
+        'total_beds': int(os.getenv('LOADTEST_TOTAL_BEDS', 120)),
+        'bills_per_day': int(os.getenv('LOADTEST_BILLS_PER_DAY', 150)),
+        'anomaly_rate': float(os.getenv('LOADTEST_ANOMALY_RATE', 0.05)),
+        'departments': 8,
+    }
+
+    # Gemini stub latency (lognormal, matches observed gemini-1.5-flash vision calls)
+    GEMINI_STUB_CONFIG = {
+        'median_latency_ms': float(os.getenv('GEMINI_STUB_MEDIAN_MS', 900)),
+        'latency_sigma': float(os.getenv('GEMINI_STUB_SIGMA', 0.35)),
+        'failure_rate': float(os.getenv('GEMINI_STUB_FAILURE_RATE', 0.0)),
+    }
+
+    # Step-load shape used to find saturation throughput
+    STEP_LOAD = {
+        'step_users': int(os.getenv('LOADTEST_STEP_USERS', 5)),
+        'step_seconds': int(os.getenv('LOADTEST_STEP_SECONDS', 30)),
+        'max_users': int(os.getenv('LOADTEST_MAX_USERS', 100)),
+        'spawn_rate': float(os.getenv('LOADTEST_SPAWN_RATE', 5)),
+    }
+
+    # A step is saturated once p95 or the failure ratio crosses these limits
+    SATURATION_CRITERIA = {
+        'max_p95_ms': float(os.getenv('LOADTEST_MAX_P95_MS', 2000)),
+        'max_failure_ratio': float(os.getenv('LOADTEST_MAX_FAILURE_RATIO', 0.01)),
+    }
+
+    # Baseline comparison tolerance (fractional regression allowed before flagging)
+    REGRESSION_TOLERANCE = float(os.getenv('LOADTEST_REGRESSION_TOLERANCE', 0.10))
@@ -0,0 +1,107 @@
+"""
+Gemini Stub Launcher for OCR Load Tests
+Starts the OCR service with the Gemini model replaced by a local stub, so load tests
+measure our service (Tesseract, masking, I/O) without quota limits or API cost
+
+Usage:
+    python gemini_stub.py --port 8000 --median-ms 900
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, List
+
+from config import LoadTestConfig
+
+OCR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ocr')
+
+
+class StubResponse:
+    """Mimics the .text attribute of a google.generativeai response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGeminiModel:
+    """
+    Drop-in replacement for genai.GenerativeModel used by app.extractor
+    Sleeps for a lognormal latency and returns a canned extraction
+    """
+
+    def __init__(self, median_latency_ms: float, latency_sigma: float, failure_rate: float = 0.0,
+                 seed: int = None):
+        """
+        Initialize stub model
+
+        Args:
+            median_latency_ms: Median simulated API latency
+            latency_sigma: Lognormal sigma of the latency distribution
+            failure_rate: Fraction of calls that raise, exercising the regex fallback
+            seed: Random seed for reproducible latency draws
+        """
+        self.median_latency_ms = median_latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def generate_content(self, contents: List[Any]) -> StubResponse:
+        """Simulate a Gemini Vision call"""
+        self.calls += 1
+        latency_s = self.median_latency_ms / 1000.0 * self._rng.lognormvariate(0.0, self.latency_sigma)
+        time.sleep(latency_s)
+
+        if self._rng.random() < self.failure_rate:
+            raise RuntimeError('Simulated Gemini failure')
+
+        return StubResponse(json.dumps({
+            'firstName': 'Test',
+            'lastName': 'Patient',
+            'dateOfBirth': '1990-01-01',
+            'gender': 'Female',
+            'phone': None,
+            'aadhaarNumber': '012345678901'
+        }))
+
+
+def install_stub(median_latency_ms: float, latency_sigma: float, failure_rate: float, seed: int = None):
+    """
+    Import the OCR app and swap its Gemini model for the stub
+
+    Returns:
+        The FastAPI app with the stub installed
+    """
+    if OCR_DIR not in sys.path:
+        sys.path.insert(0, OCR_DIR)
+
+    from app import extractor
+    from app.main import app
+
+    extractor.gemini_model = StubGeminiModel(median_latency_ms, latency_sigma, failure_rate, seed)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the OCR service against a stubbed Gemini backend')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--median-ms', type=float, default=LoadTestConfig.GEMINI_STUB_CONFIG['median_latency_ms'])
+    parser.add_argument('--sigma', type=float, default=LoadTestConfig.GEMINI_STUB_CONFIG['latency_sigma'])
+    parser.add_argument('--failure-rate', type=float, default=LoadTestConfig.GEMINI_STUB_CONFIG['failure_rate'])
+    parser.add_argument('--seed', type=int, default=LoadTestConfig.SEED_CONFIG['random_seed'])
+    args = parser.parse_args()
+
+    # The stub must be in place before the first request, so run uvicorn on the app object directly
+    app = install_stub(args.median_ms, args.sigma, args.failure_rate, args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Locust entry point for the HIS ML and OCR services
+
+Run one service at a time so saturation numbers are not mixed:
+    locust -f locustfile.py PredictiveAnalyticsUser --headless -t 5m --csv results/predict
+    locust -f locustfile.py RevenueLeakageUser --headless -t 5m --csv results/revenue
+    locust -f locustfile.py IDOCRUser --headless -t 5m --csv results/ocr
+
+Set LOADTEST_STEP_LOAD=true to drive the run with the stepped ramp from shapes.py.
+"""
+
+import os
+
+from predictive_users import PredictiveAnalyticsUser  # noqa: F401
+from revenue_users import RevenueLeakageUser  # noqa: F401
+from ocr_users import IDOCRUser  # noqa: F401
+
+if os.getenv('LOADTEST_STEP_LOAD', 'False').lower() == 'true':
+    from shapes import StepLoadShape  # noqa: F401
@@ -0,0 +1,83 @@
+"""
+Locust users for the ID OCR Service
+Uploads synthetic Aadhaar-style cards so no real identity documents are needed for load tests
+"""
+
+import io
+import random
+
+from locust import HttpUser, between, tag, task
+from PIL import Image, ImageDraw
+
+from config import LoadTestConfig
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya']
+LAST_NAMES = ['Sharma', 'Iyer', 'Patel', 'Reddy', 'Nair', 'Gupta', 'Das', 'Singh']
+
+
+def build_synthetic_id_card(rng: random.Random, size: tuple = (1012, 638), quality: int = 85) -> bytes:
+    """
+    Render a fake ID card as JPEG bytes
+
+    Args:
+        rng: Random generator (seeded for reproducible payloads)
+        size: Card size in pixels (default matches a 300dpi phone capture)
+        quality: JPEG quality
+
+    Returns:
+        Encoded JPEG bytes
+    """
+    image = Image.new('RGB', size, color=(250, 250, 245))
+    draw = ImageDraw.Draw(image)
+
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    dob = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2010)}"
+    gender = rng.choice(['Male', 'Female'])
+    # Issued Aadhaar numbers never start with 0 or 1, so a leading 0 keeps these obviously fake
+    digits = '0' + ''.join(str(rng.randint(0, 9)) for _ in range(11))
+    aadhaar = f"{digits[0:4]} {digits[4:8]} {digits[8:12]}"
+
+    draw.rectangle([0, 0, size[0], 90], fill=(230, 120, 40))
+    draw.text((40, 30), 'GOVERNMENT OF INDIA', fill=(255, 255, 255))
+    draw.rectangle([40, 130, 260, 400], outline=(120, 120, 120), width=3)
+    draw.text((300, 150), f'{first_name} {last_name}', fill=(0, 0, 0))
+    draw.text((300, 210), f'DOB: {dob}', fill=(0, 0, 0))
+    draw.text((300, 270), gender.upper(), fill=(0, 0, 0))
+    draw.text((360, 520), aadhaar, fill=(0, 0, 0))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+# Pre-render a small pool so image generation does not eat load-generator CPU
+_rng = random.Random(LoadTestConfig.SEED_CONFIG['random_seed'])
+CARD_POOL = [build_synthetic_id_card(_rng) for _ in range(8)]
+
+
+class IDOCRUser(HttpUser):
+    """
+    Simulates reception desks scanning patient ID cards
+    Each desk scans a card, then waits while the form is filled in
+    """
+
+    host = LoadTestConfig.OCR_HOST
+    wait_time = between(2.0, 6.0)
+
+    @tag('ocr', 'extract')
+    @task(10)
+    def extract_id(self):
+        """POST /extract-id with a synthetic card"""
+        payload = random.choice(CARD_POOL)
+        self.client.post(
+            '/extract-id',
+            files={'file': ('id_card.jpg', payload, 'image/jpeg')},
+            name='/extract-id'
+        )
+
+    @tag('ocr', 'health')
+    @task(1)
+    def health(self):
+        """GET /health"""
+        self.client.get('/health')
@@ -0,0 +1,71 @@
+"""
+Locust users for the Predictive Analytics ML Service
+Request mix mirrors the Node dashboards: frequent forecast polls, occasional detail views
+"""
+
+import random
+
+from locust import HttpUser, between, tag, task
+
+from config import LoadTestConfig
+
+
+class PredictiveAnalyticsUser(HttpUser):
+    """
+    Simulates a dashboard session against /ml/predict/*
+    Weights reflect how often each widget is refreshed
+    """
+
+    host = LoadTestConfig.PREDICT_HOST
+    wait_time = between(0.5, 2.0)
+
+    @tag('predict', 'opd')
+    @task(6)
+    def predict_opd(self):
+        """POST /ml/predict/opd with the horizons used by the OPD dashboard"""
+        hours = random.choices([24, 48, 168], weights=[8, 1, 1])[0]
+        self.client.post('/ml/predict/opd', json={'hours': hours}, name='/ml/predict/opd')
+
+    @tag('predict', 'opd')
+    @task(2)
+    def opd_rush_hours(self):
+        """GET /ml/predict/opd/rush-hours"""
+        self.client.get('/ml/predict/opd/rush-hours')
+
+    @tag('predict', 'beds')
+    @task(3)
+    def predict_beds(self):
+        """POST /ml/predict/beds"""
+        days = random.choices([7, 14, 30], weights=[8, 1, 1])[0]
+        self.client.post('/ml/predict/beds', json={'days': days}, name='/ml/predict/beds')
+
+    @tag('predict', 'beds')
+    @task(2)
+    def bed_status(self):
+        """GET /ml/predict/beds/status"""
+        self.client.get('/ml/predict/beds/status')
+
+    @tag('predict', 'lab')
+    @task(3)
+    def predict_lab(self):
+        """POST /ml/predict/lab"""
+        hours = random.choices([24, 48], weights=[9, 1])[0]
+        self.client.post('/ml/predict/lab', json={'hours': hours}, name='/ml/predict/lab')
+
+    @tag('predict', 'lab')
+    @task(1)
+    def lab_breakdown(self):
+        """GET /ml/predict/lab/breakdown"""
+        self.client.get('/ml/predict/lab/breakdown?days=7', name='/ml/predict/lab/breakdown')
+
+    @tag('predict')
+    @task(4)
+    def all_predictions(self):
+        """GET /ml/predictions (combined dashboard call)"""
+        self.client.get('/ml/predictions')
+
+    @tag('predict', 'health')
+    @task(1)
+    def health(self):
+        """GET /ml/predict/health"""
+        self.client.get('/ml/predict/health')
@@ -0,0 +1,281 @@
+"""
+Trace Replay Tool
+Re-issues a request trace captured by shared/request_capture.py against a target instance at
+1x or Nx speed and diffs the replayed latency distribution against the captured one
+
+Usage:
+    python replay.py captures/predictive-analytics.jsonl --target http://localhost:5002
+    python replay.py trace.jsonl --target http://staging:5001 --speed 4 --output results/replay.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+ANON_PREFIX = 'anon:'
+
+
+def load_trace(path: str, service: Optional[str] = None, route_prefix: Optional[str] = None) -> List[Dict]:
+    """
+    Load a JSONL trace sorted by start time
+
+    Args:
+        path: Trace file
+        service: Only keep records from this service
+        route_prefix: Only keep routes starting with this prefix
+
+    Returns:
+        List of trace records
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if service and record.get('service') != service:
+                continue
+            if route_prefix and not record.get('route', '').startswith(route_prefix):
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+def _contains_anonymized(value) -> bool:
+    if isinstance(value, str):
+        return value.startswith(ANON_PREFIX)
+    if isinstance(value, dict):
+        return any(_contains_anonymized(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_contains_anonymized(v) for v in value)
+    return False
+
+
+def is_replayable(record: Dict) -> bool:
+    """Records carrying hashed identifiers cannot be reproduced faithfully (they would 404)"""
+    return not any(_contains_anonymized(record.get(k)) for k in ('path_params', 'query', 'body'))
+
+
+def build_request(record: Dict, target: str) -> urllib.request.Request:
+    """Rebuild an HTTP request from a trace record"""
+    path = record['route']
+    for name, value in (record.get('path_params') or {}).items():
+        path = path.replace('{' + name + '}', str(value))
+
+    url = target.rstrip('/') + path
+    if record.get('query'):
+        url += '?' + urlencode(record['query'], doseq=True)
+
+    data = None
+    headers = {}
+    if record.get('body') is not None:
+        data = json.dumps(record['body']).encode()
+        headers['Content-Type'] = 'application/json'
+
+    return urllib.request.Request(url, data=data, headers=headers, method=record.get('method', 'GET'))
+
+
+def issue(record: Dict, target: str, timeout: float) -> Dict:
+    """Send one request and measure latency and response size"""
+    request = build_request(record, target)
+    start = time.perf_counter()
+    status, size = 0, 0
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+            size = len(response.read())
+    except urllib.error.HTTPError as e:
+        status = e.code
+        size = len(e.read() or b'')
+    except Exception:
+        status = 0
+    return {
+        'route': record['route'],
+        'method': record.get('method', 'GET'),
+        'status': status,
+        'duration_ms': (time.perf_counter() - start) * 1000,
+        'response_bytes': size,
+        'captured_ms': record['duration_ms'],
+        'captured_status': record.get('status'),
+    }
+
+
+def replay(records: List[Dict], target: str, speed: float, concurrency: int, timeout: float) -> List[Dict]:
+    """
+    Re-issue records preserving their relative timing divided by speed
+
+    Args:
+        records: Trace records sorted by ts
+        target: Base URL of the instance under test
+        speed: Time compression factor (1 = real time, 0 = as fast as possible)
+        concurrency: Maximum in-flight requests
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Per-request results
+    """
+    if not records:
+        return []
+
+    results: List[Dict] = []
+    lock = threading.Lock()
+    t0_trace = records[0]['ts']
+    t0_wall = time.perf_counter()
+    lagging = 0
+
+    def run(record):
+        result = issue(record, target, timeout)
+        with lock:
+            results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if speed > 0:
+                due = (record['ts'] - t0_trace) / speed
+                delay = due - (time.perf_counter() - t0_wall)
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -1.0:
+                    lagging += 1
+            pool.submit(run, record)
+
+    if lagging:
+        print(f"Warning: {lagging} requests were issued >1s late; raise --concurrency or lower --speed")
+    return results
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def ks_statistic(a: List[float], b: List[float]) -> Optional[float]:
+    """Two-sample Kolmogorov-Smirnov statistic (max distance between empirical CDFs)"""
+    if not a or not b:
+        return None
+    a, b = sorted(a), sorted(b)
+    i = j = 0
+    d = 0.0
+    while i < len(a) and j < len(b):
+        if a[i] <= b[j]:
+            i += 1
+        else:
+            j += 1
+        d = max(d, abs(i / len(a) - j / len(b)))
+    return round(d, 4)
+
+
+def summarize(values: List[float]) -> Dict:
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+    }
+
+
+def diff_distributions(results: List[Dict]) -> Dict[str, Dict]:
+    """
+    Compare captured vs replayed latency per route
+
+    Returns:
+        Mapping of 'METHOD route' to captured/replayed summaries, percentile changes and KS distance
+    """
+    groups: Dict[str, Tuple[List[float], List[float], List[int]]] = defaultdict(lambda: ([], [], []))
+    for r in results:
+        key = f"{r['method']} {r['route']}"
+        captured, replayed, statuses = groups[key]
+        captured.append(r['captured_ms'])
+        replayed.append(r['duration_ms'])
+        statuses.append(r['status'])
+
+    all_captured = [r['captured_ms'] for r in results]
+    all_replayed = [r['duration_ms'] for r in results]
+    groups['ALL'] = (all_captured, all_replayed, [r['status'] for r in results])
+
+    diff = {}
+    for key, (captured, replayed, statuses) in groups.items():
+        cap, rep = summarize(captured), summarize(replayed)
+        change = {}
+        for p in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if cap[p] and rep[p] is not None:
+                change[p] = round((rep[p] - cap[p]) / cap[p], 3)
+        diff[key] = {
+            'captured': cap,
+            'replayed': rep,
+            'change': change,
+            'ks_distance': ks_statistic(captured, replayed),
+            'error_ratio': round(sum(1 for s in statuses if s == 0 or s >= 500) / len(statuses), 4),
+        }
+    return diff
+
+
+def print_diff(diff: Dict[str, Dict]):
+    print(f"\n{'Route':<48}{'n':>6}{'cap p50':>9}{'rep p50':>9}{'cap p95':>9}{'rep p95':>9}{'p95 Δ':>8}{'KS':>7}")
+    for key in sorted(diff, key=lambda k: k == 'ALL'):
+        d = diff[key]
+        cap, rep = d['captured'], d['replayed']
+        print(f"{key[:47]:<48}{cap['count']:>6}{(cap['p50_ms'] or 0):>9.1f}{(rep['p50_ms'] or 0):>9.1f}"
+              f"{(cap['p95_ms'] or 0):>9.1f}{(rep['p95_ms'] or 0):>9.1f}"
+              f"{d['change'].get('p95_ms', 0):>+8.0%}{(d['ks_distance'] or 0):>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a captured request trace and diff latency distributions')
+    parser.add_argument('trace', help='JSONL trace written by RequestCaptureMiddleware')
+    parser.add_argument('--target', required=True, help='Base URL of the instance to replay against')
+    parser.add_argument('--speed', type=float, default=1.0, help='Speed-up factor (0 = no pacing)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--service', help='Only replay records from this service')
+    parser.add_argument('--route-prefix', help='Only replay routes with this prefix')
+    parser.add_argument('--limit', type=int, help='Replay at most this many records')
+    parser.add_argument('--include-anonymized', action='store_true',
+                        help='Also replay records with hashed identifiers (they will mostly 404)')
+    parser.add_argument('--output', help='Write per-route diff as JSON')
+    args = parser.parse_args()
+
+    records = load_trace(args.trace, args.service, args.route_prefix)
+    if not args.include_anonymized:
+        replayable = [r for r in records if is_replayable(r)]
+        skipped = len(records) - len(replayable)
+        if skipped:
+            print(f"Skipping {skipped} records with anonymized identifiers")
+        records = replayable
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print('Nothing to replay')
+        sys.exit(1)
+
+    span = records[-1]['ts'] - records[0]['ts']
+    print(f"Replaying {len(records)} requests spanning {span:.0f}s at {args.speed}x against {args.target}")
+
+    results = replay(records, args.target, args.speed, args.concurrency, args.timeout)
+    diff = diff_distributions(results)
+    print_diff(diff)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'trace': args.trace, 'target': args.target, 'speed': args.speed, 'routes': diff}, f, indent=2)
+        print(f"\nDiff written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
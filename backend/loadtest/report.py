@@ -0,0 +1,215 @@
+"""
+Load-Test Report
+Summarizes locust CSV output into p50/p95/p99 latency per endpoint and saturation throughput,
+saves it as a JSON baseline, and compares a run against a previous baseline
+
+Usage:
+    python report.py results/predict                        # print summary
+    python report.py results/predict --save baselines/predict.json
+    python report.py results/predict --compare baselines/predict.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import LoadTestConfig
+
+
+def _float(value: str) -> Optional[float]:
+    """Parse a locust CSV cell ('N/A' and blanks become None)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_endpoint_stats(csv_prefix: str) -> Dict[str, Dict]:
+    """
+    Read <prefix>_stats.csv into per-endpoint latency statistics
+
+    Args:
+        csv_prefix: Prefix passed to locust --csv
+
+    Returns:
+        Mapping of endpoint name to statistics
+    """
+    stats = {}
+    with open(f'{csv_prefix}_stats.csv', newline='') as f:
+        for row in csv.DictReader(f):
+            name = row['Name'] if row['Name'] == 'Aggregated' else f"{row['Type']} {row['Name']}"
+            requests = int(row['Request Count'])
+            failures = int(row['Failure Count'])
+            stats[name] = {
+                'requests': requests,
+                'failures': failures,
+                'failure_ratio': round(failures / requests, 4) if requests else 0.0,
+                'rps': _float(row['Requests/s']),
+                'p50_ms': _float(row['50%']),
+                'p95_ms': _float(row['95%']),
+                'p99_ms': _float(row['99%']),
+                'max_ms': _float(row['100%']),
+            }
+    return stats
+
+
+def find_saturation(csv_prefix: str) -> Dict:
+    """
+    Derive saturation throughput from <prefix>_stats_history.csv
+
+    History rows are grouped by user count; a step is healthy while its p95 and failure
+    ratio stay under LoadTestConfig.SATURATION_CRITERIA. Saturation throughput is the best
+    mean RPS among healthy steps.
+
+    Returns:
+        Dictionary with per-step results and the saturation point
+    """
+    path = f'{csv_prefix}_stats_history.csv'
+    if not os.path.exists(path):
+        return {'available': False, 'reason': 'No stats history (run locust with --csv)'}
+
+    criteria = LoadTestConfig.SATURATION_CRITERIA
+    by_users: Dict[int, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row['Name'] != 'Aggregated':
+                continue
+            users = int(row['User Count'])
+            rps, fps, p95 = _float(row['Requests/s']), _float(row['Failures/s']), _float(row['95%'])
+            if users == 0 or rps is None:
+                continue
+            by_users[users]['rps'].append(rps)
+            by_users[users]['fps'].append(fps or 0.0)
+            if p95 is not None:
+                by_users[users]['p95'].append(p95)
+
+    steps = []
+    for users in sorted(by_users):
+        samples = by_users[users]
+        # Skip the first samples of each step while the ramp settles
+        settle = min(len(samples['rps']) // 4, 5)
+        rps = samples['rps'][settle:] or samples['rps']
+        fps = samples['fps'][settle:] or samples['fps']
+        p95 = samples['p95'][settle:] or samples['p95']
+        mean_rps = sum(rps) / len(rps)
+        failure_ratio = (sum(fps) / len(fps)) / mean_rps if mean_rps else 0.0
+        mean_p95 = sum(p95) / len(p95) if p95 else None
+        healthy = (
+            failure_ratio <= criteria['max_failure_ratio']
+            and (mean_p95 is None or mean_p95 <= criteria['max_p95_ms'])
+        )
+        steps.append({
+            'users': users,
+            'rps': round(mean_rps, 2),
+            'p95_ms': round(mean_p95, 1) if mean_p95 is not None else None,
+            'failure_ratio': round(failure_ratio, 4),
+            'healthy': healthy,
+        })
+
+    healthy_steps = [s for s in steps if s['healthy']]
+    best = max(healthy_steps, key=lambda s: s['rps']) if healthy_steps else None
+    first_unhealthy = next((s for s in steps if not s['healthy']), None)
+
+    return {
+        'available': True,
+        'criteria': criteria,
+        'saturation_rps': best['rps'] if best else 0.0,
+        'saturation_users': best['users'] if best else 0,
+        'first_unhealthy_users': first_unhealthy['users'] if first_unhealthy else None,
+        'steps': steps,
+    }
+
+
+def build_report(csv_prefix: str) -> Dict:
+    """Build the full report for one locust run"""
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'source': csv_prefix,
+        'endpoints': read_endpoint_stats(csv_prefix),
+        'saturation': find_saturation(csv_prefix),
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Compare latency percentiles and saturation throughput against a baseline
+
+    Returns:
+        List of regressions (empty when within tolerance)
+    """
+    regressions = []
+    for name, stats in current['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if stats[key] is None or not base.get(key):
+                continue
+            change = (stats[key] - base[key]) / base[key]
+            if change > tolerance:
+                regressions.append({'endpoint': name, 'metric': key, 'baseline': base[key],
+                                    'current': stats[key], 'change': round(change, 3)})
+
+    cur_sat = current['saturation'].get('saturation_rps')
+    base_sat = baseline['saturation'].get('saturation_rps')
+    if cur_sat is not None and base_sat:
+        change = (cur_sat - base_sat) / base_sat
+        if change < -tolerance:
+            regressions.append({'endpoint': 'Aggregated', 'metric': 'saturation_rps', 'baseline': base_sat,
+                                'current': cur_sat, 'change': round(change, 3)})
+    return regressions
+
+
+def print_report(report: Dict):
+    """Print a human-readable summary"""
+    print(f"\nLoad-test report for {report['source']}")
+    print(f"{'Endpoint':<52}{'Reqs':>8}{'Fail%':>8}{'RPS':>8}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for name, s in sorted(report['endpoints'].items(), key=lambda kv: kv[0] == 'Aggregated'):
+        print(f"{name[:51]:<52}{s['requests']:>8}{s['failure_ratio'] * 100:>7.1f}%"
+              f"{(s['rps'] or 0):>8.1f}{(s['p50_ms'] or 0):>8.0f}{(s['p95_ms'] or 0):>8.0f}{(s['p99_ms'] or 0):>8.0f}")
+
+    sat = report['saturation']
+    if sat.get('available'):
+        print(f"\nSaturation throughput: {sat['saturation_rps']} req/s at {sat['saturation_users']} users"
+              f" (first unhealthy step: {sat['first_unhealthy_users']})")
+    else:
+        print(f"\nSaturation: {sat.get('reason')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a locust run and compare against a baseline')
+    parser.add_argument('csv_prefix', help='Prefix passed to locust --csv')
+    parser.add_argument('--save', help='Write the report as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=LoadTestConfig.REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    report = build_report(args.csv_prefix)
+    print_report(report)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for r in regressions:
+                print(f"  {r['endpoint']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
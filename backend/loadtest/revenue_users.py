@@ -0,0 +1,83 @@
+"""
+Locust users for the Revenue Leakage Detection ML Service
+Mixes expensive detection scans with the cheap list/dashboard reads that surround them
+"""
+
+import random
+
+from locust import HttpUser, between, tag, task
+
+from config import LoadTestConfig
+
+
+class RevenueLeakageUser(HttpUser):
+    """
+    Simulates a billing auditor session against /ml/revenue/*
+    Detection scans run with create_alerts disabled so repeated runs do not grow the seeded data
+    """
+
+    host = LoadTestConfig.REVENUE_HOST
+    wait_time = between(1.0, 3.0)
+
+    def on_start(self):
+        """Collect a few anomaly ids for the detail view task"""
+        self.anomaly_ids = []
+        with self.client.get('/ml/revenue/anomalies?limit=50', name='/ml/revenue/anomalies',
+                             catch_response=True) as response:
+            if response.ok:
+                anomalies = response.json().get('data', {}).get('anomalies', [])
+                self.anomaly_ids = [a['_id'] for a in anomalies if a.get('_id')]
+                response.success()
+
+    @tag('revenue', 'detect')
+    @task(2)
+    def detect_weekly(self):
+        """POST /ml/revenue/detect over the default 7-day window"""
+        self.client.post('/ml/revenue/detect', json={
+            'days': 7,
+            'include_rules': True,
+            'include_ml': True,
+            'create_alerts': False
+        }, name='/ml/revenue/detect [7d]')
+
+    @tag('revenue', 'detect')
+    @task(1)
+    def detect_monthly(self):
+        """POST /ml/revenue/detect over a 30-day window"""
+        self.client.post('/ml/revenue/detect', json={
+            'days': 30,
+            'include_rules': True,
+            'include_ml': True,
+            'create_alerts': False
+        }, name='/ml/revenue/detect [30d]')
+
+    @tag('revenue')
+    @task(5)
+    def list_anomalies(self):
+        """GET /ml/revenue/anomalies with the filters used by the admin page"""
+        status = random.choice([None, 'detected', 'under-review'])
+        url = '/ml/revenue/anomalies?limit=100'
+        if status:
+            url += f'&status={status}'
+        self.client.get(url, name='/ml/revenue/anomalies')
+
+    @tag('revenue')
+    @task(2)
+    def anomaly_detail(self):
+        """GET /ml/revenue/anomalies/{id}"""
+        if not self.anomaly_ids:
+            return
+        anomaly_id = random.choice(self.anomaly_ids)
+        self.client.get(f'/ml/revenue/anomalies/{anomaly_id}', name='/ml/revenue/anomalies/{id}')
+
+    @tag('revenue')
+    @task(4)
+    def dashboard(self):
+        """GET /ml/revenue/dashboard"""
+        self.client.get('/ml/revenue/dashboard')
+
+    @tag('revenue', 'health')
+    @task(1)
+    def health(self):
+        """GET /ml/revenue/health"""
+        self.client.get('/ml/revenue/health')
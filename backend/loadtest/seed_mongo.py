@@ -0,0 +1,262 @@
+"""
+Seed a local MongoDB with deterministic synthetic HIS data for load tests
+Generates the collections read by the predictive and revenue services with realistic
+intraday/weekly patterns and a controlled rate of billing anomalies
+
+Usage:
+    python seed_mongo.py                 # seed LOADTEST_MONGODB_URI / LOADTEST_DB_NAME
+    python seed_mongo.py --days 90 --drop
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+from bson import ObjectId
+from pymongo import ASCENDING, MongoClient
+
+from config import LoadTestConfig
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('seed_mongo')
+
+# Relative OPD / lab volume by hour of day (clinic hours with late-morning and evening peaks)
+HOURLY_PROFILE = np.array([
+    0, 0, 0, 0, 0, 0, 0, 0.2,
+    0.8, 1.2, 1.6, 1.7, 1.3, 0.7, 0.9, 1.1,
+    1.3, 1.0, 0.6, 0.3, 0.1, 0, 0, 0
+], dtype=float)
+HOURLY_PROFILE /= HOURLY_PROFILE.sum()
+
+# Relative volume by weekday (Monday=0), Sunday clinics are mostly closed
+WEEKDAY_FACTOR = np.array([1.25, 1.1, 1.0, 1.0, 1.05, 0.8, 0.3])
+
+SEEDED_COLLECTIONS = [
+    'appointments', 'lab_tests', 'radiology_tests', 'admissions', 'beds', 'billings',
+    'prescriptions', 'emr', 'tariffs', 'ai_anomalies'
+]
+
+TARIFFS = {
+    'CONSULTATION': 500.0,
+    'LAB-CBC': 350.0,
+    'LAB-LFT': 800.0,
+    'RAD-XRAY': 600.0,
+    'RAD-CT': 4500.0,
+    'MED-GENERIC': 40.0,
+    'BED-GENERAL': 1500.0,
+}
+
+
+class Seeder:
+    """Builds and inserts synthetic documents"""
+
+    def __init__(self, db, days: int, seed: int):
+        self.db = db
+        self.days = days
+        self.rng = np.random.default_rng(seed)
+        self.cfg = LoadTestConfig.SEED_CONFIG
+        self.end = datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.start = (self.end - timedelta(days=days)).replace(hour=0)
+        self.departments = [ObjectId() for _ in range(self.cfg['departments'])]
+
+    def _daily_counts(self, per_day: float) -> List[int]:
+        """Poisson daily volumes with weekly seasonality and a mild upward trend"""
+        counts = []
+        for d in range(self.days + 1):
+            day = self.start + timedelta(days=d)
+            trend = 1.0 + 0.1 * d / max(1, self.days)
+            counts.append(int(self.rng.poisson(per_day * WEEKDAY_FACTOR[day.weekday()] * trend)))
+        return counts
+
+    def _timestamps(self, per_day: float) -> List[datetime]:
+        """Event timestamps following the hourly profile, capped at the current hour"""
+        timestamps = []
+        for d, count in enumerate(self._daily_counts(per_day)):
+            day = self.start + timedelta(days=d)
+            hours = self.rng.choice(24, size=count, p=HOURLY_PROFILE)
+            minutes = self.rng.integers(0, 60, size=count)
+            for h, m in zip(hours, minutes):
+                ts = day + timedelta(hours=int(h), minutes=int(m))
+                if ts <= self.end:
+                    timestamps.append(ts)
+        return timestamps
+
+    def seed_appointments(self) -> int:
+        """OPD appointments (scheduledDate at midnight + scheduledTime 'HH:MM', as the Node API stores them)"""
+        docs = []
+        statuses = ['completed', 'checked-in', 'in-consultation', 'cancelled', 'no-show']
+        for ts in self._timestamps(self.cfg['opd_appointments_per_day']):
+            status = 'completed' if ts.date() < self.end.date() else str(self.rng.choice(statuses[:3]))
+            if self.rng.random() < 0.08:
+                status = str(self.rng.choice(statuses[3:]))
+            docs.append({
+                'patient': ObjectId(),
+                'department': self.departments[int(self.rng.integers(len(self.departments)))],
+                'type': 'opd',
+                'scheduledDate': ts.replace(hour=0, minute=0),
+                'scheduledTime': f'{ts.hour:02d}:{ts.minute:02d}',
+                'status': status,
+                'createdAt': ts - timedelta(days=int(self.rng.integers(0, 5))),
+                'updatedAt': ts,
+            })
+        return self._insert('appointments', docs)
+
+    def seed_lab_tests(self) -> int:
+        """Lab test orders"""
+        docs = []
+        for ts in self._timestamps(self.cfg['lab_tests_per_day']):
+            docs.append({
+                'patient': ObjectId(),
+                'visit': ObjectId(),
+                'test': str(self.rng.choice(['LAB-CBC', 'LAB-LFT'])),
+                'status': 'completed' if ts < self.end - timedelta(hours=6) else 'pending',
+                'createdAt': ts,
+                'completedAt': ts + timedelta(hours=float(self.rng.gamma(2.0, 2.0))),
+            })
+        return self._insert('lab_tests', docs)
+
+    def seed_admissions_and_beds(self) -> int:
+        """Admissions with lognormal length of stay, plus bed documents matching current occupancy"""
+        docs = []
+        currently_admitted = 0
+        for ts in self._timestamps(self.cfg['admissions_per_day']):
+            los_days = float(self.rng.lognormal(mean=1.2, sigma=0.6))
+            discharge = ts + timedelta(days=los_days)
+            admitted = discharge > self.end
+            currently_admitted += int(admitted)
+            docs.append({
+                'patient': ObjectId(),
+                'admissionDate': ts,
+                'dischargeDate': None if admitted else discharge,
+                'status': 'admitted' if admitted else 'discharged',
+            })
+        self._insert('admissions', docs)
+
+        total_beds = self.cfg['total_beds']
+        occupied = min(total_beds, currently_admitted)
+        beds = [{
+            'bedNumber': f'B{i:03d}',
+            'status': 'occupied' if i < occupied else 'available',
+        } for i in range(total_beds)]
+        self._insert('beds', beds)
+        return len(docs)
+
+    def seed_billing(self) -> int:
+        """Bills with EMR, prescriptions and radiology records, injecting anomalies at anomaly_rate"""
+        bills, emrs, prescriptions, radiology = [], [], [], []
+        anomaly_rate = self.cfg['anomaly_rate']
+
+        for ts in self._timestamps(self.cfg['bills_per_day']):
+            visit, patient = ObjectId(), ObjectId()
+            emrs.append({'visit': visit, 'patient': patient, 'date': ts})
+
+            med_id = ObjectId()
+            quantity = int(self.rng.integers(1, 20))
+            prescriptions.append({
+                'visit': visit, 'patient': patient, 'createdAt': ts, 'isDispensed': True,
+                'medicines': [{'medicine': med_id, 'quantity': quantity, 'rate': TARIFFS['MED-GENERIC']}],
+            })
+
+            items = [
+                self._item('consultation', 'CONSULTATION', 1, ObjectId()),
+                self._item('medicine', 'MED-GENERIC', quantity, med_id),
+            ]
+            if self.rng.random() < 0.3:
+                rad_id = ObjectId()
+                code = str(self.rng.choice(['RAD-XRAY', 'RAD-CT']))
+                radiology.append({'_id': rad_id, 'visit': visit, 'patient': patient, 'test': code,
+                                  'status': 'completed', 'createdAt': ts})
+                items.append(self._item('radiology', code, 1, rad_id))
+
+            bill_date = ts + timedelta(hours=float(self.rng.exponential(2.0)))
+            if self.rng.random() < anomaly_rate:
+                kind = self.rng.integers(4)
+                if kind == 0:
+                    items = items[1:]                             # consultation not billed
+                elif kind == 1:
+                    items[0]['rate'] *= 0.5                       # price below tariff
+                    items[0]['amount'] = items[0]['rate']
+                elif kind == 2:
+                    items.append(dict(items[-1]))                 # duplicate line item
+                else:
+                    bill_date = ts + timedelta(hours=72)          # delayed billing
+
+            grand_total = sum(i['amount'] for i in items)
+            bills.append({
+                'visit': visit, 'patient': patient, 'visitType': 'opd',
+                'billDate': bill_date, 'createdAt': ts,
+                'items': items,
+                'grandTotal': grand_total,
+                'paidAmount': grand_total if self.rng.random() < 0.85 else grand_total * 0.5,
+                'totalDiscount': 0.0,
+            })
+
+        self._insert('emr', emrs)
+        self._insert('prescriptions', prescriptions)
+        self._insert('radiology_tests', radiology)
+        return self._insert('billings', bills)
+
+    def seed_tariffs(self) -> int:
+        """Tariff master"""
+        return self._insert('tariffs', [{'serviceCode': code, 'rate': rate} for code, rate in TARIFFS.items()])
+
+    def _item(self, item_type: str, code: str, quantity: int, reference: ObjectId) -> Dict:
+        rate = TARIFFS[code]
+        return {
+            'itemType': item_type, 'itemCode': code, 'itemReference': reference,
+            'quantity': quantity, 'rate': rate, 'amount': rate * quantity, 'isBilled': True,
+        }
+
+    def _insert(self, collection: str, docs: List[Dict], batch_size: int = 5000) -> int:
+        for i in range(0, len(docs), batch_size):
+            self.db[collection].insert_many(docs[i:i + batch_size], ordered=False)
+        logger.info(f"Inserted {len(docs)} documents into {collection}")
+        return len(docs)
+
+    def create_indexes(self):
+        """Indexes the services' queries rely on (mirrors the Node schema indexes)"""
+        self.db.appointments.create_index([('scheduledDate', ASCENDING)])
+        self.db.appointments.create_index([('department', ASCENDING), ('scheduledDate', ASCENDING)])
+        self.db.lab_tests.create_index([('createdAt', ASCENDING)])
+        self.db.radiology_tests.create_index([('createdAt', ASCENDING)])
+        self.db.admissions.create_index([('admissionDate', ASCENDING)])
+        self.db.admissions.create_index([('dischargeDate', ASCENDING)])
+        self.db.billings.create_index([('billDate', ASCENDING)])
+        self.db.billings.create_index([('visit', ASCENDING)])
+        self.db.emr.create_index([('date', ASCENDING)])
+        self.db.prescriptions.create_index([('createdAt', ASCENDING)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a local MongoDB for HIS load tests')
+    parser.add_argument('--uri', default=LoadTestConfig.MONGODB_URI)
+    parser.add_argument('--db', default=LoadTestConfig.DB_NAME)
+    parser.add_argument('--days', type=int, default=LoadTestConfig.SEED_CONFIG['history_days'])
+    parser.add_argument('--seed', type=int, default=LoadTestConfig.SEED_CONFIG['random_seed'])
+    parser.add_argument('--drop', action='store_true', help='Drop seeded collections first')
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    db = client[args.db]
+
+    if args.drop:
+        for name in SEEDED_COLLECTIONS:
+            db[name].drop()
+        logger.info(f"Dropped {len(SEEDED_COLLECTIONS)} collections in {args.db}")
+
+    seeder = Seeder(db, days=args.days, seed=args.seed)
+    seeder.seed_tariffs()
+    seeder.seed_appointments()
+    seeder.seed_lab_tests()
+    seeder.seed_admissions_and_beds()
+    seeder.seed_billing()
+    seeder.create_indexes()
+
+    logger.info(f"Seeding complete: {args.days} days of history in {args.db}")
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Load shapes for the HIS Load-Test Suite
+A stepped ramp holds each user count long enough to read a stable throughput per step
+"""
+
+from locust import LoadTestShape
+
+from config import LoadTestConfig
+
+
+class StepLoadShape(LoadTestShape):
+    """
+    Adds step_users every step_seconds until max_users, then stops
+    report.py groups the stats history by user count to find the saturation step
+    """
+
+    step_users = LoadTestConfig.STEP_LOAD['step_users']
+    step_seconds = LoadTestConfig.STEP_LOAD['step_seconds']
+    max_users = LoadTestConfig.STEP_LOAD['max_users']
+    spawn_rate = LoadTestConfig.STEP_LOAD['spawn_rate']
+
+    def tick(self):
+        """Return (user_count, spawn_rate) for the current run time, or None to stop"""
+        run_time = self.get_run_time()
+        n_steps = self.max_users // self.step_users
+
+        if run_time >= n_steps * self.step_seconds:
+            return None
+
+        current_step = int(run_time // self.step_seconds) + 1
+        return current_step * self.step_users, self.spawn_rate
@@ -5,11 +5,13 @@ Provides endpoints for OPD, bed occupancy, and lab workload predictions
 
 import os
 import sys
-from datetime import datetime
-from typing import Optional, List
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, List, Union
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -18,10 +20,19 @@ from pydantic import BaseModel
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.utils import setup_logging, success_response, error_response
+from shared.request_capture import RequestCaptureMiddleware
+from shared.deadline import Deadline, StageCostTracker
+from shared.model_registry import RegistryPoller
 from config import Config
 from opd_predictor import get_opd_predictor
 from bed_predictor import get_bed_predictor
 from lab_predictor import get_lab_predictor
+from backtest import SERIES_FREQ, backtest, default_backends, load_series
+from scoped_models import department_scope, get_model_cache, parse_scope
+from series_predictor import get_series_predictor, get_series_specs, loaded_series_predictors, train_series
+from forecast_cache import get_forecast_cache, is_forecast_cached
+from forecast_monitor import AccuracyMonitor
+from forecast_publisher import ForecastPublisher
 
 # Setup logging
 logger = setup_logging('predictive_analytics_api')
@@ -29,6 +40,50 @@ logger = setup_logging('predictive_analytics_api')
 # Initialize components (lazy loading)
 _components_initialized = False
 
+# Per-process forecast timings and last good results, used when a request deadline is tight
+_stage_costs = StageCostTracker()
+_last_forecasts = {}
+
+# Model name -> predictor getter, for the registry endpoints and the version poller
+MODEL_GETTERS = {
+    'opd': get_opd_predictor,
+    'bed': get_bed_predictor,
+    'lab': get_lab_predictor,
+}
+
+# Picks up model versions published or activated by other worker processes (hospital-wide
+# models and the department models currently in the cache)
+_registry_poller = RegistryPoller(
+    lambda: ([get_predictor().model for get_predictor in MODEL_GETTERS.values()]
+             + [get_opd_predictor().department_model] + get_model_cache().values()
+             + [predictor.model for predictor in loaded_series_predictors()]),
+    interval_s=Config.MODEL_REGISTRY_CONFIG['poll_interval_s']
+)
+
+
+
+def fetch_actuals(predictor: str, scope: Optional[str], days: float) -> pd.DataFrame:
+    """Realized series of a logged predictor over the last days, for the accuracy monitor"""
+    if predictor in ('opd', 'opd_nowcast'):
+        return get_opd_predictor().fetch_hourly_series(days, scope)
+    if predictor == 'lab':
+        return get_lab_predictor().fetch_historical_data(days, scope)
+    if predictor == 'bed':
+        return get_bed_predictor().fetch_historical_data(days)
+    if predictor.startswith('series:'):
+        return get_series_predictor(predictor.split(':', 1)[1]).fetch_historical_data(days)
+    raise KeyError(f"No actuals source for predictor '{predictor}'")
+
+
+# Scores logged forecasts against actuals as their periods mature
+_accuracy_monitor = AccuracyMonitor(fetch_actuals, interval_s=Config.FORECAST_MONITOR_CONFIG['interval_s'])
+
+# Writes the current forecasts into the Node API's AIPrediction collection
+_forecast_publisher = ForecastPublisher(
+    lambda: {name: get_predictor().model for name, get_predictor in MODEL_GETTERS.items()},
+    check_interval_s=Config.FORECAST_PUBLISHER_CONFIG['check_interval_s']
+)
+
 
 def init_components():
     """Initialize all components lazily"""
@@ -53,8 +108,17 @@ async def lifespan(app: FastAPI):
         init_components()
     except Exception as e:
         logger.warning(f"Component initialization failed (will retry on first request): {e}")
+    if Config.MODEL_REGISTRY_CONFIG['enabled']:
+        _registry_poller.start()
+    if Config.FORECAST_MONITOR_CONFIG['enabled']:
+        _accuracy_monitor.start()
+    if Config.FORECAST_PUBLISHER_CONFIG['enabled']:
+        _forecast_publisher.start()
     yield
     # Shutdown: Cleanup if needed
+    _registry_poller.stop()
+    _accuracy_monitor.stop()
+    _forecast_publisher.stop()
     logger.info("Shutting down Predictive Analytics Service")
 
 
@@ -75,6 +139,18 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Optional request capture for load-test replay (see backend/loadtest/replay.py)
+capture_config = Config.REQUEST_CAPTURE_CONFIG
+if capture_config['enabled']:
+    app.add_middleware(
+        RequestCaptureMiddleware,
+        service='predictive-analytics',
+        path=capture_config['path'],
+        sample_rate=capture_config['sample_rate'],
+        salt=capture_config['salt'],
+        keep_fields=capture_config['keep_fields']
+    )
+
 
 # ============================================================
 # Pydantic Models for Request/Response
@@ -82,6 +158,23 @@ app.add_middleware(
 
 class OPDPredictRequest(BaseModel):
     hours: int = 24
+    department: Optional[str] = None  # department id for a department-scoped model
+    nowcast: bool = False  # correct the rest of today with today's arrivals so far
+
+
+class QueueSimulationRequest(BaseModel):
+    day: Optional[date] = None  # default: today
+    department: Optional[str] = None  # department id for a department-scoped model
+    doctors: Optional[Union[int, List[int], Dict[int, int]]] = None  # per clinic hour, 24 counts, or {hour: count}
+    replications: Optional[int] = None
+    service_distribution: Optional[str] = None  # lognormal, gamma, exponential, deterministic
+    service_mean_minutes: Optional[float] = None
+    service_cv: Optional[float] = None
+
+
+class DepartmentPredictRequest(BaseModel):
+    hours: int = 24
+    departments: List[str] = []  # department ids (default: every department)
 
 
 class BedPredictRequest(BaseModel):
@@ -90,11 +183,44 @@ class BedPredictRequest(BaseModel):
 
 class LabPredictRequest(BaseModel):
     hours: int = 24
+    department: Optional[str] = None  # department id for a department-scoped model
+
+
+class SlotPredictRequest(BaseModel):
+    model: str = "opd"  # opd or lab
+    department: Optional[str] = None
+    datetimes: Optional[List[datetime]] = None  # explicit slot times, any order
+    start: Optional[datetime] = None  # or a regular grid [start, end) every interval_minutes
+    end: Optional[datetime] = None
+    interval_minutes: int = 60
 
 
 class TrainModelsRequest(BaseModel):
-    models: List[str] = ["opd", "bed", "lab"]
+    models: List[str] = ["opd", "bed", "lab"]  # also "opd_departments" (global department model)
     force: bool = False
+    departments: List[str] = []  # also train department-scoped OPD/lab models
+
+
+class SeriesPredictRequest(BaseModel):
+    periods: Optional[int] = None  # hours or days, per the series granularity
+
+
+class SeriesTrainRequest(BaseModel):
+    series: List[str] = []  # default: every registered series
+    force: bool = False
+
+
+class ActivateVersionRequest(BaseModel):
+    version: Optional[str] = None  # None rolls back to the previous version
+
+
+class BacktestRequest(BaseModel):
+    series: str = "opd"
+    backends: Optional[List[str]] = None
+    folds: Optional[int] = None
+    horizon: Optional[int] = None
+    step: Optional[int] = None
+    include_per_horizon: bool = True
 
 
 # ============================================================
@@ -158,57 +284,269 @@ async def predict_opd(request: OPDPredictRequest):
     
     Request body:
     {
-        "hours": 24  // Number of hours to predict (default: 24)
+        "hours": 24,        // Number of hours to predict (default: 24)
+        "department": null, // Optional department id (department-scoped model)
+        "nowcast": false    // Rescale the rest of today by today's arrivals so far
     }
     """
     try:
         init_components()
         
+        scope = department_scope(request.department)
+        if scope is not None:
+            parse_scope(scope)
+        
         predictor = get_opd_predictor()
+        model = predictor.get_model(scope)
         
-        if not predictor.model.is_trained:
+        if not model.is_trained:
             # Try to train first
-            train_result = predictor.train()
-            if not train_result.get('success') and not predictor.model.is_trained:
+            train_result = predictor.train(scope=scope)
+            if not train_result.get('success') and not model.is_trained:
                 return JSONResponse(
                     content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
                     status_code=400
                 )
         
-        result = predictor.predict(hours=request.hours)
+        if request.nowcast:
+            result = predictor.nowcast(hours=request.hours, scope=scope)
+        else:
+            result = predictor.predict(hours=request.hours, scope=scope)
         
         if result.get('success'):
             return JSONResponse(content=success_response(result))
         else:
             return JSONResponse(content=error_response(result.get('error', 'Prediction failed')), status_code=500)
         
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_SCOPE'), status_code=400)
     except Exception as e:
         logger.error(f"OPD prediction error: {e}")
         return JSONResponse(content=error_response(str(e)), status_code=500)
 
 
 @app.get('/ml/predict/opd/rush-hours')
-async def get_opd_rush_hours():
+async def get_opd_rush_hours(department: Optional[str] = Query(default=None)):
     """
-    Get OPD rush hour summary by day
-    GET /ml/predict/opd/rush-hours
+    Get OPD rush hour summary by day (7x24 heatmap materialized at training time)
+    GET /ml/predict/opd/rush-hours?department=<id>
     """
     try:
         init_components()
         
+        scope = department_scope(department)
+        if scope is not None:
+            parse_scope(scope)
+        
         predictor = get_opd_predictor()
-        result = predictor.get_rush_hour_summary()
+        result = predictor.get_rush_hour_summary(scope=scope)
         
         if 'error' in result:
             return JSONResponse(content=error_response(result['error']), status_code=500)
         
         return JSONResponse(content=success_response(result))
         
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_SCOPE'), status_code=400)
     except Exception as e:
         logger.error(f"Rush hours error: {e}")
         return JSONResponse(content=error_response(str(e)), status_code=500)
 
 
+@app.post('/ml/predict/opd/departments')
+async def predict_opd_departments(request: DepartmentPredictRequest):
+    """
+    Predict OPD volumes of every department with the global department model
+    POST /ml/predict/opd/departments
+    
+    Request body:
+    {
+        "hours": 24,        // Number of hours to predict (default: 24)
+        "departments": []   // Department ids (default: all departments)
+    }
+    """
+    try:
+        init_components()
+        
+        predictor = get_opd_predictor()
+        if not predictor.department_model.is_trained:
+            train_result = predictor.train_departments()
+            if not train_result.get('success'):
+                return JSONResponse(
+                    content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
+                    status_code=400
+                )
+        
+        result = predictor.predict_departments(hours=request.hours, departments=request.departments or None)
+        
+        if result.get('success'):
+            return JSONResponse(content=success_response(result))
+        else:
+            return JSONResponse(content=error_response(result.get('error', 'Prediction failed')), status_code=500)
+        
+    except Exception as e:
+        logger.error(f"Department OPD prediction error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.get('/ml/predict/opd/departments/rush-hours')
+async def get_opd_department_rush_hours(department: Optional[List[str]] = Query(default=None)):
+    """
+    Weekly rush hour heatmaps of every department from the global department model
+    GET /ml/predict/opd/departments/rush-hours?department=<id>&department=<id>
+    """
+    try:
+        init_components()
+        
+        result = get_opd_predictor().get_department_rush_hours(department)
+        
+        if 'error' in result:
+            return JSONResponse(content=error_response(result['error'], 'MODEL_NOT_TRAINED'), status_code=400)
+        
+        return JSONResponse(content=success_response(result))
+        
+    except Exception as e:
+        logger.error(f"Department rush hours error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.post('/ml/predict/opd/queue')
+def simulate_opd_queue(request: QueueSimulationRequest):
+    """
+    Simulate a day's OPD queue from the arrival forecast: wait-time percentiles per hour
+    POST /ml/predict/opd/queue
+    
+    Request body:
+    {
+        "day": null,                    // Day to simulate (default: today)
+        "department": null,             // Optional department id (department-scoped model)
+        "doctors": 4,                   // Per clinic hour, 24 hourly counts, or {"10": 5} overrides
+        "replications": 2000,           // Monte Carlo replications
+        "service_distribution": null,   // lognormal, gamma, exponential or deterministic
+        "service_mean_minutes": null,   // Mean consultation time
+        "service_cv": null              // Consultation time std / mean
+    }
+    
+    Runs with the same day share their random draws, so "what if we add one doctor" is a
+    second call with a different doctors value.
+    """
+    try:
+        init_components()
+        
+        scope = department_scope(request.department)
+        if scope is not None:
+            parse_scope(scope)
+        
+        predictor = get_opd_predictor()
+        if not predictor.get_model(scope).is_trained:
+            return JSONResponse(
+                content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
+                status_code=400
+            )
+        
+        result = predictor.simulate_queue(
+            day=request.day,
+            doctors=request.doctors,
+            scope=scope,
+            replications=request.replications,
+            service_distribution=request.service_distribution,
+            service_mean_minutes=request.service_mean_minutes,
+            service_cv=request.service_cv
+        )
+        
+        if result.get('success'):
+            return JSONResponse(content=success_response(result))
+        return JSONResponse(content=error_response(result.get('error', 'Simulation failed')), status_code=500)
+        
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_REQUEST'), status_code=400)
+    except Exception as e:
+        logger.error(f"OPD queue simulation error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+# ============================================================
+# Slot Prediction Endpoint
+# ============================================================
+
+@app.post('/ml/predict/slots')
+async def predict_slots(request: SlotPredictRequest):
+    """
+    Predictions for many arbitrary timestamps (clinic slots, shift boundaries) in one call
+    POST /ml/predict/slots
+    
+    Request body:
+    {
+        "model": "opd",                  // opd or lab
+        "department": null,              // Optional department id
+        "datetimes": ["2025-01-06T09:00:00", "2025-01-06T09:15:00"],
+        // or instead of datetimes:
+        "start": "2025-01-06T00:00:00", "end": "2025-01-13T00:00:00", "interval_minutes": 15
+    }
+    
+    Results are columnar and aligned with the requested timestamps.
+    """
+    getters = {'opd': get_opd_predictor, 'lab': get_lab_predictor}
+    if request.model not in getters:
+        return JSONResponse(content=error_response(f"Unknown model '{request.model}'", 'INVALID_MODEL'), status_code=400)
+    
+    if request.datetimes is not None:
+        n_points = len(request.datetimes)
+    elif request.start is not None and request.end is not None and request.interval_minutes > 0:
+        # Grid size [start, end) computed before the grid is built
+        step = timedelta(minutes=request.interval_minutes)
+        n_points = max(-((request.start - request.end) // step), 0)
+    else:
+        return JSONResponse(
+            content=error_response('Provide datetimes, or start, end and a positive interval_minutes', 'INVALID_REQUEST'),
+            status_code=400
+        )
+    
+    max_points = Config.PREDICTION_CONFIG['max_batch_points']
+    if n_points > max_points:
+        return JSONResponse(
+            content=error_response(f'{n_points} timestamps requested, the limit is {max_points}', 'TOO_MANY_POINTS'),
+            status_code=400
+        )
+    
+    if request.datetimes is not None:
+        datetimes = request.datetimes
+    else:
+        datetimes = pd.date_range(request.start, request.end, freq=f'{request.interval_minutes}min', inclusive='left')
+    
+    try:
+        init_components()
+        
+        scope = department_scope(request.department)
+        if scope is not None:
+            parse_scope(scope)
+        
+        predictor = getters[request.model]()
+        model = predictor.get_model(scope)
+        if not model.is_trained:
+            return JSONResponse(
+                content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
+                status_code=400
+            )
+        if not model.supports_arbitrary_timestamps:
+            return JSONResponse(
+                content=error_response(f'{model.model_type} models cannot forecast arbitrary timestamps', 'UNSUPPORTED_MODEL'),
+                status_code=400
+            )
+        
+        result = predictor.predict_slots(list(datetimes), scope=scope)
+        
+        if result.get('success'):
+            return JSONResponse(content=success_response(result))
+        return JSONResponse(content=error_response(result.get('error', 'Prediction failed')), status_code=500)
+        
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_SCOPE'), status_code=400)
+    except Exception as e:
+        logger.error(f"Slot prediction error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
 # ============================================================
 # Bed Occupancy Prediction Endpoints
 # ============================================================
@@ -283,29 +621,37 @@ async def predict_lab(request: LabPredictRequest):
     
     Request body:
     {
-        "hours": 24  // Number of hours to predict (default: 24)
+        "hours": 24,        // Number of hours to predict (default: 24)
+        "department": null  // Optional department id (department-scoped model)
     }
     """
     try:
         init_components()
         
+        scope = department_scope(request.department)
+        if scope is not None:
+            parse_scope(scope)
+        
         predictor = get_lab_predictor()
+        model = predictor.get_model(scope)
         
-        if not predictor.model.is_trained:
-            train_result = predictor.train()
-            if not train_result.get('success') and not predictor.model.is_trained:
+        if not model.is_trained:
+            train_result = predictor.train(scope=scope)
+            if not train_result.get('success') and not model.is_trained:
                 return JSONResponse(
                     content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
                     status_code=400
                 )
         
-        result = predictor.predict(hours=request.hours)
+        result = predictor.predict(hours=request.hours, scope=scope)
         
         if result.get('success'):
             return JSONResponse(content=success_response(result))
         else:
             return JSONResponse(content=error_response(result.get('error', 'Prediction failed')), status_code=500)
         
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_SCOPE'), status_code=400)
     except Exception as e:
         logger.error(f"Lab prediction error: {e}")
         return JSONResponse(content=error_response(str(e)), status_code=500)
@@ -333,6 +679,101 @@ async def get_lab_breakdown(days: int = Query(default=7)):
         return JSONResponse(content=error_response(str(e)), status_code=500)
 
 
+# ============================================================
+# Registered Series Endpoints
+# ============================================================
+
+@app.get('/ml/predict/series')
+async def list_series():
+    """
+    Registered operational series (Config.SERIES_REGISTRY) and their model status
+    GET /ml/predict/series
+    """
+    try:
+        loaded = {predictor.name: predictor for predictor in loaded_series_predictors()}
+        series = []
+        for name, spec in get_series_specs().items():
+            predictor = loaded.get(name)
+            series.append({
+                'name': name,
+                'description': spec['description'],
+                'granularity': spec['granularity'],
+                'backend': spec['backend'],
+                'loaded': predictor is not None,
+                'is_trained': predictor.model.is_trained if predictor is not None else None,
+            })
+        return JSONResponse(content=success_response({'series': series}))
+        
+    except Exception as e:
+        logger.error(f"Series listing error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.post('/ml/predict/series/train')
+def train_registered_series(request: SeriesTrainRequest):
+    """
+    Train registered series concurrently in the shared training pool
+    POST /ml/predict/series/train
+    
+    Request body:
+    {
+        "series": ["emergency_arrivals"],  // default: all registered series
+        "force": false
+    }
+    """
+    try:
+        init_components()
+        
+        results = train_series(request.series or None, force=request.force)
+        return JSONResponse(content=success_response({
+            'all_success': all(r.get('success', False) for r in results.values()),
+            'results': results
+        }, message='Training complete'))
+        
+    except KeyError as e:
+        return JSONResponse(content=error_response(str(e.args[0]), 'INVALID_SERIES'), status_code=400)
+    except Exception as e:
+        logger.error(f"Series training error: {e}")
+        return JSONResponse(content=error_response(str(e), 'TRAINING_FAILED'), status_code=500)
+
+
+@app.post('/ml/predict/series/{name}')
+async def predict_series(name: str, request: SeriesPredictRequest):
+    """
+    Forecast a registered series
+    POST /ml/predict/series/{name}
+    
+    Request body:
+    {
+        "periods": 24  // hours or days, per the series granularity (default: service default)
+    }
+    """
+    try:
+        init_components()
+        
+        predictor = get_series_predictor(name)
+        if not predictor.model.is_trained:
+            train_result = predictor.train()
+            if not train_result.get('success') and not predictor.model.is_trained:
+                return JSONResponse(
+                    content=error_response('Model not trained. Please train first.', 'MODEL_NOT_TRAINED'),
+                    status_code=400
+                )
+        
+        result = predictor.predict(periods=request.periods)
+        
+        if result.get('success'):
+            return JSONResponse(content=success_response(result))
+        else:
+            return JSONResponse(content=error_response(result.get('error', 'Prediction failed')), status_code=500)
+        
+    except KeyError as e:
+        return JSONResponse(content=error_response(str(e.args[0]), 'INVALID_SERIES'), status_code=400)
+    except Exception as e:
+        logger.error(f"Series prediction error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
 # ============================================================
 # Training Endpoints
 # ============================================================
@@ -346,12 +787,17 @@ async def train_models(request: TrainModelsRequest):
     Request body:
     {
         "models": ["opd", "bed", "lab"],  // Models to train (default: all)
-        "force": false                      // Force retrain
+        "force": false,                     // Force retrain
+        "departments": []                   // Also train these department-scoped OPD/lab models
     }
     """
     try:
         init_components()
         
+        scopes = [department_scope(d) for d in request.departments]
+        for scope in scopes:
+            parse_scope(scope)
+        
         results = {}
         
         if 'opd' in request.models:
@@ -369,19 +815,204 @@ async def train_models(request: TrainModelsRequest):
             predictor = get_lab_predictor()
             results['lab'] = predictor.train(force=request.force)
         
+        if 'opd_departments' in request.models:
+            logger.info("Training department-level OPD model...")
+            results['opd_departments'] = get_opd_predictor().train_departments(force=request.force)
+        
+        for scope in scopes:
+            if 'opd' in request.models:
+                results[f'opd:{scope}'] = get_opd_predictor().train(force=request.force, scope=scope)
+            if 'lab' in request.models:
+                results[f'lab:{scope}'] = get_lab_predictor().train(force=request.force, scope=scope)
+        
         # Check if all succeeded
         all_success = all(r.get('success', False) for r in results.values())
         
+        # Publish the new forecasts for the Node API right away
+        if any(r.get('retrained') for r in results.values()):
+            _forecast_publisher.trigger()
+        
         return JSONResponse(content=success_response({
             'all_success': all_success,
             'results': results
         }, message='Training complete'))
         
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_SCOPE'), status_code=400)
     except Exception as e:
         logger.error(f"Training error: {e}")
         return JSONResponse(content=error_response(str(e), 'TRAINING_FAILED'), status_code=500)
 
 
+@app.get('/ml/predict/models/versions')
+async def get_model_versions():
+    """
+    List registry versions of every model
+    GET /ml/predict/models/versions
+    """
+    try:
+        init_components()
+        
+        versions = {}
+        for name, get_predictor in MODEL_GETTERS.items():
+            model = get_predictor().model
+            versions[name] = {
+                'model_type': model.model_type,
+                'current_version': model.model_version,
+                'versions': model.list_versions()
+            }
+        
+        return JSONResponse(content=success_response(versions))
+        
+    except Exception as e:
+        logger.error(f"Model versions error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.get('/ml/predict/models/cache')
+async def get_model_cache_stats():
+    """
+    Department-scoped model cache statistics (hits, misses, evictions, load latency, memory)
+    GET /ml/predict/models/cache
+    """
+    try:
+        return JSONResponse(content=success_response(get_model_cache().stats()))
+    except Exception as e:
+        logger.error(f"Model cache stats error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.get('/ml/predict/forecasts/cache')
+async def get_forecast_cache_stats():
+    """
+    Forecast result cache statistics (hits, misses, evictions)
+    GET /ml/predict/forecasts/cache
+    """
+    try:
+        return JSONResponse(content=success_response(get_forecast_cache().stats()))
+    except Exception as e:
+        logger.error(f"Forecast cache stats error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.get('/ml/predict/accuracy')
+def get_forecast_accuracy(predictor: Optional[str] = Query(default=None), refresh: bool = Query(default=False)):
+    """
+    Rolling accuracy of served forecasts against realized actuals, per predictor and horizon step
+    GET /ml/predict/accuracy?predictor=opd&refresh=false
+    
+    With refresh, newly matured periods are scored before the metrics are returned.
+    """
+    try:
+        if refresh:
+            _accuracy_monitor.run_once()
+        return JSONResponse(content=success_response(_accuracy_monitor.get_metrics(predictor)))
+    except Exception as e:
+        logger.error(f"Forecast accuracy error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.post('/ml/predict/publish')
+def publish_forecasts():
+    """
+    Write the current OPD, bed and lab forecasts into the AIPrediction collection now
+    POST /ml/predict/publish
+    """
+    try:
+        init_components()
+        
+        results = _forecast_publisher.publish_due(force=True)
+        return JSONResponse(content=success_response({
+            'all_success': all(r.get('success', False) for r in results.values()),
+            'results': results
+        }, message='Forecasts published'))
+        
+    except Exception as e:
+        logger.error(f"Forecast publishing error: {e}")
+        return JSONResponse(content=error_response(str(e)), status_code=500)
+
+
+@app.post('/ml/predict/models/{name}/activate')
+async def activate_model_version(name: str, request: ActivateVersionRequest):
+    """
+    Make a registry version current (rollback when no version is given)
+    POST /ml/predict/models/bed/activate
+    
+    Request body:
+    {
+        "version": "20250101T020000000000-a1b2c3"  // optional, default: previous version
+    }
+    
+    Other workers switch on their next registry poll.
+    """
+    if name not in MODEL_GETTERS:
+        return JSONResponse(content=error_response(f"Unknown model '{name}'", 'INVALID_MODEL'), status_code=400)
+    
+    try:
+        init_components()
+        
+        result = MODEL_GETTERS[name]().model.activate_version(request.version)
+        if not result['success']:
+            return JSONResponse(
+                content=error_response(result.get('error', 'Activation failed'), 'ACTIVATION_FAILED'),
+                status_code=400
+            )
+        
+        return JSONResponse(content=success_response(result, message=f"Activated {name} version {result['version']}"))
+        
+    except Exception as e:
+        logger.error(f"Model activation error: {e}")
+        return JSONResponse(content=error_response(str(e), 'ACTIVATION_FAILED'), status_code=500)
+
+
+@app.post('/ml/predict/backtest')
+def run_backtest(request: BacktestRequest):
+    """
+    Rolling-origin backtest of one or more forecasting backends
+    POST /ml/predict/backtest
+    
+    Request body:
+    {
+        "series": "opd",                          // opd, bed or lab
+        "backends": ["prophet", "numpy:holt_winters"],  // default: all suitable backends
+        "folds": 4, "horizon": 24, "step": 24     // default: BACKTEST_CONFIG
+    }
+    """
+    try:
+        if request.series not in SERIES_FREQ:
+            return JSONResponse(
+                content=error_response(f"Unknown series '{request.series}'", 'INVALID_SERIES'),
+                status_code=400
+            )
+        
+        data = load_series(request.series)
+        if data.empty:
+            return JSONResponse(content=error_response('No historical data', 'NO_DATA'), status_code=400)
+        
+        report = backtest(
+            data,
+            request.backends or default_backends(request.series),
+            SERIES_FREQ[request.series],
+            folds=request.folds,
+            horizon=request.horizon,
+            step=request.step
+        )
+        if not report['success']:
+            return JSONResponse(content=error_response(report['error'], 'BACKTEST_FAILED'), status_code=400)
+        
+        if not request.include_per_horizon:
+            for result in report['backends'].values():
+                result.pop('per_horizon', None)
+        
+        return JSONResponse(content=success_response(report))
+        
+    except ValueError as e:
+        return JSONResponse(content=error_response(str(e), 'INVALID_BACKEND'), status_code=400)
+    except Exception as e:
+        logger.error(f"Backtest error: {e}")
+        return JSONResponse(content=error_response(str(e), 'BACKTEST_FAILED'), status_code=500)
+
+
 @app.get('/ml/predict/train/status')
 async def get_training_status():
     """
@@ -397,6 +1028,11 @@ async def get_training_status():
         
         return JSONResponse(content=success_response({
             'opd': opd.get_model_info(),
+            'opd_departments': {
+                'model_type': opd.department_model.model_type,
+                'departments': len(opd.department_model.series_ids),
+                **opd.department_model.get_model_info()
+            },
             'bed': bed.get_model_info(),
             'lab': lab.get_model_info()
         }))
@@ -411,36 +1047,71 @@ async def get_training_status():
 # ============================================================
 
 @app.get('/ml/predictions')
-async def get_all_predictions():
+async def get_all_predictions(http_request: Request, deadline_ms: Optional[float] = Query(default=None)):
     """
     Get predictions from all models
-    GET /ml/predictions
+    GET /ml/predictions?deadline_ms=2000
+    
+    The deadline may also be sent as the X-Request-Deadline-Ms header. Forecasts are computed
+    in Config.PREDICTIONS_STAGE_PRIORITY order; one that no longer fits the deadline is served
+    from the last computed result (marked cached) or skipped, and the response is flagged partial.
     """
     try:
         init_components()
         
-        results = {}
+        deadline_config = Config.DEADLINE_CONFIG
+        deadline = Deadline.from_request(
+            http_request.headers.get(deadline_config['header']),
+            deadline_ms,
+            default_ms=deadline_config['default_ms'],
+            max_ms=deadline_config['max_ms'],
+            reserve_ms=deadline_config['reserve_ms']
+        )
         
-        # OPD
-        opd = get_opd_predictor()
-        if opd.model.is_trained:
-            results['opd'] = opd.predict(hours=24)
-        else:
-            results['opd'] = {'error': 'Model not trained'}
+        # name -> (predictor getter, horizon, forecast call)
+        stages = {
+            'opd': (get_opd_predictor, 24, lambda p, horizon: p.predict(hours=horizon)),
+            'bed': (get_bed_predictor, 7, lambda p, horizon: p.predict(days=horizon)),
+            'lab': (get_lab_predictor, 24, lambda p, horizon: p.predict(hours=horizon)),
+        }
         
-        # Bed
-        bed = get_bed_predictor()
-        if bed.model.is_trained:
-            results['bed'] = bed.predict(days=7)
-        else:
-            results['bed'] = {'error': 'Model not trained'}
+        results = {}
+        degraded = {'cached': [], 'skipped': []}
         
-        # Lab
-        lab = get_lab_predictor()
-        if lab.model.is_trained:
-            results['lab'] = lab.predict(hours=24)
-        else:
-            results['lab'] = {'error': 'Model not trained'}
+        for name in Config.PREDICTIONS_STAGE_PRIORITY:
+            get_predictor, horizon, run_forecast = stages[name]
+            predictor = get_predictor()
+            
+            if not predictor.model.is_trained:
+                results[name] = {'error': 'Model not trained'}
+                continue
+            
+            # A forecast already in the forecast cache costs next to nothing; the stage cost
+            # estimates computing it, so only cache misses are checked against it and timed
+            warm = is_forecast_cached(name, predictor.model, horizon)
+            
+            if not warm and deadline.is_bounded and not deadline.allows(_stage_costs.estimate(name)):
+                cached = _get_cached_forecast(name)
+                if cached is not None:
+                    results[name] = cached
+                    degraded['cached'].append(name)
+                else:
+                    results[name] = {'error': 'Skipped: request deadline reached'}
+                    degraded['skipped'].append(name)
+                continue
+            
+            stage_start = time.perf_counter()
+            results[name] = run_forecast(predictor, horizon)
+            if not warm:
+                _stage_costs.record(name, (time.perf_counter() - stage_start) * 1000)
+            
+            if results[name].get('success'):
+                _last_forecasts[name] = {'result': results[name], 'generated_at': datetime.now()}
+        
+        partial = bool(degraded['cached'] or degraded['skipped'])
+        if deadline.is_bounded:
+            results['partial'] = partial
+            results['degradation'] = {**degraded, **deadline.to_dict()}
         
         return JSONResponse(content=success_response(results))
         
@@ -449,6 +1120,21 @@ async def get_all_predictions():
         return JSONResponse(content=error_response(str(e)), status_code=500)
 
 
+def _get_cached_forecast(name: str) -> Optional[dict]:
+    """Last successful forecast for a predictor, if it is recent enough to serve"""
+    entry = _last_forecasts.get(name)
+    if entry is None:
+        return None
+    age = (datetime.now() - entry['generated_at']).total_seconds()
+    if age > Config.DEADLINE_CONFIG['max_stale_seconds']:
+        return None
+    return {
+        **entry['result'],
+        'cached': True,
+        'generated_at': entry['generated_at'].isoformat()
+    }
+
+
 # ============================================================
 # Error Handlers
 # ============================================================
@@ -0,0 +1,331 @@
+"""
+Rolling-Origin Backtesting for Predictive Analytics
+Re-trains a forecaster at successive cutoffs, forecasts the following horizon and scores it
+against what actually happened, so backends can be compared on accuracy and latency
+
+Usage:
+    python backtest.py opd                                   # default backends for the series
+    python backtest.py bed --backends arima numpy:holt_winters --folds 6
+    python backtest.py lab --csv lab_hourly.csv --horizon 48 --output results/lab.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.utils import setup_logging
+from config import Config
+from time_series import (ARIMAPredictor, BasePredictor, NumpyForecaster, ProfileForecaster, ProphetPredictor,
+                         prophet_available)
+
+logger = setup_logging('backtest')
+
+# Sampling frequency of each series
+SERIES_FREQ = {'opd': 'H', 'lab': 'H', 'bed': 'D'}
+
+
+def default_backends(series: str) -> List[str]:
+    """Backends compared when none are requested"""
+    if SERIES_FREQ.get(series) == 'D':
+        return ['arima', 'numpy:holt_winters']
+    backends = ['profile', 'numpy:holt_winters', 'numpy:hour_of_week', 'numpy:seasonal_naive']
+    return (['prophet'] + backends) if prophet_available() else backends
+
+
+def build_predictor(backend: str, model_path: str, overrides: Optional[Dict] = None) -> BasePredictor:
+    """
+    Build an untrained predictor from a backend spec
+
+    Args:
+        backend: 'prophet', 'arima', 'profile', 'numpy' or 'numpy:<method>'
+        model_path: Where the predictor may save its model (a throwaway path)
+        overrides: Config keys overriding the service defaults
+
+    Returns:
+        Predictor instance
+    """
+    name, _, method = backend.partition(':')
+    if name == 'prophet':
+        config = dict(Config.PROPHET_PARAMS)
+        predictor_cls = ProphetPredictor
+    elif name == 'arima':
+        # Nested order-search pools inside backtest workers would oversubscribe the machine
+        config = dict(Config.ARIMA_PARAMS, order_selection='fixed')
+        predictor_cls = ARIMAPredictor
+    elif name == 'profile':
+        config = dict(Config.PROFILE_FORECASTER_PARAMS)
+        predictor_cls = ProfileForecaster
+    elif name == 'numpy':
+        config = dict(Config.NUMPY_FORECASTER_PARAMS)
+        if method:
+            config['method'] = method
+        predictor_cls = NumpyForecaster
+    else:
+        raise ValueError(f"Unknown backend '{backend}'")
+
+    config.update(overrides or {})
+    config['forecast_origin'] = 'train_end'
+    return predictor_cls(model_path=model_path, config=config)
+
+
+def run_fold(backend: str, train: pd.DataFrame, test: pd.DataFrame, freq: str,
+             overrides: Optional[Dict] = None) -> Dict:
+    """
+    Train on one fold and forecast its test window (runs in a worker process)
+
+    Returns:
+        Fold result with per-step forecasts and fit/predict latency
+    """
+    workdir = tempfile.mkdtemp(prefix='backtest_')
+    try:
+        predictor = build_predictor(backend, os.path.join(workdir, 'model.pkl'), overrides)
+
+        start = time.perf_counter()
+        trained = predictor.train(train)
+        fit_ms = (time.perf_counter() - start) * 1000
+        if not trained.get('success'):
+            return {'success': False, 'error': trained.get('error', 'Training failed')}
+
+        start = time.perf_counter()
+        if isinstance(predictor, ARIMAPredictor):
+            forecast = predictor.predict(periods=len(test), start_date=test['ds'].iloc[0])
+        else:
+            forecast = predictor.predict(periods=len(test), freq=freq)
+        predict_ms = (time.perf_counter() - start) * 1000
+
+        if forecast.empty or len(forecast) != len(test):
+            return {'success': False, 'error': 'Prediction failed'}
+
+        return {
+            'success': True,
+            'cutoff': train['ds'].iloc[-1].isoformat(),
+            'actual': test['y'].astype(float).tolist(),
+            'yhat': forecast['yhat'].astype(float).tolist(),
+            'lower': forecast['yhat_lower'].astype(float).tolist(),
+            'upper': forecast['yhat_upper'].astype(float).tolist(),
+            'fit_ms': round(fit_ms, 1),
+            'predict_ms': round(predict_ms, 1),
+        }
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def make_folds(data: pd.DataFrame, folds: int, horizon: int, step: int,
+               min_train: int) -> List[Dict]:
+    """
+    Rolling-origin splits ending at the last observation
+
+    The last fold's test window ends at the final row; each earlier fold's cutoff moves back
+    by step rows. Folds whose training window would be shorter than min_train are dropped.
+
+    Returns:
+        List of {'train': DataFrame, 'test': DataFrame}
+    """
+    splits = []
+    n = len(data)
+    for k in range(folds):
+        cutoff = n - horizon - (folds - 1 - k) * step
+        if cutoff < min_train:
+            continue
+        splits.append({'train': data.iloc[:cutoff], 'test': data.iloc[cutoff:cutoff + horizon]})
+    return splits
+
+
+def score(fold_results: List[Dict], horizon: int) -> Dict:
+    """
+    Aggregate successful folds into per-horizon and overall metrics
+
+    MAPE is computed over non-zero actuals only (closed hours would make it infinite) and
+    the share of points it covers is reported alongside.
+    """
+    ok = [r for r in fold_results if r.get('success')]
+    if not ok:
+        return {'folds_ok': 0, 'errors': [r.get('error') for r in fold_results]}
+
+    actual = np.array([r['actual'] for r in ok])
+    yhat = np.array([r['yhat'] for r in ok])
+    lower = np.array([r['lower'] for r in ok])
+    upper = np.array([r['upper'] for r in ok])
+
+    abs_error = np.abs(actual - yhat)
+    nonzero = actual != 0
+    pct_error = np.where(nonzero, abs_error / np.where(nonzero, np.abs(actual), 1), np.nan)
+    covered = (actual >= lower) & (actual <= upper)
+
+    def mape(values: np.ndarray) -> Optional[float]:
+        return None if np.all(np.isnan(values)) else round(float(np.nanmean(values)) * 100, 2)
+
+    per_horizon = [{
+        'step': h + 1,
+        'mae': round(float(abs_error[:, h].mean()), 4),
+        'mape': mape(pct_error[:, h]),
+        'coverage': round(float(covered[:, h].mean()), 4),
+    } for h in range(horizon)]
+
+    fit_ms = np.array([r['fit_ms'] for r in ok])
+    predict_ms = np.array([r['predict_ms'] for r in ok])
+
+    return {
+        'folds_ok': len(ok),
+        'folds_failed': len(fold_results) - len(ok),
+        'cutoffs': [r['cutoff'] for r in ok],
+        'overall': {
+            'mae': round(float(abs_error.mean()), 4),
+            'rmse': round(float(np.sqrt(((actual - yhat) ** 2).mean())), 4),
+            'mape': mape(pct_error),
+            'mape_coverage': round(float(nonzero.mean()), 4),
+            'coverage': round(float(covered.mean()), 4),
+            'mean_interval_width': round(float((upper - lower).mean()), 4),
+        },
+        'latency': {
+            'fit_ms_mean': round(float(fit_ms.mean()), 1),
+            'fit_ms_max': round(float(fit_ms.max()), 1),
+            'predict_ms_mean': round(float(predict_ms.mean()), 1),
+            'predict_ms_max': round(float(predict_ms.max()), 1),
+        },
+        'per_horizon': per_horizon,
+    }
+
+
+def backtest(data: pd.DataFrame, backends: List[str], freq: str, folds: int = None,
+             horizon: int = None, step: int = None, workers: int = None,
+             overrides: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    Run rolling-origin evaluation for several backends
+
+    Every (backend, fold) pair is an independent job in a process pool.
+
+    Args:
+        data: Series with 'ds' and 'y' columns
+        backends: Backend specs (see build_predictor)
+        freq: 'H' or 'D'
+        folds: Number of cutoffs
+        horizon: Forecast steps per fold
+        step: Rows between consecutive cutoffs
+        workers: Process count (default: BACKTEST_CONFIG, then all cores)
+        overrides: Per-backend config overrides
+
+    Returns:
+        Per-backend scores
+    """
+    cfg = Config.BACKTEST_CONFIG
+    hourly = freq.upper() == 'H'
+    folds = folds or cfg['folds']
+    horizon = horizon or (cfg['horizon_hours'] if hourly else cfg['horizon_days'])
+    step = step or (cfg['step_hours'] if hourly else cfg['step_days'])
+    workers = workers or cfg['workers'] or os.cpu_count() or 1
+
+    data = data[['ds', 'y']].sort_values('ds').reset_index(drop=True)
+    splits = make_folds(data, folds, horizon, step, cfg['min_train_samples'])
+    if not splits:
+        return {'success': False, 'error': 'Not enough history for the requested folds'}
+
+    start = time.perf_counter()
+    jobs = [(backend, split) for backend in backends for split in splits]
+    logger.info(f"Backtesting {len(backends)} backend(s) x {len(splits)} folds on {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(run_fold, backend, split['train'], split['test'], freq, (overrides or {}).get(backend))
+            for backend, split in jobs
+        ]
+        fold_results = [f.result() for f in futures]
+
+    results = {}
+    for backend in backends:
+        backend_results = [r for (b, _), r in zip(jobs, fold_results) if b == backend]
+        results[backend] = score(backend_results, horizon)
+
+    return {
+        'success': True,
+        'folds': len(splits),
+        'horizon': horizon,
+        'step': step,
+        'freq': freq,
+        'n_samples': len(data),
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+        'backends': results,
+    }
+
+
+def load_series(series: str) -> pd.DataFrame:
+    """Load the training series the service's predictor would use"""
+    if series == 'opd':
+        from opd_predictor import get_opd_predictor
+        return get_opd_predictor().fetch_hourly_series()
+    if series == 'lab':
+        from lab_predictor import get_lab_predictor
+        return get_lab_predictor().fetch_historical_data()
+    if series == 'bed':
+        from bed_predictor import get_bed_predictor
+        data = get_bed_predictor().fetch_historical_data()
+        return data[['ds', 'y']] if not data.empty else data
+    raise ValueError(f"Unknown series '{series}'")
+
+
+def print_summary(report: Dict):
+    """Print a comparison table"""
+    print(f"\n{report['folds']} folds, horizon {report['horizon']}, step {report['step']} "
+          f"({report['n_samples']} samples, {report['duration_ms'] / 1000:.1f}s)")
+    print(f"{'Backend':<26}{'MAE':>9}{'RMSE':>9}{'MAPE%':>8}{'Cover':>8}{'Width':>9}{'fit ms':>10}{'pred ms':>9}")
+    for backend, r in report['backends'].items():
+        if not r.get('folds_ok'):
+            print(f"{backend:<26}  failed: {r.get('errors')}")
+            continue
+        o, lat = r['overall'], r['latency']
+        print(f"{backend:<26}{o['mae']:>9.3f}{o['rmse']:>9.3f}{(o['mape'] or 0):>8.1f}{o['coverage']:>8.2f}"
+              f"{o['mean_interval_width']:>9.2f}{lat['fit_ms_mean']:>10.1f}{lat['predict_ms_mean']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling-origin backtest of the forecasters')
+    parser.add_argument('series', choices=sorted(SERIES_FREQ), help='Series to evaluate')
+    parser.add_argument('--backends', nargs='+', help='prophet, arima, numpy or numpy:<method>')
+    parser.add_argument('--csv', help="Read the series from a CSV with 'ds' and 'y' columns instead of MongoDB")
+    parser.add_argument('--folds', type=int)
+    parser.add_argument('--horizon', type=int, help='Forecast steps per fold')
+    parser.add_argument('--step', type=int, help='Steps between cutoffs')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help='Write the full report as JSON')
+    args = parser.parse_args()
+
+    if args.csv:
+        data = pd.read_csv(args.csv, parse_dates=['ds'])
+    else:
+        data = load_series(args.series)
+    if data.empty:
+        print('No data for series', args.series)
+        sys.exit(1)
+
+    report = backtest(data, args.backends or default_backends(args.series), SERIES_FREQ[args.series],
+                      args.folds, args.horizon, args.step, args.workers)
+    if not report['success']:
+        print(report['error'])
+        sys.exit(1)
+    print_summary(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,8 @@ from shared.db_connector import get_db
 from shared.utils import setup_logging
 from config import Config
 from time_series import ARIMAPredictor
+from forecast_cache import cached_forecast, invalidate_forecasts, start_bucket
+from forecast_monitor import log_forecast
 
 logger = setup_logging('bed_predictor')
 
@@ -142,28 +144,51 @@ class BedOccupancyPredictor:
         
         return pd.DataFrame(occupancy_data)
     
+    @staticmethod
+    def complete_days(daily: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop today's row from a daily occupancy frame
+        
+        Today's occupancy is still changing, and ARIMAPredictor.update never revisits a day
+        it has appended, so a partial day would stay in the model for good. Today is
+        appended by the first update after it ends.
+        """
+        if daily.empty:
+            return daily
+        today = pd.Timestamp(datetime.now().date())
+        return daily[pd.DatetimeIndex(daily['ds']).normalize() < today]
+    
     def train(self, force: bool = False) -> Dict:
         """
         Train the bed occupancy model
         
+        Without force, an already trained model is updated with the days observed since its
+        last fit and only refit when ARIMAPredictor.update reports that a refit is due.
+        
         Args:
-            force: Force retrain
+            force: Force a full refit
             
         Returns:
             Training results
         """
         if self.model.is_trained and not force:
-            return {
-                'success': True,
-                'message': 'Model already trained',
-                'retrained': False,
-                'model_info': self.model.get_model_info()
-            }
+            update = self.update()
+            if not update.get('refit_required'):
+                if update.get('appended'):
+                    self.warm_forecasts()
+                return {
+                    'success': True,
+                    'message': 'Model updated with new observations' if update.get('appended') else 'Model already trained',
+                    'retrained': False,
+                    'update': update,
+                    'model_info': self.model.get_model_info()
+                }
+            logger.info(f"Bed model refit required: {update.get('refit_reasons') or update.get('error')}")
         
         logger.info("Starting bed occupancy model training...")
         
-        # Fetch and prepare data
-        training_data = self.fetch_historical_data()
+        # Fetch and prepare data (complete days only, see complete_days)
+        training_data = self.complete_days(self.fetch_historical_data())
         
         if training_data.empty or len(training_data) < self.config.PREDICTION_CONFIG['min_training_samples']:
             return {
@@ -178,8 +203,34 @@ class BedOccupancyPredictor:
         result['retrained'] = True
         result['total_beds'] = self.total_beds
         
+        if result.get('success'):
+            self.warm_forecasts()
+        
         return result
     
+    def warm_forecasts(self):
+        """Drop cached forecasts of the previous model and precompute the default horizon"""
+        invalidate_forecasts('bed')
+        self.predict(days=self.config.PREDICTION_CONFIG['default_forecast_days'])
+    
+    def update(self) -> Dict:
+        """
+        Append days observed since the last fit or update to the model (no parameter re-estimation)
+        
+        Returns:
+            Update result from ARIMAPredictor.update
+        """
+        last_observation = self.model.training_metadata.get('last_observation')
+        if last_observation is None:
+            return {'success': False, 'error': 'Model has no observation dates', 'refit_required': True}
+        
+        days = (datetime.now() - datetime.fromisoformat(last_observation)).days + 1
+        recent = self.complete_days(self.fetch_historical_data(days=min(days, self.config.BED_CONFIG['training_days'])))
+        if recent.empty:
+            return {'success': False, 'error': 'No recent occupancy data', 'refit_required': False}
+        
+        return self.model.update(recent[['ds', 'y']])
+    
     def predict(self, days: int = 7) -> Dict:
         """
         Predict bed occupancy for next N days
@@ -193,13 +244,19 @@ class BedOccupancyPredictor:
         if not self.model.is_trained:
             return {'success': False, 'error': 'Model not trained'}
         
+        return cached_forecast('bed', self.model, days, lambda: self._predict(days))
+    
+    def _predict(self, days: int) -> Dict:
+        """Compute the bed occupancy forecast (see predict)"""
         try:
-            # Get predictions
-            forecast = self.model.predict(periods=days, start_date=datetime.now())
+            # Forecast days start at the current hour, the granularity of the forecast cache
+            forecast = self.model.predict(periods=days, start_date=start_bucket())
             
             if forecast.empty:
                 return {'success': False, 'error': 'Prediction failed'}
             
+            log_forecast('bed', self.model, forecast, freq='D')
+            
             # Process predictions
             predictions = []
             alerts = []
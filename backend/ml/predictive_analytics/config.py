@@ -27,6 +27,23 @@ class Config:
     OPD_MODEL_FILE = 'opd_prophet.pkl'
     BED_MODEL_FILE = 'bed_arima.pkl'
     LAB_MODEL_FILE = 'lab_prophet.pkl'
+    # 'compact' saves each model as a directory (meta.json + .npy arrays / native JSON) next to
+    # the .pkl path; 'pickle' keeps the joblib files. Legacy .pkl files are loaded either way.
+    MODEL_ARTIFACT_FORMAT = os.getenv('MODEL_ARTIFACT_FORMAT', 'compact')
+    # Versioned registry (<MODEL_PATH>/registry/<model>/): every save publishes an immutable
+    # version and moves the CURRENT pointer; each worker polls the pointer and hot-swaps
+    MODEL_REGISTRY_CONFIG = {
+        'enabled': os.getenv('MODEL_REGISTRY_ENABLED', 'True').lower() == 'true',
+        'keep_versions': int(os.getenv('MODEL_REGISTRY_KEEP_VERSIONS', 10)),
+        'poll_interval_s': float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', 10)),
+    }
+    # Department-scoped OPD/lab models are loaded on demand and evicted least recently used
+    # once their (on-disk) size exceeds the budget
+    MODEL_CACHE_CONFIG = {
+        'max_bytes': int(float(os.getenv('MODEL_CACHE_MAX_MB', 512)) * 1024 * 1024),
+        'max_entries': int(os.getenv('MODEL_CACHE_MAX_ENTRIES', 0)) or None,  # None = budget only
+        'min_entry_bytes': 4096,
+    }
     
     # Prediction Configuration
     PREDICTION_CONFIG = {
@@ -34,6 +51,7 @@ class Config:
         'default_forecast_hours': int(os.getenv('FORECAST_HOURS', 24)),
         'confidence_interval': float(os.getenv('CONFIDENCE_INTERVAL', 0.95)),
         'min_training_samples': int(os.getenv('MIN_TRAINING_SAMPLES', 30)),
+        'max_batch_points': int(os.getenv('MAX_BATCH_POINTS', 10000)),  # timestamps per /ml/predict/slots call
     }
     
     # OPD Predictor Configuration
@@ -42,6 +60,18 @@ class Config:
         'peak_threshold': float(os.getenv('OPD_PEAK_THRESHOLD', 0.8)),  # 80th percentile
         'rush_hour_definition': float(os.getenv('RUSH_HOUR_THRESHOLD', 1.5)),  # 1.5x average
         'training_days': int(os.getenv('OPD_TRAINING_DAYS', 90)),
+        'forecast_backend': os.getenv('OPD_FORECAST_BACKEND', os.getenv('FORECAST_BACKEND', 'auto')),
+    }
+    
+    # Intra-day OPD nowcasting: today's arrivals so far rescale the rest of today's forecast
+    # by (arrivals + prior) / (forecast + prior), a gamma-Poisson posterior mean of the day's
+    # rate multiplier that starts at 1 and follows the data as the day fills in
+    NOWCAST_CONFIG = {
+        'min_refresh_s': float(os.getenv('NOWCAST_MIN_REFRESH_SECONDS', 30)),  # check-in polling throttle
+        'resync_s': float(os.getenv('NOWCAST_RESYNC_SECONDS', 300)),  # full re-read (catches deleted appointments)
+        'prior_volume': float(os.getenv('NOWCAST_PRIOR_VOLUME', 20)),  # pseudo-arrivals at a multiplier of 1
+        'min_factor': float(os.getenv('NOWCAST_MIN_FACTOR', 0.5)),
+        'max_factor': float(os.getenv('NOWCAST_MAX_FACTOR', 2.0)),
     }
     
     # Bed Occupancy Predictor Configuration
@@ -58,6 +88,7 @@ class Config:
         'granularity': 'hourly',  # hourly predictions
         'high_load_threshold': float(os.getenv('LAB_HIGH_LOAD', 0.85)),
         'training_days': int(os.getenv('LAB_TRAINING_DAYS', 90)),
+        'forecast_backend': os.getenv('LAB_FORECAST_BACKEND', os.getenv('FORECAST_BACKEND', 'auto')),
     }
     
     # Prophet Model Parameters
@@ -68,6 +99,66 @@ class Config:
         'changepoint_prior_scale': float(os.getenv('PROPHET_CHANGEPOINT_SCALE', 0.05)),
         'seasonality_prior_scale': float(os.getenv('PROPHET_SEASONALITY_SCALE', 10)),
         'interval_width': float(os.getenv('PROPHET_INTERVAL_WIDTH', 0.95)),
+        'forecast_origin': os.getenv('PROPHET_FORECAST_ORIGIN', 'train_end'),  # 'train_end' or 'now'
+        # 'sampling' = Prophet simulation on every predict; 'empirical'/'conformal' = residual
+        # quantiles per hour-of-week calibrated once at training (no simulation at predict time)
+        'interval_mode': os.getenv('PROPHET_INTERVAL_MODE', 'empirical'),
+        'uncertainty_samples': int(os.getenv('PROPHET_UNCERTAINTY_SAMPLES', 1000)),  # sampling mode only
+        'interval_holdout_fraction': float(os.getenv('INTERVAL_HOLDOUT_FRACTION', 0.2)),  # for interval quality
+        # Retrain from the previous fit's parameters (k, m, delta, beta, sigma_obs) when the
+        # seasonality settings are unchanged; falls back to a cold start if the fit fails
+        'warm_start': os.getenv('PROPHET_WARM_START', 'True').lower() == 'true',
+        'artifact_format': MODEL_ARTIFACT_FORMAT,
+        'registry': MODEL_REGISTRY_CONFIG,
+    }
+    
+    # Forecasting backend for the OPD and lab series: 'prophet', 'numpy', 'profile', or 'auto'
+    # (Prophet when installed, otherwise the built-in NumPy forecaster); OPD_FORECAST_BACKEND
+    # and LAB_FORECAST_BACKEND override it per series
+    FORECAST_BACKEND = os.getenv('FORECAST_BACKEND', 'auto')
+    
+    # NumPy Forecaster Parameters
+    NUMPY_FORECASTER_PARAMS = {
+        'method': os.getenv('NUMPY_FORECAST_METHOD', 'holt_winters'),  # seasonal_naive, hour_of_week, holt_winters
+        'profile_weeks': int(os.getenv('NUMPY_PROFILE_WEEKS', 8)),  # hour_of_week averaging window
+        'alpha_grid': [0.02, 0.1, 0.3],  # holt_winters level smoothing candidates
+        'gamma_grid': [0.05, 0.15, 0.3],  # holt_winters seasonal smoothing candidates
+        'interval_width': float(os.getenv('CONFIDENCE_INTERVAL', 0.95)),
+        'interval_mode': os.getenv('NUMPY_INTERVAL_MODE', 'empirical'),  # empirical or conformal
+        'interval_holdout_fraction': float(os.getenv('INTERVAL_HOLDOUT_FRACTION', 0.2)),
+        'forecast_origin': os.getenv('PROPHET_FORECAST_ORIGIN', 'train_end'),
+        'artifact_format': MODEL_ARTIFACT_FORMAT,
+        'registry': MODEL_REGISTRY_CONFIG,
+    }
+    
+    # Daily-total x intraday-profile forecaster ('profile' backend): Holt-Winters on daily
+    # totals, split into hours by a day-of-week x hour-of-day share matrix
+    PROFILE_FORECASTER_PARAMS = {
+        'profile_weeks': int(os.getenv('PROFILE_WEEKS', 8)),  # share matrix averaging window
+        'alpha_grid': [0.02, 0.1, 0.3],  # daily level smoothing candidates
+        'gamma_grid': [0.05, 0.15, 0.3],  # weekly seasonal smoothing candidates
+        'interval_width': float(os.getenv('CONFIDENCE_INTERVAL', 0.95)),
+        'interval_mode': os.getenv('PROFILE_INTERVAL_MODE', 'empirical'),  # empirical or conformal
+        'interval_holdout_fraction': float(os.getenv('INTERVAL_HOLDOUT_FRACTION', 0.2)),
+        'forecast_origin': os.getenv('PROFILE_FORECAST_ORIGIN', 'train_end'),
+        'artifact_format': MODEL_ARTIFACT_FORMAT,
+        'registry': MODEL_REGISTRY_CONFIG,
+    }
+    
+    # Global multi-series forecaster (one model for all departments): shared seasonal ridge
+    # regression on mean-scaled series plus shrunk per-series deviations and levels
+    GLOBAL_FORECASTER_PARAMS = {
+        'ridge_alpha': float(os.getenv('GLOBAL_RIDGE_ALPHA', 1.0)),  # shared coefficients penalty
+        'seasonal_shrinkage': float(os.getenv('GLOBAL_SEASONAL_SHRINKAGE', 4.0)),  # pseudo-observations per bucket
+        'level_weeks': int(os.getenv('GLOBAL_LEVEL_WEEKS', 4)),  # window of the per-series level ratio
+        'level_prior_days': 2,  # shrinks the level ratio of sparse series toward 1
+        'yearly_order': 2,  # yearly Fourier terms, used once a year of history is available
+        'interval_width': float(os.getenv('CONFIDENCE_INTERVAL', 0.95)),
+        'interval_mode': os.getenv('GLOBAL_INTERVAL_MODE', 'empirical'),  # empirical or conformal
+        'interval_holdout_fraction': float(os.getenv('INTERVAL_HOLDOUT_FRACTION', 0.2)),
+        'forecast_origin': os.getenv('GLOBAL_FORECAST_ORIGIN', 'train_end'),
+        'artifact_format': MODEL_ARTIFACT_FORMAT,
+        'registry': MODEL_REGISTRY_CONFIG,
     }
     
     # ARIMA Model Parameters
@@ -75,6 +166,81 @@ class Config:
         'order': (1, 1, 1),  # Default ARIMA(1,1,1)
         'seasonal_order': (1, 1, 1, 7),  # Weekly seasonality
         'trend': 'c',  # Constant trend
+        'interval_width': float(os.getenv('CONFIDENCE_INTERVAL', 0.95)),
+        # 'sampling' = analytic SARIMA intervals; 'empirical'/'conformal' = residual quantiles
+        # per day-of-week, widened by the model's forecast-variance growth
+        'interval_mode': os.getenv('ARIMA_INTERVAL_MODE', 'sampling'),
+        'interval_holdout_fraction': float(os.getenv('INTERVAL_HOLDOUT_FRACTION', 0.2)),
+        'interval_max_horizon': 60,  # days of precomputed horizon growth
+        # Incremental updates: new days are filtered through the fitted model; a full refit runs
+        # on schedule or when residuals over the last diagnostic_window days degrade
+        'refit_interval_days': int(os.getenv('ARIMA_REFIT_INTERVAL_DAYS', 7)),
+        'refit_rmse_ratio': float(os.getenv('ARIMA_REFIT_RMSE_RATIO', 1.5)),
+        'refit_ljung_box_pvalue': float(os.getenv('ARIMA_REFIT_LJUNG_BOX_PVALUE', 0.01)),
+        'diagnostic_window': int(os.getenv('ARIMA_DIAGNOSTIC_WINDOW', 28)),
+        # 'fixed' uses order/seasonal_order above; 'auto' searches ORDER_SEARCH on every full fit
+        'order_selection': os.getenv('ARIMA_ORDER_SELECTION', 'fixed'),
+        'order_search': {
+            'criterion': os.getenv('ARIMA_ORDER_CRITERION', 'aic'),  # 'aic' or 'bic'
+            # Information criteria are only comparable at equal differencing, so d and D stay fixed
+            'max_p': 2, 'max_q': 2, 'd_values': [1],
+            'max_P': 1, 'max_Q': 1, 'D_values': [1],
+            'seasonal_period': int(os.getenv('BED_SEASONAL_PERIOD', 7)),
+            'max_candidates': int(os.getenv('ARIMA_MAX_CANDIDATES', 36)),
+            'maxiter': 50,
+            'fit_timeout_s': float(os.getenv('ARIMA_FIT_TIMEOUT_S', 20)),  # abandon slower candidates
+            'search_timeout_s': float(os.getenv('ARIMA_SEARCH_TIMEOUT_S', 180)),
+            'workers': int(os.getenv('ARIMA_SEARCH_WORKERS', 0)) or None,  # None = all cores
+            'cache_path': os.path.join(MODEL_PATH, 'order_search_cache.json'),
+        },
+        'artifact_format': MODEL_ARTIFACT_FORMAT,
+        'registry': MODEL_REGISTRY_CONFIG,
+    }
+    
+    # Declarative operational series served by the generic SeriesPredictor: adding an entry
+    # (here or in the SERIES_REGISTRY_FILE JSON) adds a forecast without new code.
+    #   collection/date_field/filter: documents counted per period; collection is the one the
+    #   Node API's mongoose model writes (the pluralized, lowercased model name, like
+    #   FORECAST_PUBLISHER_CONFIG's 'aipredictions'), not the snake_case db_connector names
+    #   granularity: 'hourly' or 'daily'; backend: 'profile', 'numpy', 'prophet', 'auto', or
+    #   'arima' (daily only); thresholds: 'relative' (x the forecast mean) or 'absolute' counts
+    SERIES_REGISTRY = {
+        'emergency_arrivals': {
+            'description': 'Emergency department arrivals per hour',
+            'collection': 'emergencies',  # mongoose model Emergency
+            'date_field': 'arrivalTime',
+            'filter': {},
+            'granularity': 'hourly',
+            'backend': os.getenv('EMERGENCY_FORECAST_BACKEND', 'profile'),
+            'training_days': int(os.getenv('EMERGENCY_TRAINING_DAYS', 90)),
+            'thresholds': {'mode': 'relative', 'warning': 1.3, 'critical': 1.6},
+        },
+        'radiology_load': {
+            'description': 'Radiology studies scheduled per hour',
+            'collection': 'radiologies',  # mongoose model Radiology
+            'date_field': 'scheduledAt',
+            'filter': {'status': {'$ne': 'cancelled'}},
+            'granularity': 'hourly',
+            'backend': os.getenv('RADIOLOGY_FORECAST_BACKEND', 'profile'),
+            'training_days': int(os.getenv('RADIOLOGY_TRAINING_DAYS', 90)),
+            'thresholds': {'mode': 'relative', 'warning': 1.3, 'critical': 1.6},
+        },
+        'surgery_volume': {
+            'description': 'Surgeries scheduled per day',
+            'collection': 'surgeries',  # mongoose model Surgery
+            'date_field': 'scheduledDate',
+            'filter': {'status': {'$ne': 'cancelled'}},
+            'granularity': 'daily',
+            'backend': os.getenv('SURGERY_FORECAST_BACKEND', 'numpy'),
+            'training_days': int(os.getenv('SURGERY_TRAINING_DAYS', 180)),
+            'thresholds': {'mode': 'relative', 'warning': 1.25, 'critical': 1.5},
+        },
+    }
+    SERIES_REGISTRY_FILE = os.getenv('SERIES_REGISTRY_FILE')  # optional JSON with more entries
+    SERIES_CONFIG = {
+        'train_workers': int(os.getenv('SERIES_TRAIN_WORKERS', 4)),  # shared training pool size
+        'default_horizon_hours': int(os.getenv('FORECAST_HOURS', 24)),
+        'default_horizon_days': int(os.getenv('FORECAST_DAYS', 7)),
     }
     
     # Prediction Types
@@ -94,17 +260,113 @@ class Config:
         'lab_critical': 0.9,
     }
     
+    # Rolling-origin backtests (backtest.py and /ml/predict/backtest)
+    BACKTEST_CONFIG = {
+        'folds': int(os.getenv('BACKTEST_FOLDS', 4)),
+        'horizon_hours': int(os.getenv('BACKTEST_HORIZON_HOURS', 24)),
+        'horizon_days': int(os.getenv('BACKTEST_HORIZON_DAYS', 7)),
+        'step_hours': int(os.getenv('BACKTEST_STEP_HOURS', 24)),
+        'step_days': int(os.getenv('BACKTEST_STEP_DAYS', 7)),
+        'min_train_samples': int(os.getenv('MIN_TRAINING_SAMPLES', 30)),
+        'workers': int(os.getenv('BACKTEST_WORKERS', 0)) or None,  # None = all cores
+    }
+    
+    # Forecast results are cached per (predictor, scope, model version, horizon, start hour);
+    # retraining invalidates a predictor's entries and pre-warms its default horizons
+    FORECAST_CACHE_CONFIG = {
+        'enabled': os.getenv('FORECAST_CACHE_ENABLED', 'True').lower() == 'true',
+        'max_entries': int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', 512)),
+    }
+    
+    # Forecast accuracy monitoring: served forecasts are logged to ai_forecast_log and scored
+    # against realized actuals by a background job as their periods mature
+    FORECAST_MONITOR_CONFIG = {
+        'enabled': os.getenv('FORECAST_MONITOR_ENABLED', 'True').lower() == 'true',
+        'interval_s': float(os.getenv('FORECAST_MONITOR_INTERVAL_SECONDS', 300)),
+        'settle_minutes': int(os.getenv('FORECAST_MONITOR_SETTLE_MINUTES', 15)),  # wait for late records
+        'max_forecasts_per_run': int(os.getenv('FORECAST_MONITOR_MAX_FORECASTS', 500)),
+        'window_days': int(os.getenv('FORECAST_MONITOR_WINDOW_DAYS', 14)),  # rolling metrics window and log retention
+        'retry_minutes': int(os.getenv('FORECAST_MONITOR_RETRY_MINUTES', 60)),  # after actuals could not be fetched
+        'recent_days': int(os.getenv('FORECAST_MONITOR_RECENT_DAYS', 2)),  # compared to the rest of the window
+        'min_recent_periods': int(os.getenv('FORECAST_MONITOR_MIN_RECENT_PERIODS', 24)),
+        'degradation_ratio': float(os.getenv('FORECAST_MONITOR_DEGRADATION_RATIO', 1.5)),
+    }
+    
+    # Forecast publishing: the current OPD, bed and lab forecasts are written as AIPrediction
+    # documents (backend/api/models/AIPrediction.js, which mongoose stores in 'aipredictions')
+    # so the Node API can serve dashboards without calling this service
+    FORECAST_PUBLISHER_CONFIG = {
+        'enabled': os.getenv('FORECAST_PUBLISHER_ENABLED', 'True').lower() == 'true',
+        'collection': os.getenv('AI_PREDICTIONS_COLLECTION', 'aipredictions'),
+        'interval_s': float(os.getenv('FORECAST_PUBLISH_INTERVAL_SECONDS', 900)),  # republish at least this often
+        'check_interval_s': float(os.getenv('FORECAST_PUBLISH_CHECK_SECONDS', 30)),  # model version/hour checks
+        'valid_minutes': int(os.getenv('FORECAST_PUBLISH_VALID_MINUTES', 120)),  # validUntil after publishing
+        'keep_days': int(os.getenv('FORECAST_PUBLISH_KEEP_DAYS', 30)),  # 0 keeps expired documents
+        'horizons': {'opd': 48, 'lab': 48, 'bed': 7},  # hours, hours, days
+        'prediction_types': {'opd': 'opd-rush', 'bed': 'bed-occupancy', 'lab': 'lab-workload'},
+    }
+    
+    # OPD queue simulation: Monte Carlo replications of a day's first-come-first-served queue,
+    # with Poisson arrivals at the hourly forecast and random consultation times
+    QUEUE_SIM_CONFIG = {
+        'replications': int(os.getenv('QUEUE_SIM_REPLICATIONS', 2000)),
+        'max_replications': int(os.getenv('QUEUE_SIM_MAX_REPLICATIONS', 20000)),
+        'max_cells': int(os.getenv('QUEUE_SIM_MAX_CELLS', 20_000_000)),  # replications x patients per call
+        'seed': int(os.getenv('QUEUE_SIM_SEED', 42)),  # fixed: what-if runs share their random draws
+        'service_distribution': os.getenv('QUEUE_SIM_SERVICE_DISTRIBUTION', 'lognormal'),
+        'service_mean_minutes': float(os.getenv('QUEUE_SIM_SERVICE_MEAN_MINUTES', 12)),
+        'service_cv': float(os.getenv('QUEUE_SIM_SERVICE_CV', 0.6)),  # std / mean of consultation time
+        'doctors': int(os.getenv('QUEUE_SIM_DOCTORS', 4)),  # on duty in each clinic hour by default
+        'clinic_hours': (int(os.getenv('QUEUE_SIM_OPEN_HOUR', 8)), int(os.getenv('QUEUE_SIM_CLOSE_HOUR', 20))),
+        'percentiles': [50, 90, 95],
+        'wait_threshold_minutes': float(os.getenv('QUEUE_SIM_WAIT_THRESHOLD_MINUTES', 30)),
+        'forecast_uncertainty': os.getenv('QUEUE_SIM_FORECAST_UNCERTAINTY', 'True').lower() == 'true',
+    }
+    
+    # Request Deadlines (X-Request-Deadline-Ms header or deadline_ms parameter)
+    DEADLINE_CONFIG = {
+        'header': 'X-Request-Deadline-Ms',
+        'default_ms': float(os.getenv('DEFAULT_DEADLINE_MS', 0)) or None,  # None = no deadline
+        'max_ms': float(os.getenv('MAX_DEADLINE_MS', 120000)),
+        'reserve_ms': float(os.getenv('DEADLINE_RESERVE_MS', 50)),
+        'max_stale_seconds': int(os.getenv('MAX_STALE_FORECAST_SECONDS', 6 * 3600)),  # oldest cached forecast served
+    }
+    
+    # /ml/predictions forecasts in priority order; under a deadline, forecasts that no longer
+    # fit are served from the last computed result (or skipped) and flagged partial: true
+    PREDICTIONS_STAGE_PRIORITY = ['opd', 'bed', 'lab']
+    
+    # Request Capture (opt-in trace of anonymized request metadata for load-test replay)
+    REQUEST_CAPTURE_CONFIG = {
+        'enabled': os.getenv('REQUEST_CAPTURE_ENABLED', 'False').lower() == 'true',
+        'path': os.getenv('REQUEST_CAPTURE_PATH', './captures/predictive-analytics.jsonl'),
+        'sample_rate': float(os.getenv('REQUEST_CAPTURE_SAMPLE_RATE', 1.0)),
+        'salt': os.getenv('REQUEST_CAPTURE_SALT') or None,
+        'keep_fields': [f.strip() for f in os.getenv('REQUEST_CAPTURE_KEEP_FIELDS', 'status,type,models').split(',') if f.strip()],
+    }
+    
     @classmethod
     def get_model_path(cls, model_type: str) -> str:
         """Get full path to specific model file"""
         model_files = {
             'opd': cls.OPD_MODEL_FILE,
             'bed': cls.BED_MODEL_FILE,
-            'lab': cls.LAB_MODEL_FILE
+            'lab': cls.LAB_MODEL_FILE,
+            'opd_numpy': 'opd_numpy.pkl',
+            'lab_numpy': 'lab_numpy.pkl',
+            'opd_profile': 'opd_profile.pkl',
+            'opd_departments': 'opd_departments_global.pkl',
+            'lab_profile': 'lab_profile.pkl'
         }
         filename = model_files.get(model_type, f'{model_type}.pkl')
         return os.path.join(cls.MODEL_PATH, filename)
     
+    @classmethod
+    def get_forecast_backend(cls, series: str) -> str:
+        """Forecasting backend configured for an hourly series ('opd' or 'lab')"""
+        series_config = {'opd': cls.OPD_CONFIG, 'lab': cls.LAB_CONFIG}.get(series, {})
+        return series_config.get('forecast_backend', cls.FORECAST_BACKEND)
+    
     @classmethod
     def validate_config(cls) -> bool:
         """Validate configuration settings"""
@@ -0,0 +1,155 @@
+"""
+Forecast Result Cache for Predictive Analytics
+Caches predictor results keyed by (predictor, scope, model version, horizon, start hour)
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.utils import setup_logging
+from config import Config
+
+logger = setup_logging('forecast_cache')
+
+
+class ForecastCache:
+    """
+    Bounded LRU cache of forecast results
+
+    A forecast only changes when the model changes (retrain, incremental update, hot-swap)
+    or when the wall-clock hour rolls over, so both are part of the key: stale entries are
+    never served, they simply stop being looked up and age out. Failed results are not cached.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def contains(self, key: Tuple) -> bool:
+        """Whether a result is cached (not counted as a lookup)"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Tuple, value: Dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, predictor: str, scope: Optional[str] = None) -> int:
+        """Drop every cached result of a predictor (and scope)"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == predictor and k[1] == scope]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'evictions': self._evictions,
+            }
+
+
+# Singleton instance
+_forecast_cache = None
+
+def get_forecast_cache() -> ForecastCache:
+    """Get forecast cache singleton instance"""
+    global _forecast_cache
+    if _forecast_cache is None:
+        _forecast_cache = ForecastCache(max_entries=Config.FORECAST_CACHE_CONFIG['max_entries'])
+    return _forecast_cache
+
+
+def start_bucket(now: datetime = None) -> datetime:
+    """Start of the current wall-clock hour, the granularity at which forecasts move"""
+    return (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def cached_forecast(predictor: str, model: Any, horizon: Hashable, compute: Callable[[], Dict],
+                    scope: Optional[str] = None) -> Dict:
+    """
+    Return a cached forecast or compute and cache it
+
+    Args:
+        predictor: Predictor name ('opd', 'bed', 'lab')
+        model: Fitted forecaster (its version_token identifies the model)
+        horizon: Forecast horizon, or a tuple describing another view of the same
+                 predictor (e.g. ('rush_hours', 168))
+        compute: Produces the result on a miss
+        scope: Optional department scope
+
+    Returns:
+        Forecast result (a shallow copy, safe to extend)
+    """
+    if not Config.FORECAST_CACHE_CONFIG['enabled']:
+        return compute()
+
+    key = _cache_key(predictor, model, horizon, scope)
+    cache = get_forecast_cache()
+
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        if not result.get('success', 'error' not in result):
+            return result
+        cache.put(key, result)
+    return dict(result)
+
+
+def is_forecast_cached(predictor: str, model: Any, horizon: Hashable, scope: Optional[str] = None) -> bool:
+    """
+    Whether cached_forecast would currently serve this forecast without computing it
+
+    Lets callers that budget time (e.g. against a request deadline) tell a near-free cache
+    hit from a real computation before starting it.
+    """
+    if not Config.FORECAST_CACHE_CONFIG['enabled']:
+        return False
+    return get_forecast_cache().contains(_cache_key(predictor, model, horizon, scope))
+
+
+def _cache_key(predictor: str, model: Any, horizon: Hashable, scope: Optional[str]) -> Tuple:
+    return (predictor, scope, model.version_token, horizon, start_bucket().isoformat())
+
+
+def invalidate_forecasts(predictor: str, scope: Optional[str] = None) -> int:
+    """Drop cached forecasts of a predictor after it was retrained or updated"""
+    dropped = get_forecast_cache().invalidate(predictor, scope)
+    if dropped:
+        logger.info(f"Invalidated {dropped} cached {predictor} forecasts")
+    return dropped
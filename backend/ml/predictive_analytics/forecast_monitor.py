@@ -0,0 +1,416 @@
+"""
+Forecast Accuracy Monitor for Predictive Analytics
+Logs served forecasts compactly and scores them against realized actuals as their horizons mature
+"""
+
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pymongo.errors import DuplicateKeyError
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.db_connector import get_db
+from shared.utils import setup_logging
+from config import Config
+
+logger = setup_logging('forecast_monitor')
+
+STEPS = {'H': timedelta(hours=1), 'D': timedelta(days=1)}
+
+# Fields read back when scoring and when computing metrics
+SCORING_FIELDS = ['predictor', 'scope', 'freq', 'start', 'horizon', 'matured']
+METRIC_FIELDS = ['predictor', 'scope', 'freq', 'start', 'offset', 'modelVersion',
+                 'yhat', 'lower', 'upper', 'actual']
+
+
+def _floor(ts: Any, freq: str) -> datetime:
+    return pd.Timestamp(ts).floor(freq).to_pydatetime()
+
+
+def log_forecast(predictor: str, model: Any, forecast: pd.DataFrame, freq: str = 'H',
+                 scope: Optional[str] = None):
+    """
+    Record a served forecast in the forecast log
+
+    One document per (predictor, scope, model version, first forecast period) holds the
+    forecast as arrays; serving the same forecast again is a no-op and a longer horizon
+    extends the stored arrays. Periods that already started before the issue period are
+    not forecasts anymore and are dropped. Failures are logged, never raised.
+
+    Args:
+        predictor: Predictor name ('opd', 'bed', 'lab', 'series:<name>')
+        model: Fitted forecaster (its version_token identifies the model)
+        forecast: DataFrame with 'ds', 'yhat', 'yhat_lower' and 'yhat_upper' columns
+        freq: 'H' or 'D'
+        scope: Optional department scope
+    """
+    if not Config.FORECAST_MONITOR_CONFIG['enabled'] or forecast.empty:
+        return
+
+    try:
+        step = STEPS[freq]
+        issued = _floor(datetime.now(), freq)
+        ds = pd.DatetimeIndex(forecast['ds']).floor(freq)
+        keep = np.asarray(ds >= issued)
+        if not keep.any():
+            return
+        ds = ds[keep]
+        if len(ds) > 1 and not (np.diff(ds.asi8) == pd.Timedelta(step).value).all():
+            logger.warning(f"Not logging irregular {predictor} forecast")
+            return
+
+        start = ds[0].to_pydatetime()
+        horizon = len(ds)
+        version = model.version_token
+        doc_id = f"{predictor}|{scope or ''}|{version}|{start.isoformat()}"
+
+        arrays = {
+            name: np.round(forecast[column].to_numpy(dtype=float)[keep], 3).tolist()
+            for name, column in (('yhat', 'yhat'), ('lower', 'yhat_lower'), ('upper', 'yhat_upper'))
+        }
+        try:
+            get_db().ai_forecast_log.update_one(
+                {'_id': doc_id, 'horizon': {'$lt': horizon}},
+                {
+                    '$set': {**arrays, 'horizon': horizon, 'complete': False},
+                    '$setOnInsert': {
+                        'predictor': predictor,
+                        'scope': scope,
+                        'modelVersion': version,
+                        'freq': freq,
+                        'issuedAt': issued,
+                        'start': start,
+                        'offset': int((start - issued) / step),
+                        'actual': [],
+                        'matured': 0,
+                        'nextDue': start,
+                    }
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # already logged with at least this horizon
+
+    except Exception as e:
+        logger.error(f"Error logging {predictor} forecast: {e}")
+
+
+class AccuracyMonitor:
+    """
+    Background job scoring logged forecasts against realized actuals
+
+    Each run only looks at forecasts with unscored periods that have matured (ended at
+    least settle_minutes ago), fetches actuals once per (predictor, scope) for the span
+    between the oldest unscored period and now, and appends them to the forecasts' actual
+    arrays. Rolling error metrics per predictor and horizon step are then recomputed from
+    the window of logged forecasts.
+
+    Forecasts issued before the window are deleted. Forecasts of predictors that no longer
+    resolve (e.g. a series removed from the registry) are marked complete and abandoned, and
+    a (predictor, scope) whose actuals could not be fetched is skipped for retry_minutes, so
+    neither can hold the oldest unscored periods and crowd everything else out of a run.
+    """
+
+    def __init__(self, fetch_actuals: Callable[[str, Optional[str], float], pd.DataFrame],
+                 interval_s: float = 300.0):
+        """
+        Initialize monitor
+
+        Args:
+            fetch_actuals: (predictor, scope, days) -> DataFrame with 'ds' and 'y' columns
+                           covering the last days (fractional) up to now
+            interval_s: Seconds between runs
+        """
+        self.fetch_actuals = fetch_actuals
+        self.interval_s = interval_s
+        self.config = Config.FORECAST_MONITOR_CONFIG
+        self._metrics: Dict[str, Dict] = {}
+        self._computed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._indexed = False
+        self._retry_at: Dict[tuple, datetime] = {}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='accuracy-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s)
+            self._thread = None
+
+    def _run(self):
+        try:
+            self._ensure_indexes(get_db().ai_forecast_log)
+        except Exception as e:
+            logger.error(f"Error creating forecast log indexes: {e}")
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Accuracy monitor run failed: {e}")
+
+    def run_once(self, now: datetime = None) -> Dict:
+        """
+        Score newly matured periods and refresh the rolling metrics
+
+        Args:
+            now: Current time (default: datetime.now())
+
+        Returns:
+            Number of forecasts updated, periods scored and forecasts pruned
+        """
+        now = now or datetime.now()
+        settled = now - timedelta(minutes=self.config['settle_minutes'])
+        collection = get_db().ai_forecast_log
+        self._ensure_indexes(collection)
+        pruned = self._prune(collection, now)
+
+        query = {'complete': False, 'nextDue': {'$lte': settled - STEPS['H']}}
+        self._retry_at = {key: at for key, at in self._retry_at.items() if at > now}
+        if self._retry_at:
+            query['$nor'] = [{'predictor': predictor, 'scope': scope, 'freq': freq}
+                             for predictor, scope, freq in self._retry_at]
+
+        pending = list(collection.find(
+            query, {field: 1 for field in SCORING_FIELDS + ['nextDue']}
+        ).sort('nextDue', 1).limit(self.config['max_forecasts_per_run']))
+
+        groups = defaultdict(list)
+        for doc in pending:
+            groups[(doc['predictor'], doc.get('scope'), doc['freq'])].append(doc)
+
+        updated = scored = 0
+        for (predictor, scope, freq), docs in groups.items():
+            matured_end = _floor(settled, freq)  # periods starting before this have ended
+            docs = [doc for doc in docs if doc['nextDue'] < matured_end]
+            if not docs:
+                continue
+
+            try:
+                actual = self._actuals(predictor, scope, freq, min(doc['nextDue'] for doc in docs), matured_end, now)
+            except KeyError as e:
+                self._abandon(collection, predictor, scope, freq, e)
+                continue
+            if actual is None:
+                self._retry_at[(predictor, scope, freq)] = now + timedelta(minutes=self.config['retry_minutes'])
+                continue
+
+            for doc in docs:
+                count = self._score(collection, doc, actual, matured_end)
+                updated += bool(count)
+                scored += count
+
+        if scored:
+            logger.info(f"Scored {scored} matured periods of {updated} logged forecasts")
+        self.refresh_metrics(now)
+        return {'forecasts_updated': updated, 'periods_scored': scored, 'forecasts_pruned': pruned}
+
+    def _ensure_indexes(self, collection):
+        """Index the pending-forecast scan (run_once) and the metrics window (refresh_metrics)"""
+        if not self._indexed:
+            collection.create_index([('complete', 1), ('nextDue', 1)])
+            collection.create_index('issuedAt')
+            self._indexed = True
+
+    def _prune(self, collection, now: datetime) -> int:
+        """Delete forecasts issued before the metrics window (scored or not, they no longer count)"""
+        cutoff = now - timedelta(days=self.config['window_days'])
+        result = collection.delete_many({'issuedAt': {'$lt': cutoff}})
+        if result.deleted_count:
+            logger.info(f"Pruned {result.deleted_count} logged forecasts issued before {cutoff:%Y-%m-%d %H:%M}")
+        return result.deleted_count
+
+    def _abandon(self, collection, predictor: str, scope: Optional[str], freq: str, reason: Exception):
+        """Stop scoring the forecasts of a predictor (or scope) that no longer resolves"""
+        result = collection.update_many(
+            {'predictor': predictor, 'scope': scope, 'freq': freq, 'complete': False},
+            {'$set': {'complete': True, 'abandoned': True}}
+        )
+        logger.warning(f"Abandoned {result.modified_count} logged {predictor} forecasts: {reason}")
+
+    def _actuals(self, predictor: str, scope: Optional[str], freq: str, start: datetime,
+                 end: datetime, now: datetime) -> Optional[pd.Series]:
+        """
+        Realized values for the periods in [start, end), or None when none could be fetched
+
+        Raises:
+            KeyError: If fetch_actuals no longer knows the predictor or scope
+        """
+        days = (now - start + STEPS[freq]) / timedelta(days=1)
+        try:
+            data = self.fetch_actuals(predictor, scope, days)
+        except KeyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching {predictor} actuals: {e}")
+            return None
+
+        # An empty result is indistinguishable from a failed fetch; wait for the next run
+        if data is None or data.empty:
+            return None
+
+        values = pd.Series(data['y'].to_numpy(dtype=float), index=pd.DatetimeIndex(data['ds']).floor(freq))
+        values = values.groupby(level=0).sum()
+        # Periods without records had no arrivals
+        return values.reindex(pd.date_range(start, end, freq=freq, inclusive='left'), fill_value=0.0)
+
+    def _score(self, collection, doc: Dict, actual: pd.Series, matured_end: datetime) -> int:
+        """Append the matured actuals of one forecast; returns the number of periods scored"""
+        step = STEPS[doc['freq']]
+        done = doc['matured']
+        ready = min(doc['horizon'], int((matured_end - doc['start']) / step))
+        if ready <= done:
+            return 0
+
+        periods = pd.date_range(doc['start'] + done * step, periods=ready - done, freq=doc['freq'])
+        values = actual.reindex(periods)
+        if values.isna().any():
+            return 0
+
+        # Guarded by the expected progress so concurrent runs never append twice
+        result = collection.update_one(
+            {'_id': doc['_id'], 'matured': done, 'horizon': doc['horizon']},
+            {
+                '$push': {'actual': {'$each': [round(float(v), 3) for v in values]}},
+                '$set': {
+                    'matured': ready,
+                    'nextDue': doc['start'] + ready * step,
+                    'complete': ready >= doc['horizon']
+                }
+            }
+        )
+        return (ready - done) if result.modified_count else 0
+
+    def refresh_metrics(self, now: datetime = None) -> Dict[str, Dict]:
+        """
+        Recompute rolling error metrics from the forecasts issued within the window
+
+        Metrics cover the scored periods of the last window_days, per predictor (and scope)
+        and per horizon step (1 = the period the forecast was issued in). The error of the
+        last recent_days is compared to the rest of the window to flag degradation.
+
+        Returns:
+            Metrics keyed by predictor (or 'predictor@scope')
+        """
+        now = now or datetime.now()
+        window_start = now - timedelta(days=self.config['window_days'])
+        recent_start = now - timedelta(days=self.config['recent_days'])
+
+        docs = get_db().ai_forecast_log.find(
+            {'issuedAt': {'$gte': window_start}, 'matured': {'$gt': 0}},
+            {field: 1 for field in METRIC_FIELDS}
+        )
+
+        groups = defaultdict(list)
+        for doc in docs:
+            groups[(doc['predictor'], doc.get('scope'), doc['freq'])].append(doc)
+
+        metrics = {}
+        for (predictor, scope, freq), group in groups.items():
+            key = predictor if scope is None else f"{predictor}@{scope}"
+            metrics[key] = self._group_metrics(predictor, scope, freq, group, recent_start)
+
+        with self._lock:
+            self._metrics = metrics
+            self._computed_at = now
+        return metrics
+
+    def _group_metrics(self, predictor: str, scope: Optional[str], freq: str, docs: List[Dict],
+                       recent_start: datetime) -> Dict:
+        actual, yhat, lower, upper, steps, recent = [], [], [], [], [], []
+        for doc in docs:
+            n = len(doc['actual'])
+            actual.append(doc['actual'])
+            yhat.append(doc['yhat'][:n])
+            lower.append(doc['lower'][:n])
+            upper.append(doc['upper'][:n])
+            steps.append(doc['offset'] + np.arange(n))
+            recent.append(pd.date_range(doc['start'], periods=n, freq=freq) >= recent_start)
+
+        actual = np.concatenate(actual).astype(float)
+        yhat = np.concatenate(yhat).astype(float)
+        lower = np.concatenate(lower).astype(float)
+        upper = np.concatenate(upper).astype(float)
+        steps = np.concatenate(steps).astype(int)
+        recent = np.concatenate(recent).astype(bool)
+
+        error = yhat - actual
+        covered = (actual >= lower) & (actual <= upper)
+
+        per_step = []
+        for s in np.unique(steps):
+            mask = steps == s
+            per_step.append({'step': int(s) + 1, **_error_metrics(error[mask], actual[mask], covered[mask])})
+
+        baseline = _error_metrics(error[~recent], actual[~recent], covered[~recent])
+        latest = _error_metrics(error[recent], actual[recent], covered[recent])
+        ratio = None
+        if baseline['mae'] and latest['n'] >= self.config['min_recent_periods']:
+            ratio = round(latest['mae'] / baseline['mae'], 3)
+
+        return {
+            'predictor': predictor,
+            'scope': scope,
+            'freq': freq,
+            'forecasts': len(docs),
+            'model_versions': sorted({doc['modelVersion'] for doc in docs}),
+            'overall': _error_metrics(error, actual, covered),
+            'recent': latest,
+            'baseline': baseline,
+            'degradation_ratio': ratio,
+            'degraded': ratio is not None and ratio >= self.config['degradation_ratio'],
+            'per_step': per_step
+        }
+
+    def get_metrics(self, predictor: Optional[str] = None) -> Dict:
+        """
+        Latest rolling metrics (computed on the first call if the job has not run yet)
+
+        Args:
+            predictor: Only return metrics of this predictor (all of its scopes)
+        """
+        with self._lock:
+            metrics, computed_at = self._metrics, self._computed_at
+        if computed_at is None:
+            metrics = self.refresh_metrics()
+            computed_at = self._computed_at
+
+        if predictor is not None:
+            metrics = {key: value for key, value in metrics.items() if value['predictor'] == predictor}
+
+        return {
+            'computed_at': computed_at.isoformat(),
+            'window_days': self.config['window_days'],
+            'recent_days': self.config['recent_days'],
+            'predictors': metrics
+        }
+
+
+def _error_metrics(error: np.ndarray, actual: np.ndarray, covered: np.ndarray) -> Dict:
+    """MAE, RMSE, bias, MAPE (non-zero actuals, percent) and interval coverage"""
+    n = len(error)
+    if n == 0:
+        return {'n': 0, 'mae': None, 'rmse': None, 'bias': None, 'mape': None, 'coverage': None}
+
+    nonzero = actual != 0
+    return {
+        'n': int(n),
+        'mae': round(float(np.abs(error).mean()), 4),
+        'rmse': round(float(np.sqrt((error ** 2).mean())), 4),
+        'bias': round(float(error.mean()), 4),
+        'mape': round(float((np.abs(error[nonzero]) / np.abs(actual[nonzero])).mean()) * 100, 2) if nonzero.any() else None,
+        'coverage': round(float(covered.mean()), 4)
+    }
@@ -0,0 +1,249 @@
+"""
+Forecast Publisher for Predictive Analytics
+Materializes the current OPD, bed and lab forecasts as AIPrediction documents for the Node API
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.db_connector import get_db
+from shared.utils import setup_logging
+from config import Config
+from time_series import ARIMAPredictor, BasePredictor
+from forecast_cache import start_bucket
+
+logger = setup_logging('forecast_publisher')
+
+SOURCE = 'predictive_analytics'
+
+
+def prediction_document(prediction_type: str, model: BasePredictor, forecast: pd.DataFrame,
+                        now: datetime, valid_until: datetime) -> Dict:
+    """
+    AIPrediction document (backend/api/models/AIPrediction.js) for a forecast
+
+    Args:
+        prediction_type: AI_PREDICTION_TYPES value ('opd-rush', 'bed-occupancy', 'lab-workload')
+        model: Forecaster that produced the forecast
+        forecast: DataFrame with 'ds', 'yhat', 'yhat_lower' and 'yhat_upper' columns
+        now: Publication time
+        valid_until: End of the validity window
+
+    Returns:
+        Document ready to be written
+    """
+    ds = pd.DatetimeIndex(forecast['ds'])
+    yhat = np.maximum(forecast['yhat'].to_numpy(dtype=float), 0)
+    lower = np.maximum(forecast['yhat_lower'].to_numpy(dtype=float), 0)
+    upper = np.maximum(forecast['yhat_upper'].to_numpy(dtype=float), 0)
+    confidence = getattr(model, 'config', {}).get('interval_width')
+
+    predictions = [{
+        'timestamp': t.to_pydatetime(),
+        'predictedValue': round(float(value), 2),
+        'confidence': confidence,
+        'lowerBound': round(float(lo), 2),
+        'upperBound': round(float(hi), 2),
+    } for t, value, lo, hi in zip(ds, yhat, lower, upper)]
+
+    peak, minimum = int(np.argmax(yhat)), int(np.argmin(yhat))
+    date_range = model.training_metadata.get('date_range') or {}
+    training_range = {key: pd.Timestamp(date_range[field]).to_pydatetime()
+                      for key, field in (('from', 'start'), ('to', 'end')) if date_range.get(field)}
+
+    return {
+        'predictionType': prediction_type,
+        'predictionDate': now,
+        'forecastPeriod': {'from': ds[0].to_pydatetime(), 'to': ds[-1].to_pydatetime()},
+        'predictions': predictions,
+        'aggregatedPrediction': {
+            'average': round(float(yhat.mean()), 2),
+            'peak': round(float(yhat[peak]), 2),
+            'peakTime': ds[peak].to_pydatetime(),
+            'minimum': round(float(yhat[minimum]), 2),
+            'minimumTime': ds[minimum].to_pydatetime(),
+        },
+        'modelVersion': model.version_token,
+        'metadata': {
+            'trainingDataRange': training_range,
+            'algorithm': model.model_type,
+            'features': [],
+        },
+        'validUntil': valid_until,
+        'source': SOURCE,
+        'createdAt': now,
+        'updatedAt': now,
+    }
+
+
+class ForecastPublisher:
+    """
+    Background thread writing the current forecasts into the AIPrediction collection
+
+    A forecast is republished when its model version changes (retrain, incremental update,
+    hot-swap from another worker), when the hour rolls over, or after interval_s. Each
+    (type, model version, forecast start) is one document: republishing the same forecast
+    only extends its validUntil, so several workers publishing concurrently do not
+    duplicate documents. The Node API reads the newest document of a type that is still
+    valid, and keeps serving it while this service is down, until validUntil.
+    """
+
+    def __init__(self, targets: Callable[[], Dict[str, BasePredictor]], check_interval_s: float = 30.0):
+        """
+        Initialize publisher
+
+        Args:
+            targets: Returns the hospital-wide model of each predictor ('opd', 'bed', 'lab')
+            check_interval_s: Seconds between checks for a changed model or hour
+        """
+        self.targets = targets
+        self.check_interval_s = check_interval_s
+        self.config = Config.FORECAST_PUBLISHER_CONFIG
+        self._published: Dict[str, tuple] = {}  # name -> (model version, hour, published at)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def collection(self):
+        return get_db().db[self.config['collection']]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='forecast-publisher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval_s)
+            self._thread = None
+
+    def trigger(self):
+        """Publish on the next loop iteration (e.g. right after a retrain)"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.publish_due()
+            except Exception as e:
+                logger.error(f"Forecast publishing failed: {e}")
+            self._wake.wait(self.check_interval_s)
+            self._wake.clear()
+
+    def publish_due(self, force: bool = False) -> Dict[str, Dict]:
+        """
+        Publish every forecast whose model or hour changed or whose interval elapsed
+
+        Args:
+            force: Publish all forecasts regardless
+
+        Returns:
+            Result by predictor name (only the ones published)
+        """
+        now = datetime.now()
+        hour = start_bucket(now)
+        results = {}
+
+        for name, model in self.targets().items():
+            if name not in self.config['prediction_types'] or not model.is_trained:
+                continue
+
+            last = self._published.get(name)
+            due = force or last is None or last[0] != model.version_token or last[1] != hour or \
+                (now - last[2]).total_seconds() >= self.config['interval_s']
+            if due:
+                results[name] = self.publish(name, model, now)
+
+        if results and self.config['keep_days']:
+            self._prune(now)
+        return results
+
+    def publish(self, name: str, model: BasePredictor, now: datetime = None) -> Dict:
+        """
+        Write the current forecast of one predictor
+
+        Args:
+            name: Predictor name ('opd', 'bed', 'lab')
+            model: Its hospital-wide model
+            now: Publication time
+
+        Returns:
+            Result dictionary
+        """
+        now = now or datetime.now()
+        version = model.version_token
+        try:
+            forecast = self._forecast(name, model)
+            if forecast.empty:
+                return {'success': False, 'error': 'Prediction failed'}
+
+            valid_until = now + timedelta(minutes=self.config['valid_minutes'])
+            document = prediction_document(self.config['prediction_types'][name], model, forecast, now, valid_until)
+
+            # Re-publishing the same forecast only refreshes its validity window
+            refreshed = {key: document.pop(key) for key in ('predictionDate', 'validUntil', 'updatedAt')}
+            result = self.collection.update_one(
+                {
+                    'predictionType': document['predictionType'],
+                    'modelVersion': version,
+                    'forecastPeriod.from': document['forecastPeriod']['from'],
+                    'source': SOURCE
+                },
+                {'$set': refreshed, '$setOnInsert': document},
+                upsert=True
+            )
+
+            self._published[name] = (version, start_bucket(now), now)
+            logger.info(f"Published {name} forecast of model {version}")
+            return {
+                'success': True,
+                'created': result.upserted_id is not None,
+                'model_version': version,
+                'forecast_from': document['forecastPeriod']['from'].isoformat(),
+                'valid_until': valid_until.isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Error publishing {name} forecast: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def _forecast(self, name: str, model: BasePredictor) -> pd.DataFrame:
+        """Forecast of the configured horizon, starting at the current period"""
+        periods = self.config['horizons'][name]
+        if isinstance(model, ARIMAPredictor):
+            return model.predict(periods=periods, start_date=start_bucket())
+
+        # Hours of a train-end forecast that already passed are not forecasts anymore
+        start = start_bucket()
+        forecast = model.predict(periods=periods, freq='H')
+        stale = int((forecast['ds'] < start).sum()) if not forecast.empty else 0
+        if stale:
+            forecast = model.predict(periods=periods + stale, freq='H')
+            forecast = forecast[forecast['ds'] >= start].reset_index(drop=True)
+        return forecast
+
+    def _prune(self, now: datetime):
+        """Delete published documents that expired more than keep_days ago"""
+        cutoff = now - timedelta(days=self.config['keep_days'])
+        result = self.collection.delete_many({'source': SOURCE, 'validUntil': {'$lt': cutoff}})
+        if result.deleted_count:
+            logger.info(f"Pruned {result.deleted_count} expired published forecasts")
+
+    def status(self) -> Dict:
+        """Last publication of each predictor"""
+        return {
+            name: {'model_version': version, 'published_at': published_at.isoformat()}
+            for name, (version, _, published_at) in self._published.items()
+        }
@@ -13,10 +13,15 @@ import numpy as np
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from pymongo.errors import OperationFailure
+
 from shared.db_connector import get_db
 from shared.utils import setup_logging
 from config import Config
-from time_series import ProphetPredictor
+from time_series import BasePredictor, aggregate_time_series, create_forecaster
+from scoped_models import get_model_cache, get_scoped_forecaster, scope_filter
+from forecast_cache import cached_forecast, invalidate_forecasts
+from forecast_monitor import log_forecast
 
 logger = setup_logging('lab_predictor')
 
@@ -24,32 +29,69 @@ logger = setup_logging('lab_predictor')
 class LabWorkloadPredictor:
     """
     Lab Workload Forecaster
-    Uses Prophet to predict hourly lab test volumes
+    Uses Prophet (or the NumPy fallback) to predict hourly lab test volumes
+    
+    The hospital-wide model is held by the predictor; department-scoped models
+    (scope 'department:<id>') are loaded on demand from the shared model cache.
     """
     
     def __init__(self):
         """Initialize lab workload predictor"""
         self.db = get_db()
         self.config = Config
-        self.model = ProphetPredictor(
-            model_path=Config.get_model_path('lab'),
-            config=Config.PROPHET_PARAMS
+        self.model = create_forecaster(
+            backend=Config.get_forecast_backend('lab'),
+            prophet_path=Config.get_model_path('lab'),
+            numpy_path=Config.get_model_path('lab_numpy'),
+            prophet_config=Config.PROPHET_PARAMS,
+            numpy_config=Config.NUMPY_FORECASTER_PARAMS,
+            profile_path=Config.get_model_path('lab_profile'),
+            profile_config=Config.PROFILE_FORECASTER_PARAMS
         )
         self.daily_capacity: int = 0
+        self._scoped_capacity: Dict[str, int] = {}
         self._estimate_capacity()
     
-    def _estimate_capacity(self):
+    def get_model(self, scope: str = None) -> BasePredictor:
+        """
+        Forecaster for a scope
+        
+        Args:
+            scope: 'department:<id>', or None for the hospital-wide model
+            
+        Returns:
+            Forecaster instance
+        """
+        return self.model if scope is None else get_scoped_forecaster('lab', scope)
+    
+    def _scope_query(self, scope: str) -> Dict:
+        """Lab test filter for a scope (tests belong to a department through their test definition)"""
+        test_ids = [t['_id'] for t in self.db.lab_test_masters.find(scope_filter(scope), {'_id': 1})]
+        return {'test': {'$in': test_ids}}
+    
+    def capacity_for(self, scope: str = None) -> int:
+        """Estimated daily capacity of the whole lab or of one scope"""
+        if scope is None:
+            return self.daily_capacity
+        if scope not in self._scoped_capacity:
+            self._estimate_capacity(scope)
+        return self._scoped_capacity[scope]
+    
+    def _estimate_capacity(self, scope: str = None):
         """Estimate lab daily capacity based on historical data"""
+        capacity = 100
         try:
             # Get average tests per day over last 30 days
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30)
             
+            match = {'createdAt': {'$gte': start_date, '$lte': end_date}}
+            if scope is not None:
+                match.update(self._scope_query(scope))
+            
             pipeline = [
                 {
-                    '$match': {
-                        'createdAt': {'$gte': start_date, '$lte': end_date}
-                    }
+                    '$match': match
                 },
                 {
                     '$group': {
@@ -70,22 +112,28 @@ class LabWorkloadPredictor:
             
             if result:
                 # Capacity is estimated as 1.2x maximum observed
-                self.daily_capacity = int(result[0].get('max', 100) * 1.2)
-            else:
-                self.daily_capacity = 100
+                capacity = int(result[0].get('max', 100) * 1.2)
             
-            logger.info(f"Estimated lab daily capacity: {self.daily_capacity}")
+            logger.info(f"Estimated lab daily capacity{f' for {scope}' if scope else ''}: {capacity}")
             
         except Exception as e:
             logger.error(f"Error estimating capacity: {e}")
-            self.daily_capacity = 100
+        
+        if scope is None:
+            self.daily_capacity = capacity
+        else:
+            self._scoped_capacity[scope] = capacity
     
-    def fetch_historical_data(self, days: int = None) -> pd.DataFrame:
+    def fetch_historical_data(self, days: int = None, scope: str = None) -> pd.DataFrame:
         """
         Fetch historical lab test data
         
+        Tests are counted per hour by the database; raw timestamps are only fetched when
+        the server does not support $dateTrunc (MongoDB < 5.0).
+        
         Args:
             days: Number of days of history
+            scope: Optional scope to restrict tests to
             
         Returns:
             DataFrame with hourly test counts
@@ -97,10 +145,19 @@ class LabWorkloadPredictor:
         start_date = end_date - timedelta(days=days)
         
         try:
+            query = {'createdAt': {'$gte': start_date, '$lte': end_date}}
+            if scope is not None:
+                query.update(self._scope_query(scope))
+            
+            try:
+                result = aggregate_time_series(self.db.lab_tests, query, 'createdAt')
+                logger.info(f"Aggregated {int(result['y'].sum())} lab tests into {len(result)} hours")
+                return result if not result.empty else pd.DataFrame()
+            except OperationFailure as e:
+                logger.warning(f"Server-side aggregation unavailable ({e}), bucketing lab tests locally")
+            
             # Get lab tests
-            lab_tests = list(self.db.lab_tests.find({
-                'createdAt': {'$gte': start_date, '$lte': end_date}
-            }, {'createdAt': 1}))
+            lab_tests = list(self.db.lab_tests.find(query, {'createdAt': 1}))
             
             logger.info(f"Fetched {len(lab_tests)} lab test records")
             
@@ -127,28 +184,31 @@ class LabWorkloadPredictor:
             logger.error(f"Error fetching lab data: {e}")
             return pd.DataFrame()
     
-    def train(self, force: bool = False) -> Dict:
+    def train(self, force: bool = False, scope: str = None) -> Dict:
         """
         Train the lab workload model
         
         Args:
             force: Force retrain
+            scope: Optional scope to train a department model for
             
         Returns:
             Training results
         """
-        if self.model.is_trained and not force:
+        model = self.get_model(scope)
+        
+        if model.is_trained and not force:
             return {
                 'success': True,
                 'message': 'Model already trained',
                 'retrained': False,
-                'model_info': self.model.get_model_info()
+                'model_info': model.get_model_info()
             }
         
-        logger.info("Starting lab workload model training...")
+        logger.info(f"Starting lab workload model training{f' for {scope}' if scope else ''}...")
         
         # Fetch and prepare data
-        training_data = self.fetch_historical_data()
+        training_data = self.fetch_historical_data(scope=scope)
         
         if training_data.empty or len(training_data) < self.config.PREDICTION_CONFIG['min_training_samples']:
             return {
@@ -158,36 +218,57 @@ class LabWorkloadPredictor:
             }
         
         # Train model
-        result = self.model.train(training_data)
+        result = model.train(training_data)
         result['retrained'] = True
-        result['daily_capacity'] = self.daily_capacity
+        result['daily_capacity'] = self.capacity_for(scope)
+        
+        if scope is not None:
+            # Re-measure the retrained model against the cache budget
+            get_model_cache().put(('lab', scope), model)
+        
+        if result.get('success'):
+            self.warm_forecasts(scope)
         
         return result
     
-    def predict(self, hours: int = 24) -> Dict:
+    def warm_forecasts(self, scope: str = None):
+        """Drop cached forecasts of the previous model and precompute the default horizon"""
+        invalidate_forecasts('lab', scope)
+        self.predict(hours=self.config.PREDICTION_CONFIG['default_forecast_hours'], scope=scope)
+    
+    def predict(self, hours: int = 24, scope: str = None) -> Dict:
         """
         Predict lab workload for next N hours
         
         Args:
             hours: Number of hours to predict
+            scope: Optional department scope
             
         Returns:
             Prediction results
         """
-        if not self.model.is_trained:
+        model = self.get_model(scope)
+        if not model.is_trained:
             return {'success': False, 'error': 'Model not trained'}
         
+        return cached_forecast('lab', model, hours, lambda: self._predict(model, hours, scope), scope)
+    
+    def _predict(self, model: BasePredictor, hours: int, scope: str = None) -> Dict:
+        """Compute the lab workload forecast (see predict)"""
         try:
             # Get predictions
-            forecast = self.model.predict(periods=hours, freq='H')
+            forecast = model.predict(periods=hours, freq='H')
             
             if forecast.empty:
                 return {'success': False, 'error': 'Prediction failed'}
             
+            log_forecast('lab', model, forecast, freq='H', scope=scope)
+            
             # Process predictions
             predictions = []
             alerts = []
-            hourly_capacity = self.daily_capacity / 10  # Assuming 10 working hours
+            daily_capacity = self.capacity_for(scope)
+            hourly_capacity = daily_capacity / 10  # Assuming 10 working hours
             
             high_load_threshold = self.config.LAB_CONFIG['high_load_threshold']
             
@@ -233,8 +314,9 @@ class LabWorkloadPredictor:
             
             return {
                 'success': True,
+                'scope': scope,
                 'prediction_hours': hours,
-                'daily_capacity': self.daily_capacity,
+                'daily_capacity': daily_capacity,
                 'hourly_capacity': round(hourly_capacity, 1),
                 'total_predicted': total_predicted,
                 'average_hourly': round(avg_hourly, 1),
@@ -248,6 +330,37 @@ class LabWorkloadPredictor:
             logger.error(f"Lab prediction error: {e}")
             return {'success': False, 'error': str(e)}
     
+    def predict_slots(self, datetimes: List, scope: str = None) -> Dict:
+        """
+        Predict lab test volumes at arbitrary timestamps (e.g. shift boundaries) in one batch
+        
+        Args:
+            datetimes: Target times (any order, gaps allowed)
+            scope: Optional department scope
+            
+        Returns:
+            Columnar results aligned with datetimes, with load ratio against hourly capacity
+        """
+        result = self.get_model(scope).predict_at_datetimes(datetimes)
+        if not result['success']:
+            return result
+        
+        predicted = np.maximum(0, np.round(result['yhat'], 2))
+        hourly_capacity = self.capacity_for(scope) / 10  # Assuming 10 working hours
+        load_ratio = predicted / hourly_capacity if hourly_capacity > 0 else np.zeros_like(predicted)
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'count': result['count'],
+            'hourly_capacity': round(hourly_capacity, 1),
+            'datetime': result['ds'],
+            'predicted_tests': predicted.tolist(),
+            'lower_bound': np.maximum(0, np.round(result['yhat_lower'], 2)).tolist(),
+            'upper_bound': np.maximum(0, np.round(result['yhat_upper'], 2)).tolist(),
+            'load_ratio': np.round(np.minimum(1.5, load_ratio), 2).tolist()
+        }
+    
     def get_workload_by_test_type(self, days: int = 7) -> Dict:
         """
         Get workload breakdown by test type
@@ -270,7 +383,7 @@ class LabWorkloadPredictor:
                 },
                 {
                     '$lookup': {
-                        'from': 'lab_test_masters',
+                        'from': self.db.lab_test_masters.name,
                         'localField': 'test',
                         'foreignField': '_id',
                         'as': 'testInfo'
@@ -316,13 +429,15 @@ class LabWorkloadPredictor:
             logger.error(f"Error getting test breakdown: {e}")
             return {'error': str(e)}
     
-    def get_model_info(self) -> Dict:
+    def get_model_info(self, scope: str = None) -> Dict:
         """Get model information and status"""
+        model = self.get_model(scope)
         return {
             'predictor': 'Lab Workload',
-            'model_type': 'Prophet',
-            'daily_capacity': self.daily_capacity,
-            **self.model.get_model_info()
+            'model_type': model.model_type,
+            'scope': scope,
+            'daily_capacity': self.capacity_for(scope),
+            **model.get_model_info()
         }
 
 
@@ -5,59 +5,465 @@ Predicts OPD patient volumes to identify rush hours
 
 import os
 import sys
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from statistics import NormalDist
+from typing import Dict, List, Optional, Any, Tuple
 import pandas as pd
 import numpy as np
 
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from pymongo.errors import OperationFailure
+
 from shared.db_connector import get_db
 from shared.utils import setup_logging, serialize_document
 from config import Config
-from time_series import ProphetPredictor, prepare_time_series_data
+from time_series import (BasePredictor, GlobalForecaster, aggregate_multi_series, aggregate_time_series,
+                         create_forecaster)
+from scoped_models import get_model_cache, get_scoped_forecaster, parse_scope, scope_filter
+from forecast_cache import cached_forecast, invalidate_forecasts, start_bucket
+from forecast_monitor import log_forecast
+from queue_simulator import doctor_schedule, service_spec, simulate_queue
 
 logger = setup_logging('opd_predictor')
 
+# Statuses of appointments that count towards OPD volume
+OPD_STATUSES = ['completed', 'checked-in', 'in-consultation']
+
+
+def appointment_hour_expr() -> Dict:
+    """
+    Aggregation expression for the hour an appointment falls in
+    
+    Mirrors prepare_training_data: the day of scheduledDate at the hour of scheduledTime
+    ('HH:MM', '10:00' when absent); when the time cannot be parsed, the hour of scheduledDate.
+    """
+    time_of_day = {'$cond': [{'$eq': [{'$type': '$scheduledTime'}, 'missing']}, '10:00', '$scheduledTime']}
+    hour = {'$let': {
+        'vars': {'parts': {'$cond': [
+            {'$eq': [{'$type': time_of_day}, 'string']},
+            {'$split': [time_of_day, ':']},
+            []
+        ]}},
+        'in': {'$cond': [
+            {'$gt': [{'$size': '$$parts'}, 1]},
+            {'$convert': {
+                'input': {'$trim': {'input': {'$arrayElemAt': ['$$parts', 0]}}},
+                'to': 'int', 'onError': None, 'onNull': None
+            }},
+            None
+        ]}
+    }}
+    
+    return {'$let': {
+        'vars': {'hour': hour},
+        'in': {'$cond': [
+            {'$and': [{'$gte': ['$$hour', 0]}, {'$lte': ['$$hour', 23]}]},
+            {'$dateAdd': {
+                'startDate': {'$dateTrunc': {'date': '$scheduledDate', 'unit': 'day'}},
+                'unit': 'hour',
+                'amount': '$$hour'
+            }},
+            {'$dateTrunc': {'date': '$scheduledDate', 'unit': 'hour'}}
+        ]}
+    }}
+
+
+def _parse_dates(values: List) -> np.ndarray:
+    """scheduledDate values as datetime64[ns] (NaT when missing or unparseable)"""
+    dates = np.empty(len(values), dtype=object)
+    dates[:] = values
+    result = np.full(len(dates), np.datetime64('NaT'), dtype='datetime64[ns]')
+    
+    # MongoDB returns naive datetimes: convert those in bulk
+    native = np.fromiter((type(v) is datetime for v in values), dtype=bool, count=len(values))
+    if native.any():
+        result[native] = pd.to_datetime(dates[native]).to_numpy()
+    
+    # Anything else (strings, mostly) keeps its wall-clock time; empty values are skipped
+    other = np.array([i for i in np.flatnonzero(~native) if values[i]], dtype=np.int64)
+    if other.size:
+        parsed = pd.to_datetime(pd.Series(dates[other]), errors='coerce', format='mixed')
+        if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+            parsed = parsed.dt.tz_localize(None)
+        elif parsed.dtype == object:  # mixed time zones
+            parsed = pd.Series([ts.replace(tzinfo=None) if pd.notna(ts) else pd.NaT for ts in parsed])
+        result[other] = pd.to_datetime(parsed).to_numpy()
+    return result
+
+
+def _parse_hours(times: pd.Series) -> np.ndarray:
+    """Hour of each 'HH:MM' string (-1 when the value is not a valid time string)"""
+    head = times.str.split(':', n=1)
+    has_colon = np.asarray(head.str.len().fillna(0), dtype=int) > 1
+    digits = head.str[0].str.strip()
+    is_int = np.asarray(digits.str.fullmatch(r'[+-]?\d+', na=False), dtype=bool)
+    hour = np.asarray(pd.to_numeric(digits.where(is_int), errors='coerce'), dtype=float)
+    valid = has_colon & (hour >= 0) & (hour <= 23)
+    return np.where(valid, hour, -1).astype(np.int64)
+
+
+def appointment_hours(appointments: List[Dict], drop_invalid: bool = True) -> np.ndarray:
+    """
+    Hour each appointment falls in, as datetime64[h] (see prepare_training_data)
+    
+    Columnar counterpart of appointment_hour_expr, for raw appointment records. Times only
+    take a few distinct values, so they are parsed once per distinct value.
+    
+    Args:
+        appointments: Records with 'scheduledDate' and optionally 'scheduledTime'
+        drop_invalid: Drop appointments without a valid date (otherwise their hour is NaT)
+        
+    Returns:
+        Hours of the appointments
+    """
+    if not appointments:
+        return np.array([], dtype='datetime64[h]')
+    
+    dates = _parse_dates([apt.get('scheduledDate') for apt in appointments])
+    
+    # 'HH:MM' strings give the hour; other values keep the hour of scheduledDate
+    codes, distinct = pd.factorize(np.array(
+        [apt.get('scheduledTime', '10:00') for apt in appointments], dtype=object
+    ))
+    # None factorizes to code -1, which picks the trailing -1 (no valid time)
+    hour = np.append(_parse_hours(pd.Series(distinct, dtype=object)), -1)[codes]
+    use_time = hour >= 0
+    
+    by_date = dates.astype('datetime64[h]')
+    by_time = dates.astype('datetime64[D]') + np.maximum(hour, 0).astype('timedelta64[h]')
+    hours = np.where(use_time, by_time, by_date)
+    return hours[~np.isnat(hours)] if drop_invalid else hours
+
+
+
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def weekly_heatmaps(ds: pd.DatetimeIndex, yhat: np.ndarray, top_n: int = 3) -> List[Dict]:
+    """
+    Day-of-week x hour-of-day volume matrices of hourly forecasts
+    
+    Args:
+        ds: Hourly forecast timestamps (168 consecutive hours cover every cell)
+        yhat: Forecasts, shape (len(ds),) or (n_series, len(ds))
+        top_n: Rush hours reported per day
+        
+    Returns:
+        One heatmap per series: the 7x24 'matrix' (Monday first, NaN-free), 'rush_by_day'
+        (top hours, peak hour and average volume per day) and the overall 'peak'
+    """
+    ds = pd.DatetimeIndex(ds)
+    values = np.maximum(np.atleast_2d(np.asarray(yhat, dtype=float)), 0)
+    cells = ds.dayofweek.to_numpy() * 24 + ds.hour.to_numpy()
+    
+    counts = np.bincount(cells, minlength=168)
+    sums = np.zeros((values.shape[0], 168))
+    np.add.at(sums, (slice(None), cells), values)
+    matrices = (sums / np.maximum(counts, 1)).reshape(-1, 7, 24)
+    covered = (counts > 0).reshape(7, 24)
+    
+    # Busiest hours first; hours without a forecast rank last
+    ranked = np.argsort(-np.where(covered, matrices, -np.inf), axis=2, kind='stable')[:, :, :top_n]
+    peaks = np.argmax(np.where(covered, matrices, -np.inf).reshape(len(matrices), -1), axis=1)
+    
+    heatmaps = []
+    for matrix, top, peak in zip(matrices, ranked, peaks):
+        rush_by_day = {}
+        for d, day in enumerate(DAYS_ORDER):
+            if not covered[d].any():
+                continue
+            hours = [int(h) for h in top[d] if covered[d, h]]
+            rush_by_day[day] = {
+                'rush_hours': hours,
+                'peak_hour': hours[0],
+                'average_volume': round(float(matrix[d][covered[d]].mean()), 1)
+            }
+        heatmaps.append({
+            'days': DAYS_ORDER,
+            'matrix': np.round(matrix, 2).tolist(),
+            'rush_by_day': rush_by_day,
+            'peak': {
+                'day': DAYS_ORDER[peak // 24],
+                'hour': int(peak % 24),
+                'volume': round(float(matrix.flat[peak]), 2)
+            }
+        })
+    return heatmaps
+
+
+def rush_hour_view(model: BasePredictor) -> Dict:
+    """Weekly rush-hour heatmap of an hourly OPD forecaster (materialized after each train)"""
+    forecast = model.predict(periods=168, freq='H')  # 7 days * 24 hours
+    if forecast.empty:
+        raise ValueError('Prediction failed')
+    return {
+        'forecast_start': forecast['ds'].iloc[0].isoformat(),
+        **weekly_heatmaps(forecast['ds'], forecast['yhat'].to_numpy())[0]
+    }
+
+
+def department_forecast_hours(model: GlobalForecaster, hours: int) -> pd.DatetimeIndex:
+    """Timestamps of a department forecast (after the training data, or from now)"""
+    start = model.model['last_ds'] + pd.Timedelta(hours=1)
+    if Config.GLOBAL_FORECASTER_PARAMS.get('forecast_origin') == 'now':
+        start = pd.Timestamp.now().floor('h')
+    return pd.date_range(start=start, periods=hours, freq='h')
+
+
+def department_rush_hour_view(model: GlobalForecaster) -> Dict:
+    """Weekly rush-hour heatmap of every department of the global model"""
+    ds = department_forecast_hours(model, 168)
+    forecast = model.forecast_matrix(ds)
+    heatmaps = weekly_heatmaps(ds, forecast['yhat'])
+    return {
+        'forecast_start': ds[0].isoformat(),
+        'departments': dict(zip(forecast['series'], heatmaps))
+    }
+
+
+class CheckInCounter:
+    """
+    Running per-hour counts of today's OPD arrivals, kept current from appointment changes
+    
+    Each refresh reads only the appointments that changed since the last one seen
+    (updatedAt watermark) and are scheduled today or already counted, and applies each
+    change as a -1/+1 on the hour it left and entered, hospital-wide and for its
+    department, so an update costs O(1) however many appointments the day already has.
+    An appointment rescheduled off today is read through its counted _id and removed.
+    Deleted appointments leave no change to read, so every resync_s the refresh re-reads
+    all of today's appointments instead and removes the counted ones that are gone.
+    An appointment counts as an arrival while its status is one of OPD_STATUSES, in the
+    hour it was scheduled for (like the training data).
+    """
+    
+    def __init__(self, db=None, min_refresh_s: float = 30.0, resync_s: float = 300.0):
+        """
+        Initialize counter
+        
+        Args:
+            db: Database connector (appointments collection)
+            min_refresh_s: Minimum seconds between two database reads
+            resync_s: Seconds between two full re-reads of today's appointments
+        """
+        self.db = db
+        self.min_refresh_s = min_refresh_s
+        self.resync_s = resync_s
+        self._lock = threading.Lock()
+        self._reset(datetime.now())
+    
+    def _reset(self, now: datetime):
+        self.day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._watermark = self.day_start
+        self._refreshed_at: Optional[datetime] = None
+        self._resynced_at: Optional[datetime] = None
+        self._counted: Dict[Any, Tuple[int, Optional[str]]] = {}  # _id -> (hour, scope)
+        self._counts: Dict[Optional[str], np.ndarray] = {None: np.zeros(24, dtype=np.int64)}
+        self.version = 0  # bumped whenever a count changes
+    
+    def refresh(self, now: datetime = None, force: bool = False) -> int:
+        """
+        Apply the appointment changes since the last refresh
+        
+        Args:
+            now: Current time (default: datetime.now())
+            force: Ignore the refresh throttle
+            
+        Returns:
+            Number of count changes applied
+        """
+        now = now or datetime.now()
+        with self._lock:
+            if now.date() != self.day_start.date():
+                self._reset(now)
+            if not force and self._refreshed_at is not None and \
+                    (now - self._refreshed_at).total_seconds() < self.min_refresh_s:
+                return 0
+            
+            today = {'$gte': self.day_start, '$lt': self.day_start + timedelta(days=1)}
+            resync = self._resynced_at is None or (now - self._resynced_at).total_seconds() >= self.resync_s
+            if resync:
+                query = {'scheduledDate': today, 'type': 'opd'}
+            else:
+                # $gte: appointments sharing the watermark are re-read, applying them is idempotent
+                query = {
+                    '$or': [{'scheduledDate': today}, {'_id': {'$in': list(self._counted)}}],
+                    'type': 'opd',
+                    'updatedAt': {'$gte': self._watermark}
+                }
+            changes = list(self.db.appointments.find(
+                query,
+                {'status': 1, 'scheduledDate': 1, 'scheduledTime': 1, 'department': 1, 'updatedAt': 1}
+            ).sort('updatedAt', 1))
+            
+            hours = appointment_hours(changes, drop_invalid=False)
+            day = np.datetime64(self.day_start.date(), 'D')
+            
+            applied = 0
+            if resync:
+                # Counted appointments that are no longer scheduled today were deleted or moved
+                present = {apt['_id'] for apt in changes}
+                for key in [key for key in self._counted if key not in present]:
+                    applied += self._apply(key, None)
+                self._resynced_at = now
+            
+            for apt, hour in zip(changes, hours):
+                entry = None
+                if apt.get('status') in OPD_STATUSES and not np.isnat(hour) and hour.astype('datetime64[D]') == day:
+                    department = apt.get('department')
+                    entry = (int((hour - day).astype(int)), f'department:{department}' if department else None)
+                applied += self._apply(apt['_id'], entry)
+                if apt.get('updatedAt') is not None:
+                    self._watermark = max(self._watermark, apt['updatedAt'])
+            
+            self._refreshed_at = now
+            if applied:
+                self.version += 1
+            return applied
+    
+    def _apply(self, key: Any, entry: Optional[Tuple[int, Optional[str]]]) -> bool:
+        previous = self._counted.get(key)
+        if previous == entry:
+            return False
+        if previous is not None:
+            self._bump(previous, -1)
+        if entry is not None:
+            self._bump(entry, 1)
+            self._counted[key] = entry
+        else:
+            self._counted.pop(key, None)
+        return True
+    
+    def _bump(self, entry: Tuple[int, Optional[str]], delta: int):
+        hour, scope = entry
+        self._counts[None][hour] += delta
+        if scope is not None:
+            self._counts.setdefault(scope, np.zeros(24, dtype=np.int64))[hour] += delta
+    
+    def counts(self, scope: str = None) -> np.ndarray:
+        """Today's arrivals per hour of day (hospital-wide, or of a department scope)"""
+        with self._lock:
+            counts = self._counts.get(scope)
+            return counts.copy() if counts is not None else np.zeros(24, dtype=np.int64)
+
+
+def nowcast_factor(observed: float, expected: float, prior: float, min_factor: float,
+                   max_factor: float) -> float:
+    """Multiplier of the rest of the day's forecast, (observed + prior) / (expected + prior)"""
+    factor = (observed + prior) / max(expected + prior, 1e-9)
+    return float(min(max(factor, min_factor), max_factor))
 
 class OPDPredictor:
     """
     OPD Rush Hour Predictor
-    Uses Prophet to forecast hourly patient volumes
+    Uses Prophet (or the NumPy fallback) to forecast hourly patient volumes
+    
+    The hospital-wide model is held by the predictor; department-scoped models
+    (scope 'department:<id>') are loaded on demand from the shared model cache.
+    department_model forecasts every department at once with one global model.
     """
     
     def __init__(self):
         """Initialize OPD predictor"""
         self.db = get_db()
         self.config = Config
-        self.model = ProphetPredictor(
-            model_path=Config.get_model_path('opd'),
-            config=Config.PROPHET_PARAMS
+        self.model = create_forecaster(
+            backend=Config.get_forecast_backend('opd'),
+            prophet_path=Config.get_model_path('opd'),
+            numpy_path=Config.get_model_path('opd_numpy'),
+            prophet_config=Config.PROPHET_PARAMS,
+            numpy_config=Config.NUMPY_FORECASTER_PARAMS,
+            profile_path=Config.get_model_path('opd_profile'),
+            profile_config=Config.PROFILE_FORECASTER_PARAMS
         )
+        self.department_model = GlobalForecaster(
+            model_path=Config.get_model_path('opd_departments'),
+            config=Config.GLOBAL_FORECASTER_PARAMS
+        )
+        self.model.view_builders['rush_hours'] = rush_hour_view
+        self.department_model.view_builders['rush_hours'] = department_rush_hour_view
+        self.check_ins = CheckInCounter(self.db, Config.NOWCAST_CONFIG['min_refresh_s'],
+                                        Config.NOWCAST_CONFIG['resync_s'])
+        self._baselines: Dict[Tuple, np.ndarray] = {}
     
-    def fetch_historical_data(self, days: int = None) -> List[Dict]:
+    def get_model(self, scope: str = None) -> BasePredictor:
         """
-        Fetch historical OPD appointment data
+        Forecaster for a scope
         
         Args:
-            days: Number of days of history to fetch
+            scope: 'department:<id>', or None for the hospital-wide model
             
         Returns:
-            List of appointment records
+            Forecaster instance
         """
+        if scope is None:
+            return self.model
+        model = get_scoped_forecaster('opd', scope)
+        model.view_builders.setdefault('rush_hours', rush_hour_view)
+        return model
+    
+    def _history_query(self, days: int = None, scope: str = None) -> Dict:
+        """Filter selecting the OPD appointments of the training window"""
         if days is None:
             days = self.config.OPD_CONFIG['training_days']
         
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
+        query = {
+            'scheduledDate': {'$gte': start_date, '$lte': end_date},
+            'type': 'opd',
+            'status': {'$in': OPD_STATUSES}
+        }
+        if scope is not None:
+            query.update(scope_filter(scope))
+        return query
+    
+    def fetch_hourly_series(self, days: int = None, scope: str = None) -> pd.DataFrame:
+        """
+        Fetch hourly OPD volumes, bucketed by the database
+        
+        Falls back to fetching raw appointments (fetch_historical_data) when the server
+        does not support $dateTrunc (MongoDB < 5.0).
+        
+        Args:
+            days: Number of days of history to fetch
+            scope: Optional scope to restrict appointments to
+            
+        Returns:
+            DataFrame with 'ds' and 'y' columns
+        """
+        try:
+            query = self._history_query(days, scope)
+            series = aggregate_time_series(
+                self.db.appointments, query, 'scheduledDate', bucket_expr=appointment_hour_expr()
+            )
+            logger.info(f"Aggregated {int(series['y'].sum())} OPD appointments into {len(series)} hours")
+            return series
+        except OperationFailure as e:
+            logger.warning(f"Server-side aggregation unavailable ({e}), bucketing appointments locally")
+            return self.prepare_training_data(self.fetch_historical_data(days, scope))
+        except Exception as e:
+            logger.error(f"Error fetching OPD data: {e}")
+            return pd.DataFrame(columns=['ds', 'y'])
+    
+    def fetch_historical_data(self, days: int = None, scope: str = None) -> List[Dict]:
+        """
+        Fetch historical OPD appointment data
+        
+        Args:
+            days: Number of days of history to fetch
+            scope: Optional scope to restrict appointments to
+            
+        Returns:
+            List of appointment records (scheduledDate and scheduledTime only)
+        """
+        query = self._history_query(days, scope)
+        
         try:
-            appointments = list(self.db.appointments.find({
-                'scheduledDate': {'$gte': start_date, '$lte': end_date},
-                'type': 'opd',
-                'status': {'$in': ['completed', 'checked-in', 'in-consultation']}
-            }))
+            appointments = list(self.db.appointments.find(query, {'scheduledDate': 1, 'scheduledTime': 1}))
             
             logger.info(f"Fetched {len(appointments)} OPD appointments for training")
             return appointments
@@ -68,7 +474,11 @@ class OPDPredictor:
     
     def prepare_training_data(self, appointments: List[Dict]) -> pd.DataFrame:
         """
-        Prepare appointment data for Prophet training
+        Prepare appointment data for forecaster training
+        
+        Each appointment counts in the hour of its scheduledTime ('HH:MM', '10:00' when
+        absent) on the day of its scheduledDate; when the time cannot be parsed, in the hour
+        of scheduledDate. Appointments without a parseable date are skipped.
         
         Args:
             appointments: List of appointment records
@@ -76,78 +486,48 @@ class OPDPredictor:
         Returns:
             DataFrame with 'ds' and 'y' columns
         """
-        if not appointments:
+        hours = appointment_hours(appointments)
+        if hours.size == 0:
             return pd.DataFrame(columns=['ds', 'y'])
         
-        # Extract datetime from each appointment
-        records = []
-        for apt in appointments:
-            scheduled_date = apt.get('scheduledDate')
-            scheduled_time = apt.get('scheduledTime', '10:00')
-            
-            if scheduled_date:
-                if isinstance(scheduled_date, datetime):
-                    dt = scheduled_date
-                else:
-                    try:
-                        dt = pd.to_datetime(scheduled_date)
-                    except:
-                        continue
-                
-                # Combine date and time
-                try:
-                    if isinstance(scheduled_time, str) and ':' in scheduled_time:
-                        hour = int(scheduled_time.split(':')[0])
-                        dt = dt.replace(hour=hour)
-                except:
-                    pass
-                
-                records.append({'datetime': dt})
-        
-        if not records:
-            return pd.DataFrame(columns=['ds', 'y'])
-        
-        # Create hourly aggregation
-        df = pd.DataFrame(records)
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df = df.set_index('datetime')
-        
         # Count appointments per hour
-        hourly = df.resample('H').size()
-        hourly = hourly.fillna(0)
+        first = hours.min()
+        counts = np.bincount((hours - first).astype(np.int64))
         
         result = pd.DataFrame({
-            'ds': hourly.index,
-            'y': hourly.values
+            'ds': pd.date_range(start=first, periods=len(counts), freq='H'),
+            'y': counts
         })
         
         logger.info(f"Prepared {len(result)} hourly data points for training")
         
         return result
     
-    def train(self, force: bool = False) -> Dict:
+    def train(self, force: bool = False, scope: str = None) -> Dict:
         """
         Train the OPD prediction model
         
         Args:
             force: Force retrain even if model exists
+            scope: Optional scope to train a department model for
             
         Returns:
             Training results
         """
-        if self.model.is_trained and not force:
+        model = self.get_model(scope)
+        
+        if model.is_trained and not force:
             return {
                 'success': True,
                 'message': 'Model already trained',
                 'retrained': False,
-                'model_info': self.model.get_model_info()
+                'model_info': model.get_model_info()
             }
         
-        logger.info("Starting OPD model training...")
+        logger.info(f"Starting OPD model training{f' for {scope}' if scope else ''}...")
         
-        # Fetch and prepare data
-        appointments = self.fetch_historical_data()
-        training_data = self.prepare_training_data(appointments)
+        # Fetch hourly volumes
+        training_data = self.fetch_hourly_series(scope=scope)
         
         if training_data.empty or len(training_data) < self.config.PREDICTION_CONFIG['min_training_samples']:
             return {
@@ -157,132 +537,480 @@ class OPDPredictor:
             }
         
         # Train model
-        result = self.model.train(training_data)
+        result = model.train(training_data)
         result['retrained'] = True
         
+        if scope is not None:
+            # Re-measure the retrained model against the cache budget
+            get_model_cache().put(('opd', scope), model)
+        
+        if result.get('success'):
+            self.warm_forecasts(scope)
+        
         return result
     
-    def predict(self, hours: int = 24) -> Dict:
+    def warm_forecasts(self, scope: str = None):
+        """Drop cached forecasts of the previous model and precompute the default views"""
+        invalidate_forecasts('opd', scope)
+        self.predict(hours=self.config.PREDICTION_CONFIG['default_forecast_hours'], scope=scope)
+        self.get_rush_hour_summary(scope=scope)
+    
+    def predict(self, hours: int = 24, scope: str = None) -> Dict:
         """
         Predict OPD volumes for next N hours
         
         Args:
             hours: Number of hours to predict
+            scope: Optional department scope
             
         Returns:
             Prediction results
         """
-        if not self.model.is_trained:
+        model = self.get_model(scope)
+        if not model.is_trained:
             return {'success': False, 'error': 'Model not trained'}
         
+        return cached_forecast('opd', model, hours, lambda: self._predict(model, hours, scope), scope)
+    
+    def _predict(self, model: BasePredictor, hours: int, scope: str = None) -> Dict:
+        """Compute the OPD forecast (see predict)"""
         try:
             # Get predictions
-            forecast = self.model.predict(periods=hours, freq='H')
+            forecast = model.predict(periods=hours, freq='H')
             
             if forecast.empty:
                 return {'success': False, 'error': 'Prediction failed'}
             
-            # Calculate statistics
-            mean_volume = forecast['yhat'].mean()
-            rush_threshold = mean_volume * self.config.OPD_CONFIG['rush_hour_definition']
+            log_forecast('opd', model, forecast, freq='H', scope=scope)
             
-            # Identify rush hours
-            rush_hours = []
-            predictions = []
+            return self._forecast_response(forecast, hours, scope)
             
-            for _, row in forecast.iterrows():
-                pred = {
-                    'datetime': row['ds'].isoformat(),
-                    'predicted_volume': max(0, round(row['yhat'])),
-                    'lower_bound': max(0, round(row['yhat_lower'])),
-                    'upper_bound': max(0, round(row['yhat_upper'])),
-                    'is_rush_hour': row['yhat'] > rush_threshold
-                }
-                predictions.append(pred)
-                
-                if pred['is_rush_hour']:
-                    rush_hours.append({
-                        'datetime': row['ds'].isoformat(),
-                        'hour': row['ds'].hour,
-                        'day': row['ds'].strftime('%A'),
-                        'predicted_volume': pred['predicted_volume']
-                    })
-            
-            # Get peak hours
-            peak_hours = sorted(
-                predictions,
-                key=lambda x: x['predicted_volume'],
-                reverse=True
-            )[:5]
+        except Exception as e:
+            logger.error(f"OPD prediction error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def nowcast(self, hours: int = 24, scope: str = None) -> Dict:
+        """
+        Predict OPD volumes for next N hours, corrected by today's arrivals so far
+        
+        The arrivals of today's completed hours are compared to what the model forecast
+        for them, and the remaining hours of today are scaled by the smoothed ratio (see
+        Config.NOWCAST_CONFIG). Same response as predict, plus a 'nowcast' summary.
+        
+        Args:
+            hours: Number of hours to predict
+            scope: Optional department scope
             
-            return {
-                'success': True,
-                'prediction_hours': hours,
-                'average_volume': round(mean_volume, 1),
-                'rush_threshold': round(rush_threshold, 1),
-                'rush_hours_count': len(rush_hours),
-                'rush_hours': rush_hours,
-                'peak_hours': peak_hours,
-                'predictions': predictions
+        Returns:
+            Prediction results
+        """
+        model = self.get_model(scope)
+        if not model.is_trained:
+            return {'success': False, 'error': 'Model not trained'}
+        
+        try:
+            self.check_ins.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing OPD check-ins: {e}")
+        
+        # Cached until the hour rolls over or a check-in changes the counts
+        return cached_forecast('opd', model, ('nowcast', hours, self.check_ins.version),
+                               lambda: self._nowcast(model, hours, scope), scope)
+    
+    def _today_baseline(self, model: BasePredictor, scope: str = None) -> np.ndarray:
+        """The model's forecast of today's 24 hours (computed once per model and day)"""
+        day_start = self.check_ins.day_start
+        key = (scope, model.version_token, day_start)
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            result = model.predict_at_datetimes(pd.date_range(day_start, periods=24, freq='H'))
+            if not result.get('success'):
+                raise ValueError(result.get('error', 'Prediction failed'))
+            baseline = np.maximum(np.asarray(result['yhat'], dtype=float), 0)
+            self._baselines = {k: v for k, v in self._baselines.items() if k[2] == day_start}
+            self._baselines[key] = baseline
+        return baseline
+    
+    def _nowcast(self, model: BasePredictor, hours: int, scope: str = None) -> Dict:
+        """Compute the corrected OPD forecast (see nowcast)"""
+        try:
+            forecast = model.predict(periods=hours, freq='H')
+            
+            if forecast.empty:
+                return {'success': False, 'error': 'Prediction failed'}
+            
+            config = self.config.NOWCAST_CONFIG
+            current = start_bucket()
+            elapsed = current.hour  # completed hours of today
+            observed = float(self.check_ins.counts(scope)[:elapsed].sum())
+            expected = float(self._today_baseline(model, scope)[:elapsed].sum())
+            factor = nowcast_factor(observed, expected, config['prior_volume'],
+                                    config['min_factor'], config['max_factor'])
+            
+            remaining = (forecast['ds'] >= current) & (forecast['ds'] < self.check_ins.day_start + timedelta(days=1))
+            forecast.loc[remaining, ['yhat', 'yhat_lower', 'yhat_upper']] *= factor
+            
+            log_forecast('opd_nowcast', model, forecast, freq='H', scope=scope)
+            
+            result = self._forecast_response(forecast, hours, scope)
+            result['nowcast'] = {
+                'factor': round(factor, 3),
+                'observed_so_far': int(observed),
+                'expected_so_far': round(expected, 1),
+                'hours_observed': elapsed,
+                'hours_corrected': int(remaining.sum()),
+                'as_of': current.isoformat()
             }
+            return result
             
         except Exception as e:
-            logger.error(f"OPD prediction error: {e}")
+            logger.error(f"OPD nowcast error: {e}")
             return {'success': False, 'error': str(e)}
     
-    def get_rush_hour_summary(self) -> Dict:
+    def _forecast_response(self, forecast: pd.DataFrame, hours: int, scope: str = None) -> Dict:
+        """Rush hours, peaks and per-hour predictions of an hourly OPD forecast"""
+        # Calculate statistics
+        mean_volume = forecast['yhat'].mean()
+        rush_threshold = mean_volume * self.config.OPD_CONFIG['rush_hour_definition']
+        
+        # Identify rush hours
+        rush_hours = []
+        predictions = []
+        
+        for _, row in forecast.iterrows():
+            pred = {
+                'datetime': row['ds'].isoformat(),
+                'predicted_volume': max(0, round(row['yhat'])),
+                'lower_bound': max(0, round(row['yhat_lower'])),
+                'upper_bound': max(0, round(row['yhat_upper'])),
+                'is_rush_hour': row['yhat'] > rush_threshold
+            }
+            predictions.append(pred)
+            
+            if pred['is_rush_hour']:
+                rush_hours.append({
+                    'datetime': row['ds'].isoformat(),
+                    'hour': row['ds'].hour,
+                    'day': row['ds'].strftime('%A'),
+                    'predicted_volume': pred['predicted_volume']
+                })
+        
+        # Get peak hours
+        peak_hours = sorted(
+            predictions,
+            key=lambda x: x['predicted_volume'],
+            reverse=True
+        )[:5]
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'prediction_hours': hours,
+            'average_volume': round(mean_volume, 1),
+            'rush_threshold': round(rush_threshold, 1),
+            'rush_hours_count': len(rush_hours),
+            'rush_hours': rush_hours,
+            'peak_hours': peak_hours,
+            'predictions': predictions
+        }
+    
+    def predict_slots(self, datetimes: List, scope: str = None) -> Dict:
+        """
+        Predict OPD volumes at arbitrary slot timestamps in one batch
+        
+        Args:
+            datetimes: Slot start times (any order, gaps allowed)
+            scope: Optional department scope
+            
+        Returns:
+            Columnar results aligned with datetimes
+        """
+        result = self.get_model(scope).predict_at_datetimes(datetimes)
+        if not result['success']:
+            return result
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'count': result['count'],
+            'datetime': result['ds'],
+            'predicted_volume': np.maximum(0, np.round(result['yhat'], 2)).tolist(),
+            'lower_bound': np.maximum(0, np.round(result['yhat_lower'], 2)).tolist(),
+            'upper_bound': np.maximum(0, np.round(result['yhat_upper'], 2)).tolist()
+        }
+    
+    def simulate_queue(self, day: datetime = None, doctors: Any = None, scope: str = None,
+                       replications: int = None, service_distribution: str = None,
+                       service_mean_minutes: float = None, service_cv: float = None) -> Dict:
+        """
+        Simulate a day's OPD queue from the hourly arrival forecast (see queue_simulator)
+        
+        The forecast interval is read as uncertainty about the arrival rate, net of the
+        Poisson noise the simulation draws itself, when Config.QUEUE_SIM_CONFIG
+        ['forecast_uncertainty'] is set.
+        
+        Args:
+            day: Day to simulate (default: today)
+            doctors: Doctor count per clinic hour, 24 hourly counts, or {hour: count} overrides
+            scope: Optional department scope
+            replications: Simulated days (capped by the configured maximum)
+            service_distribution: Consultation-time distribution
+            service_mean_minutes: Mean consultation time
+            service_cv: Consultation-time coefficient of variation
+            
+        Returns:
+            Per-hour and whole-day wait-time statistics
+        """
+        config = self.config.QUEUE_SIM_CONFIG
+        schedule = doctor_schedule(doctors)
+        service = service_spec(service_distribution, service_mean_minutes, service_cv)
+        replications = min(replications or config['replications'], config['max_replications'])
+        
+        model = self.get_model(scope)
+        if not model.is_trained:
+            return {'success': False, 'error': 'Model not trained'}
+        
+        day_start = pd.Timestamp(day or datetime.now()).normalize()
+        forecast = model.predict_at_datetimes(pd.date_range(day_start, periods=24, freq='H'))
+        if not forecast.get('success'):
+            return {'success': False, 'error': forecast.get('error', 'Prediction failed')}
+        
+        rates = np.maximum(np.asarray(forecast['yhat'], dtype=float), 0)
+        rate_sd = None
+        if config['forecast_uncertainty']:
+            z = NormalDist().inv_cdf(0.5 + model.config.get('interval_width', 0.95) / 2)
+            upper, lower = (np.asarray(forecast[c], dtype=float) for c in ('yhat_upper', 'yhat_lower'))
+            spread = (upper - lower) / (2 * z)
+            rate_sd = np.sqrt(np.maximum(spread ** 2 - rates, 0))
+        
+        result = simulate_queue(rates, schedule, replications=replications, service=service,
+                                rate_sd=rate_sd, seed=config['seed'])
+        return {
+            'success': True,
+            'scope': scope,
+            'date': day_start.date().isoformat(),
+            'model_version': model.version_token,
+            **result
+        }
+    
+    def get_rush_hour_summary(self, scope: str = None) -> Dict:
         """
         Get summary of typical rush hours based on historical patterns
         
+        Served from the heatmap materialized when the model was trained. A department
+        without its own trained model gets its heatmap from the global department model.
+        
+        Args:
+            scope: Optional department scope
+            
         Returns:
             Rush hour summary by day and hour
         """
-        if not self.model.is_trained:
+        model = self.get_model(scope)
+        if not model.is_trained:
+            if scope is not None:
+                return self._department_rush_hours(scope)
             return {'error': 'Model not trained'}
         
+        view = model.views.get('rush_hours')
+        if view is None:
+            # Model saved before heatmaps were materialized
+            return cached_forecast('opd', model, ('rush_hours', 168), lambda: self._rush_hour_summary(model), scope)
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'source': 'model',
+            'model_version': model.model_version,
+            **view
+        }
+    
+    def _rush_hour_summary(self, model: BasePredictor) -> Dict:
+        """Compute the rush hour summary of a model without a materialized heatmap"""
         try:
-            # Predict for next 7 days
-            forecast = self.model.predict(periods=168, freq='H')  # 7 days * 24 hours
+            return {'success': True, 'source': 'forecast', **rush_hour_view(model)}
+        except Exception as e:
+            logger.error(f"Error getting rush hour summary: {e}")
+            return {'error': str(e)}
+    
+    def _department_rush_hours(self, scope: str) -> Dict:
+        """Rush hour summary of a department from the global department model"""
+        _, department = parse_scope(scope)
+        view = self.department_model.views.get('rush_hours') if self.department_model.is_trained else None
+        if view is None or department not in view['departments']:
+            return {'error': 'Model not trained'}
+        
+        return {
+            'success': True,
+            'scope': scope,
+            'source': 'department_model',
+            'model_version': self.department_model.model_version,
+            'forecast_start': view['forecast_start'],
+            **view['departments'][department]
+        }
+    
+    def get_department_rush_hours(self, departments: List[str] = None) -> Dict:
+        """
+        Rush hour heatmaps of every department (or the given ones) from the global model
+        
+        Args:
+            departments: Department ids (default: all)
             
-            if forecast.empty:
-                return {'error': 'Prediction failed'}
+        Returns:
+            Heatmap by department id
+        """
+        model = self.department_model
+        if not model.is_trained:
+            return {'error': 'Model not trained'}
+        
+        view = model.views.get('rush_hours')
+        if view is None:
+            view = department_rush_hour_view(model)
+        
+        heatmaps = view['departments']
+        requested = list(heatmaps) if not departments else [str(d) for d in departments]
+        return {
+            'success': True,
+            'model_version': model.model_version,
+            'forecast_start': view['forecast_start'],
+            'departments': {d: heatmaps[d] for d in requested if d in heatmaps},
+            'unknown_departments': [d for d in requested if d not in heatmaps]
+        }
+    
+    def fetch_department_series(self, days: int = None) -> pd.DataFrame:
+        """
+        Fetch hourly OPD volumes of every department in one aggregation
+        
+        Args:
+            days: Number of days of history to fetch
             
-            # Group by day of week and hour
-            forecast['day'] = forecast['ds'].dt.day_name()
-            forecast['hour'] = forecast['ds'].dt.hour
+        Returns:
+            Long DataFrame with 'series' (department id), 'ds' and 'y' columns
+        """
+        query = self._history_query(days)
+        query['department'] = {'$ne': None}
+        
+        try:
+            try:
+                series = aggregate_multi_series(
+                    self.db.appointments, query, 'scheduledDate', 'department',
+                    bucket_expr=appointment_hour_expr()
+                )
+            except OperationFailure as e:
+                logger.warning(f"Server-side aggregation unavailable ({e}), bucketing appointments locally")
+                appointments = list(self.db.appointments.find(
+                    query, {'scheduledDate': 1, 'scheduledTime': 1, 'department': 1}
+                ))
+                by_department: Dict[str, List[Dict]] = {}
+                for apt in appointments:
+                    by_department.setdefault(str(apt['department']), []).append(apt)
+                frames = [self.prepare_training_data(apts).assign(series=department)
+                          for department, apts in by_department.items()]
+                series = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['series', 'ds', 'y'])
             
-            # Calculate average by day and hour
-            summary = forecast.groupby(['day', 'hour'])['yhat'].mean().reset_index()
+            logger.info(f"Fetched hourly OPD volumes of {series['series'].nunique()} departments")
+            return series
             
-            # Find rush hours for each day
-            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            rush_by_day = {}
+        except Exception as e:
+            logger.error(f"Error fetching department OPD data: {e}")
+            return pd.DataFrame(columns=['series', 'ds', 'y'])
+    
+    def train_departments(self, force: bool = False) -> Dict:
+        """
+        Train the global model covering every department
+        
+        Args:
+            force: Force retrain even if model exists
             
-            for day in days_order:
-                day_data = summary[summary['day'] == day].sort_values('yhat', ascending=False)
-                if not day_data.empty:
-                    top_hours = day_data.head(3)['hour'].tolist()
-                    rush_by_day[day] = {
-                        'rush_hours': top_hours,
-                        'peak_hour': int(top_hours[0]) if top_hours else 10,
-                        'average_volume': round(day_data['yhat'].mean(), 1)
-                    }
+        Returns:
+            Training results
+        """
+        model = self.department_model
+        
+        if model.is_trained and not force:
+            return {
+                'success': True,
+                'message': 'Model already trained',
+                'retrained': False,
+                'model_info': model.get_model_info()
+            }
+        
+        logger.info("Starting department-level OPD model training...")
+        
+        training_data = self.fetch_department_series()
+        if training_data.empty:
+            return {'success': False, 'error': 'Insufficient training data', 'samples': 0}
+        
+        result = model.train(training_data)
+        result['retrained'] = True
+        
+        if result.get('success'):
+            invalidate_forecasts('opd_departments')
+        
+        return result
+    
+    def predict_departments(self, hours: int = 24, departments: List[str] = None) -> Dict:
+        """
+        Predict OPD volumes of many departments in one batched call
+        
+        Args:
+            hours: Number of hours to predict
+            departments: Department ids (default: every department the model knows)
+            
+        Returns:
+            Prediction results keyed by department
+        """
+        model = self.department_model
+        if not model.is_trained:
+            return {'success': False, 'error': 'Model not trained'}
+        
+        horizon = (hours, tuple(sorted(departments)) if departments else None)
+        return cached_forecast('opd_departments', model, horizon,
+                               lambda: self._predict_departments(model, hours, departments))
+    
+    def _predict_departments(self, model: GlobalForecaster, hours: int, departments: List[str] = None) -> Dict:
+        """Compute the department forecasts (see predict_departments)"""
+        try:
+            ds = department_forecast_hours(model, hours)
+            forecast = model.forecast_matrix(ds, departments)
+            
+            yhat = np.maximum(np.round(forecast['yhat']), 0).astype(int)
+            lower = np.maximum(np.round(forecast['yhat_lower']), 0).astype(int)
+            upper = np.maximum(np.round(forecast['yhat_upper']), 0).astype(int)
+            
+            results = {}
+            for i, department in enumerate(forecast['series']):
+                peak = int(np.argmax(forecast['yhat'][i]))
+                results[department] = {
+                    'predicted_volume': yhat[i].tolist(),
+                    'lower_bound': lower[i].tolist(),
+                    'upper_bound': upper[i].tolist(),
+                    'total_predicted': int(yhat[i].sum()),
+                    'peak_hour': ds[peak].isoformat(),
+                }
             
             return {
                 'success': True,
-                'rush_by_day': rush_by_day
+                'forecast_hours': hours,
+                'datetimes': [t.isoformat() for t in ds],
+                'departments': results,
+                'unknown_departments': forecast['unknown'],
+                'model_version': model.model_version,
+                'generated_at': datetime.now().isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Error getting rush hour summary: {e}")
-            return {'error': str(e)}
+            logger.error(f"Department prediction error: {e}")
+            return {'success': False, 'error': str(e)}
     
-    def get_model_info(self) -> Dict:
+    def get_model_info(self, scope: str = None) -> Dict:
         """Get model information and status"""
+        model = self.get_model(scope)
         return {
             'predictor': 'OPD Rush Hour',
-            'model_type': 'Prophet',
-            **self.model.get_model_info()
+            'model_type': model.model_type,
+            'scope': scope,
+            **model.get_model_info()
         }
 
 
@@ -0,0 +1,220 @@
+"""
+SARIMA Order Search for Predictive Analytics
+Fits a bounded grid of (p,d,q)(P,D,Q,s) candidates in a process pool and picks the best
+by AIC or BIC, caching results per data fingerprint
+"""
+
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.utils import setup_logging
+
+logger = setup_logging('order_search')
+
+
+class FitAbandoned(Exception):
+    """Raised from the optimizer callback when a candidate exceeds its time budget"""
+
+
+def fit_candidate(values: np.ndarray, order: Tuple, seasonal_order: Tuple,
+                  maxiter: int, timeout_s: float) -> Dict:
+    """
+    Fit one SARIMAX candidate (runs in a worker process)
+
+    Args:
+        values: Observations
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, s)
+        maxiter: Optimizer iteration cap
+        timeout_s: Wall-clock budget; the fit is abandoned from the optimizer callback
+
+    Returns:
+        Candidate result (params are returned so the parent can rebuild the winner with a
+        single filter pass instead of refitting)
+    """
+    import warnings
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    result = {'order': list(order), 'seasonal_order': list(seasonal_order)}
+    start = time.perf_counter()
+
+    def callback(_params):
+        if time.perf_counter() - start > timeout_s:
+            raise FitAbandoned()
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = SARIMAX(values, order=order, seasonal_order=seasonal_order,
+                            enforce_stationarity=False, enforce_invertibility=False)
+            fitted = model.fit(disp=False, maxiter=maxiter, callback=callback)
+
+        result.update({
+            'status': 'ok' if fitted.mle_retvals.get('converged', True) else 'not_converged',
+            'aic': float(fitted.aic),
+            'bic': float(fitted.bic),
+            'params': fitted.params.tolist(),
+        })
+        if not np.isfinite(result['aic']) or not np.isfinite(result['bic']):
+            result['status'] = 'not_finite'
+    except FitAbandoned:
+        result['status'] = 'abandoned'
+    except Exception as e:
+        result.update({'status': 'error', 'error': str(e)})
+
+    result['fit_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def candidate_grid(config: Dict) -> List[Tuple[Tuple, Tuple]]:
+    """
+    Bounded candidate grid, simplest models first
+
+    Args:
+        config: Order search configuration
+
+    Returns:
+        List of (order, seasonal_order) pairs, truncated to max_candidates
+    """
+    s = config.get('seasonal_period', 7)
+    candidates = itertools.product(
+        range(config.get('max_p', 2) + 1),
+        config.get('d_values', [1]),
+        range(config.get('max_q', 2) + 1),
+        range(config.get('max_P', 1) + 1),
+        config.get('D_values', [1]),
+        range(config.get('max_Q', 1) + 1),
+    )
+    grid = [((p, d, q), (P, D, Q, s)) for p, d, q, P, D, Q in candidates]
+    grid.sort(key=lambda c: (sum(c[0][::2]) + c[1][0] + c[1][2], c))
+    return grid[:config.get('max_candidates', 36)]
+
+
+def data_fingerprint(values: np.ndarray, grid: List, config: Dict) -> str:
+    """Hash of the observations, candidate grid and fit settings"""
+    digest = hashlib.sha256(np.ascontiguousarray(values, dtype=float).tobytes())
+    settings = {k: config.get(k) for k in ('criterion', 'maxiter', 'fit_timeout_s')}
+    digest.update(json.dumps([grid, settings], sort_keys=True, default=list).encode())
+    return digest.hexdigest()[:32]
+
+
+class OrderSearchCache:
+    """JSON file of search results keyed by data fingerprint"""
+
+    def __init__(self, path: str, max_entries: int = 32):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._read().get(key)
+
+    def put(self, key: str, value: Dict):
+        entries = self._read()
+        entries[key] = value
+        # Keep the newest entries only
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda kv: kv[1].get('searched_at', ''))[-self.max_entries:]
+            entries = dict(newest)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def search_orders(values: np.ndarray, config: Dict) -> Dict:
+    """
+    Evaluate the candidate grid in parallel and select the best model
+
+    Each candidate is abandoned once it exceeds fit_timeout_s; the whole search is cut off
+    after search_timeout_s (the pool is terminated and unfinished candidates are reported
+    as timed out). Non-converged and non-finite fits are never selected.
+
+    Args:
+        values: Observations
+        config: Order search configuration
+
+    Returns:
+        Dictionary with the best candidate and a per-candidate summary
+    """
+    values = np.asarray(values, dtype=float)
+    criterion = config.get('criterion', 'aic')
+    grid = candidate_grid(config)
+
+    cache = OrderSearchCache(config['cache_path']) if config.get('cache_path') else None
+    fingerprint = data_fingerprint(values, grid, config)
+    if cache is not None:
+        cached = cache.get(fingerprint)
+        if cached:
+            logger.info(f"Order search cache hit ({fingerprint[:8]})")
+            return {**cached, 'cached': True}
+
+    workers = config.get('workers') or os.cpu_count() or 1
+    workers = max(1, min(workers, len(grid)))
+    maxiter = config.get('maxiter', 50)
+    fit_timeout = config.get('fit_timeout_s', 20.0)
+    deadline = time.perf_counter() + config.get('search_timeout_s', 120.0)
+    start = time.perf_counter()
+
+    logger.info(f"Searching {len(grid)} SARIMA orders on {workers} workers ({criterion})")
+
+    # spawn keeps workers independent of the server's threads and open sockets
+    context = multiprocessing.get_context('spawn')
+    results: List[Dict] = []
+    with context.Pool(processes=workers) as pool:
+        pending = [
+            (order, seasonal, pool.apply_async(fit_candidate, (values, order, seasonal, maxiter, fit_timeout)))
+            for order, seasonal in grid
+        ]
+        for order, seasonal, async_result in pending:
+            remaining = deadline - time.perf_counter()
+            try:
+                results.append(async_result.get(timeout=max(0.0, remaining)))
+            except multiprocessing.TimeoutError:
+                results.append({'order': list(order), 'seasonal_order': list(seasonal), 'status': 'timeout'})
+        pool.terminate()
+
+    usable = [r for r in results if r.get('status') == 'ok']
+    best = min(usable, key=lambda r: r[criterion]) if usable else None
+
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r['status']] = statuses.get(r['status'], 0) + 1
+
+    summary = {
+        'criterion': criterion,
+        'best': best,
+        'n_candidates': len(grid),
+        'statuses': statuses,
+        'workers': workers,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+        'fingerprint': fingerprint,
+        'searched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ranking': sorted(
+            ({k: r[k] for k in ('order', 'seasonal_order', 'aic', 'bic', 'fit_ms')} for r in usable),
+            key=lambda r: r[criterion]
+        )[:5],
+    }
+
+    if cache is not None and best is not None:
+        cache.put(fingerprint, summary)
+    return {**summary, 'cached': False}
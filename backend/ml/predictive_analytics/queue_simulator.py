@@ -0,0 +1,272 @@
+"""
+OPD Queue Simulator for Predictive Analytics
+Monte Carlo simulation of a day's OPD queue driven by the hourly arrival forecast
+"""
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from config import Config
+
+SERVICE_DISTRIBUTIONS = ('lognormal', 'gamma', 'exponential', 'deterministic')
+
+HOURS = 24
+
+
+def service_spec(distribution: str = None, mean_minutes: float = None, cv: float = None) -> Dict:
+    """
+    Consultation-time distribution, defaults from Config.QUEUE_SIM_CONFIG
+
+    Args:
+        distribution: One of SERVICE_DISTRIBUTIONS
+        mean_minutes: Mean consultation time
+        cv: Coefficient of variation (std / mean); ignored by 'exponential' (1) and 'deterministic' (0)
+
+    Returns:
+        {'distribution', 'mean_minutes', 'cv'}
+    """
+    config = Config.QUEUE_SIM_CONFIG
+    spec = {
+        'distribution': distribution or config['service_distribution'],
+        'mean_minutes': float(mean_minutes if mean_minutes is not None else config['service_mean_minutes']),
+        'cv': float(cv if cv is not None else config['service_cv']),
+    }
+    if spec['distribution'] not in SERVICE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown service distribution '{spec['distribution']}' "
+                         f"(expected one of {', '.join(SERVICE_DISTRIBUTIONS)})")
+    if spec['mean_minutes'] <= 0:
+        raise ValueError('Mean consultation time must be positive')
+    if spec['cv'] < 0:
+        raise ValueError('Consultation time cv must not be negative')
+    if spec['distribution'] == 'exponential':
+        spec['cv'] = 1.0
+    elif spec['distribution'] == 'deterministic':
+        spec['cv'] = 0.0
+    return spec
+
+
+def service_times(rng: np.random.Generator, size, spec: Dict) -> np.ndarray:
+    """
+    Draw consultation times in minutes
+
+    Args:
+        rng: Random generator
+        size: Output shape
+        spec: Distribution from service_spec
+
+    Returns:
+        Array of consultation times
+    """
+    mean, cv = spec['mean_minutes'], spec['cv']
+    if cv == 0:
+        return np.full(size, mean)
+    if spec['distribution'] == 'exponential':
+        return rng.exponential(mean, size)
+    if spec['distribution'] == 'gamma':
+        shape = 1.0 / cv ** 2
+        return rng.gamma(shape, mean / shape, size)
+    sigma2 = np.log1p(cv ** 2)
+    return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), size)
+
+
+def doctor_schedule(doctors: Union[int, Sequence[int], Dict, None] = None) -> np.ndarray:
+    """
+    Doctors on duty in each hour of the day
+
+    Args:
+        doctors: A count for every clinic hour (Config.QUEUE_SIM_CONFIG['clinic_hours']),
+            24 hourly counts, or {hour: count} overrides of the default schedule
+
+    Returns:
+        Integer array of 24 counts
+    """
+    config = Config.QUEUE_SIM_CONFIG
+    open_hour, close_hour = config['clinic_hours']
+
+    def clinic(count: int) -> np.ndarray:
+        schedule = np.zeros(HOURS, dtype=int)
+        schedule[open_hour:close_hour] = count
+        return schedule
+
+    if doctors is None:
+        schedule = clinic(config['doctors'])
+    elif isinstance(doctors, dict):
+        schedule = clinic(config['doctors'])
+        for hour, count in doctors.items():
+            hour = int(hour)
+            if not 0 <= hour < HOURS:
+                raise ValueError(f'Invalid hour in doctor schedule: {hour}')
+            schedule[hour] = int(count)
+    elif np.ndim(doctors) == 0:
+        schedule = clinic(int(doctors))
+    else:
+        schedule = np.asarray(doctors, dtype=int)
+        if schedule.shape != (HOURS,):
+            raise ValueError(f'Doctor schedule must have {HOURS} hourly counts, got {len(schedule)}')
+
+    if (schedule < 0).any():
+        raise ValueError('Doctor counts must not be negative')
+    if not schedule.any():
+        raise ValueError('No doctors on duty')
+    return schedule
+
+
+def simulate_queue(arrival_rates: Sequence[float], doctors: Sequence[int], replications: int = 2000,
+                   service: Dict = None, rate_sd: Optional[Sequence[float]] = None, seed: int = None,
+                   percentiles: List[float] = None, wait_threshold: float = None) -> Dict:
+    """
+    Monte Carlo replications of a day's first-come-first-served OPD queue (M/G/c with
+    hourly arrival rates and doctor counts)
+
+    Each replication draws Poisson arrivals per hour (spread uniformly within the hour) and
+    a consultation time per patient; every patient in turn goes to the doctor who can start
+    seeing them first. Doctors only start consultations in hours they are on duty, patients
+    who arrive before the first shift or during a gap wait for it, and the doctors of the
+    last shift stay until the queue is empty. Arrivals after the last shift are counted as
+    after-hours and not queued. Patients are processed in arrival order, but all
+    replications advance together, so the cost is one vectorized step per patient.
+
+    With rate_sd, every replication shifts each hour's rate by rate_sd times one
+    standard-normal draw for the whole day (forecast errors of a day's hours move together)
+    before drawing arrivals.
+
+    Args:
+        arrival_rates: Expected arrivals in each of the 24 hours
+        doctors: Doctors on duty in each hour (see doctor_schedule)
+        replications: Number of simulated days
+        service: Consultation-time distribution (see service_spec)
+        rate_sd: Standard deviation of each hour's rate (forecast uncertainty)
+        seed: Random seed; runs with the same seed, rates and closing hour share arrivals and
+            consultation times, so comparing doctor counts is not blurred by sampling noise
+        percentiles: Wait-time percentiles to report
+        wait_threshold: Minutes; the share of patients waiting longer is reported
+
+    Returns:
+        Per-hour and whole-day wait statistics (minutes)
+    """
+    config = Config.QUEUE_SIM_CONFIG
+    service = service or service_spec()
+    percentiles = percentiles or config['percentiles']
+    wait_threshold = config['wait_threshold_minutes'] if wait_threshold is None else wait_threshold
+
+    rates = np.maximum(np.asarray(arrival_rates, dtype=float), 0)
+    schedule = np.asarray(doctors, dtype=int)
+    if rates.shape != (HOURS,) or schedule.shape != (HOURS,):
+        raise ValueError(f'Arrival rates and doctor schedule must have {HOURS} hourly values')
+    if replications < 1:
+        raise ValueError('At least one replication is required')
+
+    rng = np.random.default_rng(seed)
+    close_hour = int(np.flatnonzero(schedule)[-1]) + 1  # first hour after the last shift
+
+    # Arrivals: (replications, patients) minutes since midnight, sorted, padded with inf
+    lam = np.broadcast_to(rates, (replications, HOURS))
+    if rate_sd is not None:
+        lam = np.maximum(rates + np.asarray(rate_sd, dtype=float) * rng.standard_normal((replications, 1)), 0)
+    counts = rng.poisson(lam)
+    after_hours = counts[:, close_hour:].sum(axis=1)
+    counts[:, close_hour:] = 0
+
+    totals = counts.sum(axis=1)
+    patients = int(totals.max())
+    if replications * patients > config['max_cells']:
+        raise ValueError(f'Simulation too large ({replications} replications x {patients} patients); '
+                         f'reduce the number of replications')
+
+    rows = np.repeat(np.arange(replications), totals)
+    columns = np.arange(len(rows)) - np.repeat(np.cumsum(totals) - totals, totals)
+    hours = np.repeat(np.tile(np.arange(HOURS), replications), counts.ravel())
+    arrivals = np.full((replications, patients), np.inf)
+    arrivals[rows, columns] = 60.0 * hours + rng.uniform(0, 60, len(rows))
+    arrivals.sort(axis=1)
+    consultations = service_times(rng, (replications, patients), service)
+
+    # next_start[doctor, hour]: earliest minute from which a doctor free during that hour can
+    # start a consultation (the hour's start while on duty, hence max(t, next_start))
+    servers = int(schedule.max())
+    on_duty = np.zeros((servers, HOURS + 1), dtype=bool)
+    on_duty[:, :HOURS] = np.arange(servers)[:, None] < schedule
+    on_duty[:, close_hour:] = on_duty[:, close_hour - 1:close_hour]  # last shift works overtime
+    next_start = np.full((servers, HOURS + 1), np.inf)
+    upcoming = np.full(servers, np.inf)
+    for hour in range(HOURS, -1, -1):
+        upcoming = np.where(on_duty[:, hour], 60.0 * hour, upcoming)
+        next_start[:, hour] = upcoming
+
+    # Hours are truncated true divisions: float floor division is several times slower
+    free = np.zeros((replications, servers))
+    starts = np.empty((replications, patients))
+    doctor_index = np.arange(servers)
+    replication_index = np.arange(replications)
+    for k in range(patients):
+        t = np.maximum(free, arrivals[:, k, None])
+        hour = (np.minimum(t, 60.0 * HOURS) / 60).astype(np.intp)
+        ready = np.maximum(t, next_start[doctor_index, hour])
+        doctor = ready.argmin(axis=1)
+        start = ready[replication_index, doctor]
+        starts[:, k] = start
+        free[replication_index, doctor] = start + consultations[:, k]
+
+    valid = np.isfinite(arrivals)
+    with np.errstate(invalid='ignore'):
+        waits = starts - arrivals
+        finish = np.where(valid, starts + consultations, 0.0)
+    overtime = np.maximum(finish.max(axis=1, initial=0.0) - 60.0 * close_hour, 0)
+
+    # Patients waiting at the top of each hour: arrived before it minus started before it
+    start_hours = (np.minimum(starts[valid], 60.0 * HOURS) / 60).astype(np.intp)
+    started = np.bincount(np.nonzero(valid)[0] * (HOURS + 1) + start_hours,
+                          minlength=replications * (HOURS + 1)).reshape(replications, HOURS + 1)
+    arrived_before = np.cumsum(counts, axis=1) - counts
+    started_before = np.cumsum(started[:, :HOURS], axis=1) - started[:, :HOURS]
+    queue_length = (arrived_before - started_before).mean(axis=0)
+
+    # Wait statistics by arrival hour, pooled over replications
+    wait_values = waits[valid]
+    wait_hours = (arrivals[valid] / 60).astype(np.uint8)  # small ints: radix sort
+    order = np.argsort(wait_hours, kind='stable')
+    wait_values, wait_hours = wait_values[order], wait_hours[order]
+    bounds = np.searchsorted(wait_hours, np.arange(HOURS + 1))
+
+    def wait_stats(values: np.ndarray) -> Dict:
+        if len(values) == 0:
+            return {'wait_minutes': None, 'prob_wait_over_threshold': None}
+        points = np.percentile(values, percentiles)
+        stats = {'mean': round(float(values.mean()), 1)}
+        stats.update({f'p{p:g}': round(float(v), 1) for p, v in zip(percentiles, points)})
+        return {
+            'wait_minutes': stats,
+            'prob_wait_over_threshold': round(float((values > wait_threshold).mean()), 3)
+        }
+
+    hourly = []
+    for hour in range(HOURS):
+        hourly.append({
+            'hour': hour,
+            'doctors': int(schedule[hour]),
+            'expected_arrivals': round(float(rates[hour]), 2),
+            'simulated_arrivals': round(float(counts[:, hour].mean()), 2),
+            'offered_load': round(float(rates[hour] * service['mean_minutes'] / (60.0 * schedule[hour])), 3)
+            if schedule[hour] else None,
+            'queue_length': round(float(queue_length[hour]), 2),
+            **wait_stats(wait_values[bounds[hour]:bounds[hour + 1]])
+        })
+
+    busiest = max((h for h in hourly if h['wait_minutes']), key=lambda h: h['wait_minutes']['mean'], default=None)
+    return {
+        'replications': replications,
+        'service': service,
+        'wait_threshold_minutes': wait_threshold,
+        'summary': {
+            'patients': round(float(totals.mean()), 1),
+            'after_hours_arrivals': round(float(after_hours.mean()), 1),
+            **wait_stats(wait_values),
+            'longest_wait_hour': busiest['hour'] if busiest else None,
+            'overtime_minutes': {
+                'mean': round(float(overtime.mean()), 1),
+                'p90': round(float(np.percentile(overtime, 90)), 1)
+            }
+        },
+        'hourly': hourly
+    }
@@ -0,0 +1,119 @@
+"""
+Scoped Forecasters for Predictive Analytics
+Department-level OPD and lab models, loaded on demand and kept in a bounded LRU cache
+"""
+
+import os
+import re
+import sys
+from typing import Dict, Optional, Tuple
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.model_cache import ModelCache
+from shared.utils import setup_logging, to_object_id
+from config import Config
+from time_series import BasePredictor, create_forecaster
+
+logger = setup_logging('scoped_models')
+
+# Scope strings are '<dimension>:<id>'; departments are the only dimension the schema has
+SCOPE_DIMENSIONS = ('department',)
+
+_SCOPE_PATTERN = re.compile(r'^([a-z_]+):([0-9a-fA-F]{24})$')
+
+
+def parse_scope(scope: str) -> Tuple[str, str]:
+    """
+    Split and validate a scope string
+
+    Args:
+        scope: e.g. 'department:64b7f0c2a1d3e4f5a6b7c8d9'
+
+    Returns:
+        (dimension, id)
+
+    Raises:
+        ValueError: If the scope is malformed or the dimension is unsupported
+    """
+    match = _SCOPE_PATTERN.match(scope or '')
+    if not match or match.group(1) not in SCOPE_DIMENSIONS:
+        raise ValueError(f"Invalid scope '{scope}' (expected one of "
+                         f"{', '.join(d + ':<id>' for d in SCOPE_DIMENSIONS)})")
+    return match.group(1), match.group(2).lower()
+
+
+def department_scope(department_id: Optional[str]) -> Optional[str]:
+    """Scope string for a department id (None for the hospital-wide model)"""
+    return f'department:{department_id}' if department_id else None
+
+
+def scope_filter(scope: str, field: str = None) -> Dict:
+    """
+    MongoDB filter selecting the documents of a scope
+
+    Args:
+        scope: Scope string
+        field: Document field holding the scope id (default: the dimension name)
+
+    Returns:
+        Filter dictionary
+    """
+    dimension, scope_id = parse_scope(scope)
+    return {field or dimension: to_object_id(scope_id)}
+
+
+def scoped_model_path(model_type: str, scope: str) -> str:
+    """Model file for a scope, e.g. models/opd_prophet__department-64b7....pkl"""
+    dimension, scope_id = parse_scope(scope)
+    base, ext = os.path.splitext(Config.get_model_path(model_type))
+    return f'{base}__{dimension}-{scope_id}{ext}'
+
+
+def _model_size(model: BasePredictor) -> int:
+    # Untrained placeholders still occupy an entry; count them as a small fixed size
+    return max(model.footprint_bytes(), Config.MODEL_CACHE_CONFIG['min_entry_bytes'])
+
+
+# Singleton cache shared by all scoped predictors in this process
+_model_cache = None
+
+def get_model_cache() -> ModelCache:
+    """Get scoped model cache singleton instance"""
+    global _model_cache
+    if _model_cache is None:
+        cache_config = Config.MODEL_CACHE_CONFIG
+        _model_cache = ModelCache(
+            max_bytes=cache_config['max_bytes'],
+            max_entries=cache_config['max_entries'],
+            sizer=_model_size
+        )
+    return _model_cache
+
+
+def get_scoped_forecaster(series: str, scope: str) -> BasePredictor:
+    """
+    Forecaster for one series ('opd' or 'lab') and scope, loaded on first use
+
+    Args:
+        series: Predictor type
+        scope: Scope string
+
+    Returns:
+        Forecaster (untrained if no model was saved for the scope yet)
+    """
+    parse_scope(scope)
+
+    def load() -> BasePredictor:
+        return create_forecaster(
+            backend=Config.get_forecast_backend(series),
+            prophet_path=scoped_model_path(series, scope),
+            numpy_path=scoped_model_path(f'{series}_numpy', scope),
+            prophet_config=Config.PROPHET_PARAMS,
+            numpy_config=Config.NUMPY_FORECASTER_PARAMS,
+            profile_path=scoped_model_path(f'{series}_profile', scope),
+            profile_config=Config.PROFILE_FORECASTER_PARAMS
+        )
+
+    return get_model_cache().get((series, scope), load)
@@ -0,0 +1,410 @@
+"""
+Generic Series Predictor
+Serves every operational series declared in Config.SERIES_REGISTRY with one
+fetch -> aggregate -> train -> predict -> threshold implementation
+"""
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pymongo.errors import OperationFailure
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.db_connector import get_db
+from shared.utils import setup_logging
+from config import Config
+from time_series import (ARIMAPredictor, BasePredictor, aggregate_time_series, create_forecaster,
+                         prepare_time_series_data)
+from forecast_cache import cached_forecast, invalidate_forecasts, start_bucket
+from forecast_monitor import log_forecast
+
+logger = setup_logging('series_predictor')
+
+GRANULARITY_FREQ = {'hourly': 'H', 'daily': 'D'}
+SERIES_BACKENDS = ('auto', 'prophet', 'numpy', 'profile', 'arima')
+THRESHOLD_MODES = ('relative', 'absolute')
+REQUIRED_KEYS = ('collection', 'date_field', 'granularity')
+
+
+def validate_series_spec(name: str, spec: Dict) -> Dict:
+    """
+    Check a registry entry and fill in defaults
+
+    Args:
+        name: Series name
+        spec: Registry entry
+
+    Returns:
+        Normalized spec
+
+    Raises:
+        ValueError: If the entry is incomplete or inconsistent
+    """
+    missing = [key for key in REQUIRED_KEYS if not spec.get(key)]
+    if missing:
+        raise ValueError(f"Series '{name}' is missing {', '.join(missing)}")
+
+    spec = {
+        'description': '',
+        'filter': {},
+        'backend': 'auto',
+        'training_days': 90,
+        'thresholds': {'mode': 'relative', 'warning': 1.3, 'critical': 1.6},
+        **spec
+    }
+    if spec['granularity'] not in GRANULARITY_FREQ:
+        raise ValueError(f"Series '{name}': granularity must be one of {', '.join(GRANULARITY_FREQ)}")
+    if spec['backend'] not in SERIES_BACKENDS:
+        raise ValueError(f"Series '{name}': backend must be one of {', '.join(SERIES_BACKENDS)}")
+    if spec['backend'] == 'arima' and spec['granularity'] != 'daily':
+        raise ValueError(f"Series '{name}': the arima backend only supports daily series")
+    if spec['backend'] == 'profile' and spec['granularity'] != 'hourly':
+        raise ValueError(f"Series '{name}': the profile backend only supports hourly series")
+    if spec['thresholds'].get('mode', 'relative') not in THRESHOLD_MODES:
+        raise ValueError(f"Series '{name}': threshold mode must be one of {', '.join(THRESHOLD_MODES)}")
+    return spec
+
+
+def load_series_registry() -> Dict[str, Dict]:
+    """
+    Registered series: Config.SERIES_REGISTRY plus the entries of SERIES_REGISTRY_FILE
+
+    Returns:
+        Validated specs by series name
+    """
+    registry = dict(Config.SERIES_REGISTRY)
+    if Config.SERIES_REGISTRY_FILE:
+        try:
+            with open(Config.SERIES_REGISTRY_FILE) as f:
+                registry.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read series registry file {Config.SERIES_REGISTRY_FILE}: {e}")
+
+    specs = {}
+    for name, spec in registry.items():
+        try:
+            specs[name] = validate_series_spec(name, spec)
+        except ValueError as e:
+            logger.error(f"Skipping series: {e}")
+    return specs
+
+
+class SeriesPredictor:
+    """
+    Forecaster for one registered series
+
+    Counts documents of spec['collection'] per hour or day, fits the configured backend
+    and flags periods whose forecast crosses the warning/critical thresholds.
+    """
+
+    def __init__(self, name: str, spec: Dict):
+        """
+        Initialize series predictor (loads the saved model, if any)
+
+        Args:
+            name: Series name (also names the model files)
+            spec: Validated registry entry
+        """
+        self.name = name
+        self.spec = spec
+        self.db = get_db()
+        self.config = Config
+        self.freq = GRANULARITY_FREQ[spec['granularity']]
+        self.model = self._build_model()
+
+    def _build_model(self) -> BasePredictor:
+        backend = self.spec['backend']
+        if backend == 'arima':
+            return ARIMAPredictor(
+                model_path=Config.get_model_path(f'series_{self.name}_arima'),
+                config=Config.ARIMA_PARAMS
+            )
+        return create_forecaster(
+            backend=backend,
+            prophet_path=Config.get_model_path(f'series_{self.name}_prophet'),
+            numpy_path=Config.get_model_path(f'series_{self.name}_numpy'),
+            prophet_config=Config.PROPHET_PARAMS,
+            numpy_config=Config.NUMPY_FORECASTER_PARAMS,
+            profile_path=Config.get_model_path(f'series_{self.name}_profile'),
+            profile_config=Config.PROFILE_FORECASTER_PARAMS
+        )
+
+    @property
+    def cache_name(self) -> str:
+        return f'series:{self.name}'
+
+    def fetch_historical_data(self, days: int = None) -> pd.DataFrame:
+        """
+        Fetch the series, bucketed by the database (raw dates only on MongoDB < 5.0)
+
+        Args:
+            days: Number of days of history (default: spec 'training_days')
+
+        Returns:
+            DataFrame with 'ds' and 'y' columns
+        """
+        days = days or self.spec['training_days']
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+
+        date_field = self.spec['date_field']
+        query = {**self.spec['filter'], date_field: {'$gte': start_date, '$lte': end_date}}
+        collection = self.db.db[self.spec['collection']]
+
+        try:
+            try:
+                series = aggregate_time_series(collection, query, date_field, freq=self.freq)
+            except OperationFailure as e:
+                logger.warning(f"Server-side aggregation unavailable ({e}), bucketing {self.name} locally")
+                documents = list(collection.find(query, {date_field: 1}))
+                series = prepare_time_series_data(documents, date_field, freq=self.freq)
+
+            logger.info(f"Fetched {len(series)} {self.spec['granularity']} points for {self.name}")
+            return series
+
+        except Exception as e:
+            logger.error(f"Error fetching {self.name} data: {e}")
+            return pd.DataFrame(columns=['ds', 'y'])
+
+    def complete_days(self, series: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop today's bucket from a daily series
+
+        Today's count is still growing, so training on it would end the series on an
+        artificially low day. Hourly series are returned unchanged.
+        """
+        if self.freq != 'D' or series.empty:
+            return series
+        today = pd.Timestamp(datetime.now().date())
+        return series[pd.DatetimeIndex(series['ds']).normalize() < today]
+
+    def train(self, force: bool = False) -> Dict:
+        """
+        Train the series model
+
+        Args:
+            force: Force retrain even if model exists
+
+        Returns:
+            Training results
+        """
+        if self.model.is_trained and not force:
+            return {
+                'success': True,
+                'message': 'Model already trained',
+                'retrained': False,
+                'model_info': self.model.get_model_info()
+            }
+
+        logger.info(f"Starting {self.name} model training...")
+
+        # Complete days only for daily series (see complete_days)
+        training_data = self.complete_days(self.fetch_historical_data())
+        if training_data.empty or len(training_data) < self.config.PREDICTION_CONFIG['min_training_samples']:
+            return {
+                'success': False,
+                'error': 'Insufficient training data',
+                'samples': len(training_data)
+            }
+
+        result = self.model.train(training_data)
+        result['retrained'] = True
+
+        if result.get('success'):
+            invalidate_forecasts(self.cache_name)
+
+        return result
+
+    def default_horizon(self) -> int:
+        if self.freq == 'H':
+            return self.config.SERIES_CONFIG['default_horizon_hours']
+        return self.config.SERIES_CONFIG['default_horizon_days']
+
+    def predict(self, periods: int = None) -> Dict:
+        """
+        Forecast the next periods (hours or days, per the series granularity)
+
+        Args:
+            periods: Number of periods (default: SERIES_CONFIG default horizon)
+
+        Returns:
+            Prediction results
+        """
+        if not self.model.is_trained:
+            return {'success': False, 'error': 'Model not trained'}
+
+        periods = periods or self.default_horizon()
+        return cached_forecast(self.cache_name, self.model, periods, lambda: self._predict(periods))
+
+    def _predict(self, periods: int) -> Dict:
+        """Compute the forecast and threshold levels (see predict)"""
+        try:
+            if isinstance(self.model, ARIMAPredictor):
+                forecast = self._predict_arima(periods)
+            else:
+                forecast = self.model.predict(periods=periods, freq=self.freq)
+
+            if forecast.empty:
+                return {'success': False, 'error': 'Prediction failed'}
+
+            log_forecast(self.cache_name, self.model, forecast, freq=self.freq)
+
+            yhat = np.maximum(forecast['yhat'].to_numpy(dtype=float), 0)
+            warning, critical = self._thresholds(yhat)
+            levels = np.where(yhat >= critical, 'critical', np.where(yhat >= warning, 'warning', 'normal'))
+
+            predictions = [{
+                'datetime': ds.isoformat(),
+                'predicted_value': round(float(value), 2),
+                'lower_bound': max(0.0, round(float(lower), 2)),
+                'upper_bound': max(0.0, round(float(upper), 2)),
+                'level': level
+            } for ds, value, lower, upper, level in zip(
+                forecast['ds'], yhat, forecast['yhat_lower'], forecast['yhat_upper'], levels
+            )]
+
+            peak = int(np.argmax(yhat))
+            return {
+                'success': True,
+                'series': self.name,
+                'description': self.spec['description'],
+                'granularity': self.spec['granularity'],
+                'forecast_periods': periods,
+                'predictions': predictions,
+                'summary': {
+                    'total_predicted': round(float(yhat.sum()), 2),
+                    'peak': predictions[peak],
+                    'warning_threshold': round(float(warning), 2),
+                    'critical_threshold': round(float(critical), 2),
+                    'warning_periods': int((levels == 'warning').sum()),
+                    'critical_periods': int((levels == 'critical').sum()),
+                },
+                'model_type': self.model.model_type,
+                'model_version': self.model.model_version,
+                'generated_at': datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"{self.name} prediction error: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def _predict_arima(self, periods: int) -> pd.DataFrame:
+        """
+        ARIMA forecast of the next periods days, from today
+
+        ARIMA steps continue the training series, so step 1 is the day after the last
+        observation; the steps for days that already passed are forecast and dropped.
+        """
+        last_observation = self.model.training_metadata.get('last_observation')
+        if last_observation is None:
+            return self.model.predict(periods=periods, start_date=start_bucket())
+
+        first = pd.Timestamp(last_observation).normalize() + pd.Timedelta(days=1)
+        skipped = max((pd.Timestamp(datetime.now().date()) - first).days, 0)
+        forecast = self.model.predict(periods=periods + skipped, start_date=first)
+        return forecast.iloc[skipped:].reset_index(drop=True)
+
+    def _thresholds(self, yhat: np.ndarray):
+        """Warning and critical values: multiples of the forecast mean, or absolute counts"""
+        thresholds = self.spec['thresholds']
+        if thresholds.get('mode', 'relative') == 'absolute':
+            return float(thresholds['warning']), float(thresholds['critical'])
+        mean = float(yhat.mean()) if len(yhat) else 0.0
+        return mean * thresholds['warning'], mean * thresholds['critical']
+
+    def get_model_info(self) -> Dict:
+        """Get model information and status"""
+        return {
+            'predictor': self.name,
+            'description': self.spec['description'],
+            'granularity': self.spec['granularity'],
+            'backend': self.spec['backend'],
+            'model_type': self.model.model_type,
+            **self.model.get_model_info()
+        }
+
+
+# Lazily constructed predictors (a series' model is only loaded when first used)
+_series_specs: Optional[Dict[str, Dict]] = None
+_series_predictors: Dict[str, SeriesPredictor] = {}
+_series_lock = threading.Lock()
+_train_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_series_specs() -> Dict[str, Dict]:
+    """Registered series specs (read once per process)"""
+    global _series_specs
+    if _series_specs is None:
+        _series_specs = load_series_registry()
+    return _series_specs
+
+
+def get_series_predictor(name: str) -> SeriesPredictor:
+    """
+    Predictor for a registered series, created on first use
+
+    Raises:
+        KeyError: If the series is not registered
+    """
+    specs = get_series_specs()
+    if name not in specs:
+        raise KeyError(f"Unknown series '{name}'")
+
+    with _series_lock:
+        predictor = _series_predictors.get(name)
+        if predictor is None:
+            predictor = SeriesPredictor(name, specs[name])
+            _series_predictors[name] = predictor
+        return predictor
+
+
+def loaded_series_predictors() -> List[SeriesPredictor]:
+    """Predictors created so far (for registry polling and status)"""
+    with _series_lock:
+        return list(_series_predictors.values())
+
+
+def train_series(names: List[str] = None, force: bool = False) -> Dict[str, Dict]:
+    """
+    Train several series concurrently in the shared training pool
+
+    Prophet fits run in CmdStan processes and the NumPy backends spend their time in
+    vectorized code, so threads overlap well without duplicating loaded models.
+
+    Args:
+        names: Series to train (default: all registered series)
+        force: Force retrain
+
+    Returns:
+        Training result by series name
+    """
+    global _train_pool
+    names = list(names or get_series_specs())
+    unknown = [name for name in names if name not in get_series_specs()]
+    if unknown:
+        raise KeyError(f"Unknown series: {', '.join(unknown)}")
+
+    with _series_lock:
+        if _train_pool is None:
+            _train_pool = ThreadPoolExecutor(
+                max_workers=Config.SERIES_CONFIG['train_workers'], thread_name_prefix='series-train'
+            )
+
+    def run(name: str) -> Dict:
+        try:
+            return get_series_predictor(name).train(force=force)
+        except Exception as e:
+            logger.error(f"{name} training error: {e}")
+            return {'success': False, 'error': str(e)}
+
+    futures = {name: _train_pool.submit(run, name) for name in names}
+    return {name: future.result() for name, future in futures.items()}
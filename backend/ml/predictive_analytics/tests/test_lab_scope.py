@@ -0,0 +1,62 @@
+"""
+Department-scoped lab queries against a fake database holding the collections the Node API writes
+"""
+
+import os
+import sys
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.db_connector import DatabaseConnector
+from lab_predictor import LabWorkloadPredictor
+
+
+class FakeCollection:
+    """Equality-filter find over a list of documents"""
+
+    def __init__(self, name, docs=None):
+        self.name = name
+        self.docs = docs or []
+
+    def find(self, query=None, projection=None):
+        return [doc for doc in self.docs if all(doc.get(key) == value for key, value in (query or {}).items())]
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection(name)
+        return self[name]
+
+
+def make_predictor(db: FakeDatabase) -> LabWorkloadPredictor:
+    connector = object.__new__(DatabaseConnector)
+    connector._db = db
+    predictor = object.__new__(LabWorkloadPredictor)
+    predictor.db = connector
+    return predictor
+
+
+def test_scope_query_reads_the_mongoose_lab_catalogue():
+    cardiology, radiology = ObjectId(), ObjectId()
+    troponin, lipids, xray = ObjectId(), ObjectId(), ObjectId()
+    db = FakeDatabase()
+    # mongoose stores the LabTestMaster model in 'labtestmasters'
+    db['labtestmasters'] = FakeCollection('labtestmasters', [
+        {'_id': troponin, 'testCode': 'TROP', 'department': cardiology},
+        {'_id': lipids, 'testCode': 'LIPID', 'department': cardiology},
+        {'_id': xray, 'testCode': 'XR', 'department': radiology},
+    ])
+
+    query = make_predictor(db)._scope_query(f'department:{cardiology}')
+
+    assert query == {'test': {'$in': [troponin, lipids]}}
+
+
+def test_scope_query_without_catalogue_entries_matches_nothing():
+    db = FakeDatabase()
+    db['labtestmasters'] = FakeCollection('labtestmasters', [{'_id': ObjectId(), 'department': ObjectId()}])
+
+    assert make_predictor(db)._scope_query(f'department:{ObjectId()}') == {'test': {'$in': []}}
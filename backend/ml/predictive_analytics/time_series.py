@@ -1,12 +1,15 @@
 """
 Time Series Base Module for Predictive Analytics
-Provides Prophet and ARIMA implementations for forecasting
+Provides Prophet, ARIMA and dependency-free NumPy implementations for forecasting
 """
 
 import os
+import re
 import sys
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 import joblib
@@ -16,13 +19,221 @@ from abc import ABC, abstractmethod
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.utils import setup_logging
+from shared.artifacts import artifact_dir, is_artifact, read_artifact, write_artifact
+from shared.model_registry import ModelRegistry
 
 logger = setup_logging('time_series')
 
+# Interval modes: 'sampling' keeps the library's own intervals (Prophet simulation, SARIMA
+# analytic variance); 'empirical' and 'conformal' attach residual intervals calibrated at training
+INTERVAL_MODES = ('sampling', 'empirical', 'conformal')
+
+
+class ResidualIntervals:
+    """
+    Prediction intervals calibrated once from training residuals
+    
+    Residuals are grouped by seasonal position (hour-of-week for hourly series, day-of-week
+    for daily ones) so quiet night hours get narrow bands and clinic peaks get wide ones.
+    At prediction time the stored offsets are added to the point forecast, which is a
+    table lookup instead of an uncertainty simulation.
+    """
+    
+    def __init__(self, interval_width: float = 0.95, method: str = 'empirical',
+                 season: str = 'hour_of_week', min_bucket_samples: int = 8):
+        """
+        Initialize intervals
+        
+        Args:
+            interval_width: Nominal coverage of the interval
+            method: 'empirical' (signed residual quantiles, asymmetric) or 'conformal'
+                    (split-conformal quantile of absolute residuals, symmetric)
+            season: 'hour_of_week' or 'day_of_week'
+            min_bucket_samples: Weight of the global scale when estimating a bucket's scale
+        """
+        self.interval_width = interval_width
+        self.method = method
+        self.season = season
+        self.min_bucket_samples = min_bucket_samples
+        self.lower: Optional[np.ndarray] = None
+        self.upper: Optional[np.ndarray] = None
+        self.fallback_buckets = 0
+    
+    @staticmethod
+    def season_for(ds) -> str:
+        """Pick the bucketing that matches the sampling interval of a series"""
+        step = pd.Series(pd.to_datetime(ds)).diff().median()
+        return 'hour_of_week' if pd.notna(step) and step < pd.Timedelta(days=1) else 'day_of_week'
+    
+    @property
+    def n_buckets(self) -> int:
+        return 168 if self.season == 'hour_of_week' else 7
+    
+    def bucket(self, ds) -> np.ndarray:
+        """Seasonal bucket index for each timestamp"""
+        ds = pd.DatetimeIndex(ds)
+        if self.season == 'hour_of_week':
+            return np.asarray(ds.dayofweek * 24 + ds.hour)
+        return np.asarray(ds.dayofweek)
+    
+    def _quantiles(self, z: np.ndarray) -> Tuple[float, float]:
+        """Lower/upper quantiles of standardized residuals for the configured method"""
+        alpha = 1 - self.interval_width
+        if self.method == 'conformal':
+            n = len(z)
+            level = min(1.0, np.ceil((n + 1) * (1 - alpha)) / n)
+            q = float(np.quantile(np.abs(z), level, method='higher'))
+            return -q, q
+        return float(np.quantile(z, alpha / 2)), float(np.quantile(z, 1 - alpha / 2))
+    
+    def fit(self, ds, residuals: np.ndarray) -> 'ResidualIntervals':
+        """
+        Calibrate offsets per seasonal bucket
+        
+        A bucket holds only one residual per week, too few for tail quantiles on its own, so
+        residuals are divided by their bucket's mean absolute residual, the quantiles are taken
+        over the pooled standardized residuals, and scaled back per bucket.
+        
+        Args:
+            ds: Timestamps of the residuals
+            residuals: Actual minus fitted values
+            
+        Returns:
+            self
+        """
+        residuals = np.asarray(residuals, dtype=float)
+        buckets = self.bucket(ds)
+        
+        global_scale = float(np.mean(np.abs(residuals))) or 1.0
+        counts = np.bincount(buckets, minlength=self.n_buckets)
+        sums = np.bincount(buckets, weights=np.abs(residuals), minlength=self.n_buckets)
+        
+        # Shrink sparse buckets toward the global scale (min_bucket_samples pseudo-observations),
+        # which also keeps buckets fitted almost perfectly (closed hours) from going zero-width
+        k = self.min_bucket_samples
+        scale = (sums + k * global_scale) / (counts + k)
+        self.fallback_buckets = int((counts < k).sum())
+        
+        q_lower, q_upper = self._quantiles(residuals / scale[buckets])
+        self.lower = q_lower * scale
+        self.upper = q_upper * scale
+        return self
+    
+    def apply(self, ds, yhat: np.ndarray, scale: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Attach intervals to point forecasts
+        
+        Args:
+            ds: Forecast timestamps
+            yhat: Point forecasts
+            scale: Optional per-step multiplier for the offsets (horizon growth)
+            
+        Returns:
+            (lower, upper) arrays
+        """
+        buckets = self.bucket(ds)
+        lower, upper = self.lower[buckets], self.upper[buckets]
+        if scale is not None:
+            lower, upper = lower * scale, upper * scale
+        yhat = np.asarray(yhat, dtype=float)
+        return yhat + lower, yhat + upper
+    
+    def evaluate(self, ds, y: np.ndarray, yhat: np.ndarray) -> Dict:
+        """Empirical coverage and mean width of the intervals on (y, yhat)"""
+        lower, upper = self.apply(ds, yhat)
+        y = np.asarray(y, dtype=float)
+        return {
+            'coverage': round(float(np.mean((y >= lower) & (y <= upper))), 4),
+            'mean_width': round(float(np.mean(upper - lower)), 4),
+        }
+    
+    @classmethod
+    def calibrate(cls, ds, y: np.ndarray, yhat: np.ndarray, holdout_fraction: float = 0.2,
+                  **kwargs) -> Tuple['ResidualIntervals', Dict]:
+        """
+        Calibrate on all residuals and measure quality on a time-ordered holdout
+        
+        Quality is estimated by calibrating on the earlier residuals and checking coverage on
+        the most recent holdout_fraction, so it reflects how well the offsets carry forward
+        in time rather than the (nominal by construction) in-sample coverage.
+        
+        Args:
+            ds: Timestamps (sorted)
+            y: Actual values
+            yhat: Fitted values
+            holdout_fraction: Share of the most recent residuals held out for quality
+            **kwargs: Passed to __init__
+            
+        Returns:
+            (intervals fitted on all residuals, quality report)
+        """
+        ds = pd.DatetimeIndex(ds)
+        y, yhat = np.asarray(y, dtype=float), np.asarray(yhat, dtype=float)
+        residuals = y - yhat
+        
+        quality = {}
+        split = int(len(residuals) * (1 - holdout_fraction))
+        if 0 < split < len(residuals):
+            probe = cls(**kwargs).fit(ds[:split], residuals[:split])
+            quality = probe.evaluate(ds[split:], y[split:], yhat[split:])
+            quality['holdout_samples'] = len(residuals) - split
+        
+        intervals = cls(**kwargs).fit(ds, residuals)
+        quality.update({
+            'method': intervals.method,
+            'season': intervals.season,
+            'nominal_coverage': intervals.interval_width,
+            'in_sample_coverage': intervals.evaluate(ds, y, yhat)['coverage'],
+            'fallback_buckets': intervals.fallback_buckets,
+        })
+        return intervals, quality
+    
+    def to_dict(self) -> Dict:
+        return {
+            'interval_width': self.interval_width,
+            'method': self.method,
+            'season': self.season,
+            'min_bucket_samples': self.min_bucket_samples,
+            'lower': self.lower.tolist(),
+            'upper': self.upper.tolist(),
+            'fallback_buckets': self.fallback_buckets,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ResidualIntervals':
+        intervals = cls(data['interval_width'], data['method'], data['season'], data['min_bucket_samples'])
+        intervals.lower = np.asarray(data['lower'], dtype=float)
+        intervals.upper = np.asarray(data['upper'], dtype=float)
+        intervals.fallback_buckets = data.get('fallback_buckets', 0)
+        return intervals
+
 
 class BasePredictor(ABC):
     """Abstract base class for time series predictors"""
     
+    model_type = 'unknown'
+    
+    # Compact artifact kind; None saves and loads the model with joblib only. Subclasses that
+    # set it implement _model_to_artifact / _model_from_artifact
+    artifact_kind: Optional[str] = None
+    artifact_packages: Tuple[str, ...] = ('numpy', 'pandas')
+    
+    # Whether the model can be evaluated at arbitrary timestamps (predict_at_datetimes);
+    # subclasses that set it implement _evaluate
+    supports_arbitrary_timestamps: bool = False
+    
+    def __init_subclass__(cls, **kwargs):
+        """Check that declared capabilities are implemented, at import rather than at save time"""
+        super().__init_subclass__(**kwargs)
+        required = []
+        if cls.artifact_kind:
+            required += ['_model_to_artifact', '_model_from_artifact']
+        if cls.supports_arbitrary_timestamps:
+            required.append('_evaluate')
+        missing = [name for name in required if getattr(cls, name) is getattr(BasePredictor, name)]
+        if missing:
+            raise TypeError(f"{cls.__name__} declares a capability without implementing {', '.join(missing)}")
+    
     def __init__(self, model_path: str):
         """
         Initialize predictor
@@ -34,43 +245,313 @@ class BasePredictor(ABC):
         self.model_path = model_path
         self.is_trained = False
         self.training_metadata: Dict = {}
+        self.intervals: Optional[ResidualIntervals] = None
+        self.model_version: Optional[str] = None
+        self._registry: Optional[ModelRegistry] = None
+        self._pointer_token = None
+        self._swap_lock = threading.Lock()
+        
+        # Derived results materialized whenever the model is saved (see _build_views)
+        self.views: Dict[str, Any] = {}
+        self.view_builders: Dict[str, Callable[['BasePredictor'], Any]] = {}
         
         # Try to load existing model
         self._load_model()
     
+    @property
+    def artifact_path(self) -> str:
+        """Directory of the compact artifact for this model"""
+        return artifact_dir(self.model_path)
+    
+    @property
+    def artifact_format(self) -> str:
+        """'compact' (artifact directory) or 'pickle' (legacy joblib file)"""
+        return getattr(self, 'config', {}).get('artifact_format', 'pickle')
+    
+    @property
+    def registry(self) -> Optional[ModelRegistry]:
+        """
+        Versioned registry for this model (None when disabled in the 'registry' config)
+        
+        Versions live under <model dir>/registry/<model file name>/, next to the legacy files.
+        """
+        registry_config = getattr(self, 'config', {}).get('registry') or {}
+        if not registry_config.get('enabled'):
+            return None
+        if self._registry is None:
+            root = os.path.join(os.path.dirname(self.model_path) or '.', 'registry')
+            name = os.path.splitext(os.path.basename(self.model_path))[0]
+            self._registry = ModelRegistry(root, name, keep_versions=registry_config.get('keep_versions', 10))
+        return self._registry
+    
     def _load_model(self) -> bool:
-        """Load model from disk"""
-        if os.path.exists(self.model_path):
+        """Load model from disk (registry version first, then compact artifact, then legacy pickle)"""
+        registry = self.registry
+        if registry is not None:
+            token = registry.pointer_token()
+            version = registry.current_version()
+            if version is not None:
+                try:
+                    self._install(*self._read_model(registry.version_path(version)), version)
+                    self._pointer_token = token
+                    logger.info(f"Loaded {registry.name} version {version}")
+                    return True
+                except Exception as e:
+                    logger.error(f"Error loading {registry.name} version {version}, trying legacy files: {e}")
+        
+        for path in (self.artifact_path, self.model_path):
+            if not os.path.exists(path) or (path == self.artifact_path and not is_artifact(path)):
+                continue
             try:
-                saved_data = joblib.load(self.model_path)
-                self.model = saved_data.get('model')
-                self.training_metadata = saved_data.get('metadata', {})
-                self.is_trained = True
-                logger.info(f"Loaded model from {self.model_path}")
+                self._install(*self._read_model(path), None)
+                logger.info(f"Loaded model from {path}")
                 return True
             except Exception as e:
-                logger.error(f"Error loading model: {e}")
-                return False
+                logger.error(f"Error loading model from {path}: {e}")
+        return False
+    
+    def _read_model(self, path: str) -> Tuple[Any, Dict, Dict]:
+        """
+        Read a saved model without touching the predictor
+        
+        Args:
+            path: Artifact directory, legacy .pkl file, or registry version directory
+            
+        Returns:
+            (model, training metadata, state)
+        """
+        if os.path.isdir(path) and not is_artifact(path):
+            # Registry version: holds either a 'model' artifact directory or model.pkl
+            artifact = os.path.join(path, 'model')
+            path = artifact if is_artifact(artifact) else os.path.join(path, 'model.pkl')
+        
+        if is_artifact(path):
+            if not self.artifact_kind:
+                raise ValueError(f"{type(self).__name__} cannot load compact artifacts")
+            header, arrays, blobs = read_artifact(path)
+            if header.get('kind') != self.artifact_kind:
+                raise ValueError(f"Artifact kind '{header.get('kind')}' does not match '{self.artifact_kind}'")
+            meta = header.get('meta', {})
+            model = self._model_from_artifact(meta, arrays, blobs)
+            return model, meta.get('training_metadata', {}), meta.get('state') or {}
+        
+        saved_data = joblib.load(path)
+        return saved_data.get('model'), saved_data.get('metadata', {}), saved_data.get('state') or {}
+    
+    def _install(self, model: Any, metadata: Dict, state: Dict, version: Optional[str]):
+        """Swap a loaded model in (all attributes assigned together under the swap lock)"""
+        with self._swap_lock:
+            self.model = model
+            self.training_metadata = metadata
+            self._set_state(state)
+            self.model_version = version
+            self.is_trained = model is not None
+    
+    def _install_trained(self, model: Any, metadata: Dict, **state):
+        """
+        Swap a freshly trained model in together with its metadata and state (see _install)
+        
+        Args:
+            model: Fitted model
+            metadata: Its training metadata
+            **state: _get_state entries that changed with it (e.g. intervals)
+        """
+        if isinstance(state.get('intervals'), ResidualIntervals):
+            state['intervals'] = state['intervals'].to_dict()
+        self._install(model, metadata, {**self._get_state(), **state}, None)
+    
+    def refresh(self) -> bool:
+        """
+        Swap in the registry's current version if it changed since the last check
+        
+        Cheap when nothing changed (one stat of the pointer file), so it can be polled.
+        
+        Returns:
+            True if a different version was loaded
+        """
+        registry = self.registry
+        if registry is None:
+            return False
+        
+        token = registry.pointer_token()
+        if token is None or token == self._pointer_token:
+            return False
+        
+        version = registry.current_version()
+        if version is not None and version != self.model_version:
+            model, metadata, state = self._read_model(registry.version_path(version))
+            previous = self.model_version
+            self._install(model, metadata, state, version)
+            logger.info(f"Swapped {registry.name} from version {previous} to {version}")
+            self._pointer_token = token
+            return True
+        
+        self._pointer_token = token
         return False
     
+    @property
+    def version_token(self) -> str:
+        """
+        Identifies the fitted model: the registry version, or the training/update time when
+        the registry is disabled
+        """
+        if self.model_version is not None:
+            return self.model_version
+        metadata = self.training_metadata
+        return f"{metadata.get('trained_at')}#{metadata.get('updated_at') or metadata.get('n_updates', 0)}"
+    
+    def footprint_bytes(self) -> int:
+        """
+        Approximate size of the loaded model, measured as the size of the files it was
+        loaded from (registry version, compact artifact or pickle; 0 when untrained)
+        """
+        registry = self.registry
+        if registry is not None and self.model_version is not None:
+            path = registry.version_path(self.model_version)
+        elif is_artifact(self.artifact_path):
+            path = self.artifact_path
+        else:
+            path = self.model_path
+        
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        total = 0
+        for root, _, files in os.walk(path):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+    
+    def list_versions(self) -> List[Dict]:
+        """Registry versions of this model, newest first"""
+        registry = self.registry
+        return registry.list_versions() if registry is not None else []
+    
+    def activate_version(self, version: str = None) -> Dict:
+        """
+        Make a registry version current and load it (rollback when version is omitted)
+        
+        Args:
+            version: Version id; None activates the version before the current one
+            
+        Returns:
+            Result dictionary
+        """
+        registry = self.registry
+        if registry is None:
+            return {'success': False, 'error': 'Model registry is disabled'}
+        
+        version = version or registry.previous_version()
+        if version is None:
+            return {'success': False, 'error': 'No earlier version to roll back to'}
+        
+        previous = self.model_version
+        try:
+            registry.activate(version)
+        except KeyError as e:
+            return {'success': False, 'error': str(e.args[0])}
+        
+        try:
+            self.refresh()
+        except Exception as e:
+            # Do not leave other workers pointed at a version that cannot be loaded
+            if previous is not None:
+                registry.activate(previous)
+            return {'success': False, 'error': f"Could not load version {version}: {e}"}
+        return {'success': self.model_version == version, 'previous_version': previous, 'version': version}
+    
     def _save_model(self) -> bool:
-        """Save model to disk"""
+        """Save model to disk (publishes a new registry version when the registry is enabled)"""
         if self.model is None:
             return False
         
+        self._build_views()
+        
         try:
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            save_data = {
-                'model': self.model,
-                'metadata': self.training_metadata
-            }
-            joblib.dump(save_data, self.model_path)
-            logger.info(f"Saved model to {self.model_path}")
+            registry = self.registry
+            if registry is not None:
+                version = registry.publish(
+                    lambda path: self._write_model(os.path.join(path, 'model'), os.path.join(path, 'model.pkl')),
+                    {
+                        'model_type': self.model_type,
+                        'format': self._write_format,
+                        'training_metadata': self.training_metadata,
+                    }
+                )
+                self.model_version = version
+                self._pointer_token = registry.pointer_token()
+                return True
+            
+            self._write_model(self.artifact_path, self.model_path)
             return True
         except Exception as e:
             logger.error(f"Error saving model: {e}")
             return False
     
+    def _build_views(self):
+        """
+        Materialize the registered views of the fitted model
+        
+        A view is a JSON-serializable result derived from the model alone (e.g. a weekly
+        heatmap), built by view_builders[name](predictor). Views are persisted with the
+        model state, so each saved version carries the views computed from it.
+        """
+        views = {}
+        for name, build in self.view_builders.items():
+            try:
+                views[name] = build(self)
+            except Exception as e:
+                logger.error(f"Error building {name} view: {e}")
+        self.views = views
+    
+    @property
+    def _write_format(self) -> str:
+        return 'compact' if self.artifact_kind and self.artifact_format == 'compact' else 'pickle'
+    
+    def _write_model(self, artifact_path: str, pickle_path: str):
+        """Write the model as a compact artifact or a joblib file, per artifact_format"""
+        if self._write_format == 'compact':
+            meta, arrays, blobs = self._model_to_artifact()
+            meta['training_metadata'] = self.training_metadata
+            meta['state'] = self._get_state()
+            write_artifact(artifact_path, self.artifact_kind, meta, arrays, blobs,
+                           packages=self.artifact_packages)
+            logger.info(f"Saved model artifact to {artifact_path}")
+            return
+        
+        os.makedirs(os.path.dirname(pickle_path) or '.', exist_ok=True)
+        save_data = {
+            'model': self.model,
+            'metadata': self.training_metadata,
+            'state': self._get_state()
+        }
+        joblib.dump(save_data, pickle_path)
+        logger.info(f"Saved model to {pickle_path}")
+    
+    def _model_to_artifact(self) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+        """Split the fitted model into (JSON meta, arrays, text blobs); only called when artifact_kind is set"""
+        raise TypeError(f"{type(self).__name__} does not write compact artifacts")
+    
+    def _model_from_artifact(self, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict[str, str]) -> Any:
+        """Rebuild the fitted model from an artifact; only called when artifact_kind is set"""
+        raise TypeError(f"{type(self).__name__} does not read compact artifacts")
+    
+    def _get_state(self) -> Dict:
+        """Extra predictor state persisted next to the model (extend in subclasses)"""
+        return {
+            'intervals': self.intervals.to_dict() if self.intervals is not None else None,
+            'views': self.views
+        }
+    
+    def _set_state(self, state: Dict):
+        """Restore state written by _get_state"""
+        intervals = state.get('intervals')
+        self.intervals = ResidualIntervals.from_dict(intervals) if intervals else None
+        self.views = state.get('views') or {}
+    
+    @property
+    def interval_mode(self) -> str:
+        """Configured interval mode (see INTERVAL_MODES)"""
+        return getattr(self, 'config', {}).get('interval_mode', 'sampling')
+    
     @abstractmethod
     def train(self, data: pd.DataFrame) -> Dict:
         """Train the model with historical data"""
@@ -81,11 +562,79 @@ class BasePredictor(ABC):
         """Generate predictions for future periods"""
         pass
     
+    def _evaluate(self, ds: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Forecast frame (ds, yhat, yhat_lower, yhat_upper) for sorted, unique timestamps;
+        only called when supports_arbitrary_timestamps is set
+        """
+        raise TypeError(f"{type(self).__name__} does not support arbitrary timestamps")
+    
+    def predict_at_datetimes(self, targets) -> Dict:
+        """
+        Predictions for many arbitrary timestamps in one vectorized pass
+        
+        Targets may be in any order, with gaps and duplicates; they are de-duplicated and
+        sorted for a single model evaluation and the results are scattered back to the
+        input order. Timezone-aware targets are converted to naive UTC, like the stored
+        timestamps the models are trained on.
+        
+        Args:
+            targets: Datetimes or ISO strings
+            
+        Returns:
+            Columnar result: {'success', 'count', 'ds', 'yhat', 'yhat_lower', 'yhat_upper'}
+        """
+        if not self.supports_arbitrary_timestamps:
+            return {'success': False, 'error': f"{self.model_type} models cannot forecast arbitrary timestamps"}
+        if not self.is_trained or self.model is None:
+            return {'success': False, 'error': 'Model not trained'}
+        
+        try:
+            ds = pd.DatetimeIndex(pd.to_datetime(list(targets)))
+            if ds.tz is not None:
+                ds = ds.tz_convert(None)
+            if len(ds) == 0:
+                return {'success': True, 'count': 0, 'ds': [], 'yhat': [], 'yhat_lower': [], 'yhat_upper': []}
+            
+            unique, inverse = np.unique(ds.values, return_inverse=True)
+            forecast = self._evaluate(pd.DatetimeIndex(unique))
+            
+            result = {'success': True, 'count': len(ds), 'ds': [t.isoformat() for t in ds]}
+            for column in ('yhat', 'yhat_lower', 'yhat_upper'):
+                result[column] = forecast[column].to_numpy(dtype=float)[inverse].tolist()
+            return result
+            
+        except Exception as e:
+            logger.error(f"Batch prediction error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def predict_at_datetime(self, target_datetime: datetime) -> Dict:
+        """
+        Get prediction for specific datetime
+        
+        Args:
+            target_datetime: Target datetime
+            
+        Returns:
+            Prediction dictionary
+        """
+        result = self.predict_at_datetimes([target_datetime])
+        if not result['success']:
+            return {'error': result['error']}
+        
+        return {
+            'datetime': target_datetime.isoformat(),
+            'predicted_value': result['yhat'][0],
+            'lower_bound': result['yhat_lower'][0],
+            'upper_bound': result['yhat_upper'][0]
+        }
+    
     def get_model_info(self) -> Dict:
         """Get model information"""
         return {
             'is_trained': self.is_trained,
             'model_path': self.model_path,
+            'model_version': self.model_version,
             'training_metadata': self.training_metadata
         }
 
@@ -93,6 +642,11 @@ class BasePredictor(ABC):
 class ProphetPredictor(BasePredictor):
     """Prophet-based time series predictor"""
     
+    model_type = 'Prophet'
+    artifact_kind = 'prophet'
+    supports_arbitrary_timestamps = True
+    artifact_packages = ('prophet', 'numpy', 'pandas')
+    
     def __init__(self, model_path: str, config: Dict = None):
         """
         Initialize Prophet predictor
@@ -104,6 +658,15 @@ class ProphetPredictor(BasePredictor):
         self.config = config or {}
         super().__init__(model_path)
     
+    def _model_to_artifact(self) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+        # Prophet's own JSON format is stable across Python and pandas versions, unlike a pickle
+        from prophet.serialize import model_to_json
+        return {}, {}, {'model.json': model_to_json(self.model)}
+    
+    def _model_from_artifact(self, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict[str, str]) -> Any:
+        from prophet.serialize import model_from_json
+        return model_from_json(blobs['model.json'])
+    
     def train(self, data: pd.DataFrame) -> Dict:
         """
         Train Prophet model
@@ -131,30 +694,53 @@ class ProphetPredictor(BasePredictor):
         try:
             logger.info(f"Training Prophet model with {len(data)} samples")
             
-            # Create and configure Prophet model
-            self.model = Prophet(
-                yearly_seasonality=self.config.get('yearly_seasonality', True),
-                weekly_seasonality=self.config.get('weekly_seasonality', True),
-                daily_seasonality=self.config.get('daily_seasonality', True),
-                changepoint_prior_scale=self.config.get('changepoint_prior_scale', 0.05),
-                seasonality_prior_scale=self.config.get('seasonality_prior_scale', 10),
-                interval_width=self.config.get('interval_width', 0.95)
-            )
+            # Residual interval modes never need Prophet's uncertainty simulation
+            fast_intervals = self.interval_mode != 'sampling'
+            
+            def build_model():
+                # Create and configure Prophet model (fitted before it replaces the served model)
+                return Prophet(
+                    yearly_seasonality=self.config.get('yearly_seasonality', True),
+                    weekly_seasonality=self.config.get('weekly_seasonality', True),
+                    daily_seasonality=self.config.get('daily_seasonality', True),
+                    changepoint_prior_scale=self.config.get('changepoint_prior_scale', 0.05),
+                    seasonality_prior_scale=self.config.get('seasonality_prior_scale', 10),
+                    interval_width=self.config.get('interval_width', 0.95),
+                    uncertainty_samples=0 if fast_intervals else self.config.get('uncertainty_samples', 1000)
+                )
             
-            # Fit model
-            self.model.fit(data)
+            # Fit model, starting from the previous fit's parameters when they are compatible
+            model, fit_stats = self._fit(build_model, data)
             
-            self.is_trained = True
-            self.training_metadata = {
+            metadata = {
                 'trained_at': datetime.now().isoformat(),
                 'n_samples': len(data),
                 'date_range': {
                     'start': data['ds'].min().isoformat(),
                     'end': data['ds'].max().isoformat()
                 },
-                'model_type': 'Prophet'
+                'model_type': 'Prophet',
+                'interval_mode': self.interval_mode,
+                'seasonality_config': self._seasonality_config(),
+                'fit': fit_stats
             }
             
+            # Calibrate residual intervals from the in-sample fit
+            intervals = None
+            if fast_intervals:
+                fitted = model.predict(data[['ds']])
+                intervals, quality = ResidualIntervals.calibrate(
+                    data['ds'], data['y'].values, fitted['yhat'].values,
+                    holdout_fraction=self.config.get('interval_holdout_fraction', 0.2),
+                    interval_width=self.config.get('interval_width', 0.95),
+                    method=self.interval_mode,
+                    season=ResidualIntervals.season_for(data['ds'])
+                )
+                metadata['interval_quality'] = quality
+            
+            # Model, metadata and intervals replace the served ones together
+            self._install_trained(model, metadata, intervals=intervals)
+            
             # Save model
             self._save_model()
             
@@ -168,13 +754,137 @@ class ProphetPredictor(BasePredictor):
             logger.error(f"Prophet training error: {e}")
             return {'success': False, 'error': str(e)}
     
-    def predict(self, periods: int, freq: str = 'H') -> pd.DataFrame:
+    def _seasonality_config(self) -> Dict:
+        """Settings that determine the shape of Prophet's parameter vector"""
+        return {
+            'yearly_seasonality': self.config.get('yearly_seasonality', True),
+            'weekly_seasonality': self.config.get('weekly_seasonality', True),
+            'daily_seasonality': self.config.get('daily_seasonality', True),
+        }
+    
+    def _warm_start_params(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Initial values for Stan taken from the current model
+        
+        Returns:
+            (init dict, None) or (None, reason the fit has to start cold)
+        """
+        if not self.config.get('warm_start', True):
+            return None, 'disabled'
+        if not self.is_trained or self.model is None or not getattr(self.model, 'params', None):
+            return None, 'no_previous_model'
+        if self.training_metadata.get('seasonality_config') != self._seasonality_config():
+            return None, 'seasonality_changed'
+        
+        params = self.model.params
+        init = {}
+        for name in ('k', 'm', 'sigma_obs'):
+            init[name] = float(params[name][0][0])
+        for name in ('delta', 'beta'):
+            init[name] = np.asarray(params[name][0], dtype=float)
+        
+        if not all(np.all(np.isfinite(value)) for value in init.values()):
+            return None, 'non_finite_params'
+        if len(init['delta']) != self.model.n_changepoints:
+            return None, 'changepoints_changed'
+        return init, None
+    
+    def _fit(self, build_model, data: pd.DataFrame) -> Tuple[Any, Dict]:
+        """
+        Fit a new Prophet model, warm-started from the current one where possible
+        
+        A warm fit that raises or does not converge (Prophet already retries a failed LBFGS
+        with Newton; see _converged) is discarded and the model is refit from Prophet's default initialization.
+        
+        Args:
+            build_model: Returns a new, unfitted Prophet instance
+            data: Training frame
+            
+        Returns:
+            (fitted model, fit statistics for training_metadata)
+        """
+        init, reason = self._warm_start_params()
+        
+        if init is not None:
+            start = time.perf_counter()
+            try:
+                model = build_model()
+                model.fit(data, init=init)
+                if not self._converged(model):
+                    raise RuntimeError('optimizer did not converge')
+                return model, {
+                    'warm_start': True,
+                    'fit_ms': round((time.perf_counter() - start) * 1000, 1),
+                    'iterations': self._iterations(model),
+                }
+            except Exception as e:
+                logger.warning(f"Warm-started Prophet fit failed ({e}), refitting from scratch")
+                reason = f'warm_start_failed: {e}'
+        
+        start = time.perf_counter()
+        model = build_model()
+        model.fit(data)
+        return model, {
+            'warm_start': False,
+            'cold_start_reason': reason,
+            'fit_ms': round((time.perf_counter() - start) * 1000, 1),
+            'iterations': self._iterations(model),
+        }
+    
+    @staticmethod
+    def _converged(model: Any) -> bool:
+        """
+        Whether the parameters are finite and the optimizer reported convergence
+        
+        CmdStanMLE.converged only reflects CmdStan's return code, which is 0 when L-BFGS stops
+        at its iteration limit, so the termination is read from the console output instead:
+        L-BFGS reports 'Convergence detected', and Newton (Prophet's choice below 100 rows)
+        stops by itself once an iteration improves the log density by at most 1e-8. Output
+        that cannot be read counts as not converged.
+        """
+        params = model.params
+        if not all(np.all(np.isfinite(params[name])) for name in ('k', 'm', 'delta', 'beta', 'sigma_obs')):
+            return False
+        
+        output = ProphetPredictor._console_output(model)
+        if output is None:
+            return False
+        if 'Optimization terminated' in output:
+            return 'Convergence detected' in output.rsplit('Optimization terminated', 1)[1]
+        improvements = re.findall(r'Improved by (-?\d[\d.eE+-]*\d)', output)
+        return bool(improvements) and float(improvements[-1]) <= 1e-8
+    
+    @staticmethod
+    def _iterations(model: Any) -> Optional[int]:
+        """Optimizer iterations, read from CmdStan's console output (None if unavailable)"""
+        output = ProphetPredictor._console_output(model)
+        if output is None:
+            return None
+        # L-BFGS table rows ('  175  4089.6 ...') or Newton lines ('Iteration 78. ...')
+        rows = re.findall(r'^\s*(\d+)\s+-?[\d.]|^Iteration\s+(\d+)\.', output, flags=re.MULTILINE)
+        return int(rows[-1][0] or rows[-1][1]) if rows else None
+    
+    @staticmethod
+    def _console_output(model: Any) -> Optional[str]:
+        """CmdStan's console output of the fit (None if unavailable)"""
+        try:
+            with open(model.stan_backend.stan_fit.runset.stdout_files[0]) as f:
+                return f.read()
+        except Exception:
+            return None
+    
+    def predict(self, periods: int, freq: str = 'H', origin: str = None) -> pd.DataFrame:
         """
         Generate predictions
         
+        Only the requested future timestamps are evaluated, so latency scales with the
+        horizon rather than with the length of the training history.
+        
         Args:
             periods: Number of periods to predict
             freq: Frequency ('H' for hourly, 'D' for daily)
+            origin: 'train_end' to start right after the last training timestamp, or 'now'
+                    to start at the current period (default: config 'forecast_origin')
             
         Returns:
             DataFrame with predictions
@@ -184,14 +894,11 @@ class ProphetPredictor(BasePredictor):
             return pd.DataFrame()
         
         try:
-            # Create future dataframe
-            future = self.model.make_future_dataframe(periods=periods, freq=freq)
+            # Create future dataframe (future timestamps only)
+            future = self._future_dataframe(periods, freq, origin)
             
             # Generate predictions
-            forecast = self.model.predict(future)
-            
-            # Get only future predictions
-            forecast = forecast.tail(periods)
+            forecast = self._predict_frame(future)
             
             return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
             
@@ -199,36 +906,57 @@ class ProphetPredictor(BasePredictor):
             logger.error(f"Prophet prediction error: {e}")
             return pd.DataFrame()
     
-    def predict_at_datetime(self, target_datetime: datetime) -> Dict:
+    def _predict_frame(self, future: pd.DataFrame) -> pd.DataFrame:
         """
-        Get prediction for specific datetime
+        Run Prophet on the given timestamps and attach intervals for the configured mode
+        
+        Residual intervals are used when the mode asks for them and the model was calibrated;
+        otherwise Prophet simulates them (also the path for models trained in sampling mode).
+        """
+        use_residuals = self.interval_mode != 'sampling' and self.intervals is not None
+        self.model.uncertainty_samples = 0 if use_residuals else self.config.get('uncertainty_samples', 1000)
+        
+        forecast = self.model.predict(future)
+        
+        if use_residuals:
+            forecast['yhat_lower'], forecast['yhat_upper'] = self.intervals.apply(
+                forecast['ds'], forecast['yhat'].values
+            )
+        return forecast
+    
+    def _future_dataframe(self, periods: int, freq: str, origin: str = None) -> pd.DataFrame:
+        """
+        Build the timestamps to forecast
         
         Args:
-            target_datetime: Target datetime
+            periods: Number of periods
+            freq: Pandas frequency string
+            origin: 'train_end' or 'now'
             
         Returns:
-            Prediction dictionary
+            DataFrame with a single 'ds' column of length periods
         """
-        if not self.is_trained:
-            return {'error': 'Model not trained'}
+        origin = origin or self.config.get('forecast_origin', 'train_end')
         
-        try:
-            future = pd.DataFrame({'ds': [target_datetime]})
-            forecast = self.model.predict(future)
-            
-            return {
-                'datetime': target_datetime.isoformat(),
-                'predicted_value': float(forecast['yhat'].iloc[0]),
-                'lower_bound': float(forecast['yhat_lower'].iloc[0]),
-                'upper_bound': float(forecast['yhat_upper'].iloc[0])
-            }
-        except Exception as e:
-            return {'error': str(e)}
+        if origin == 'now':
+            start = pd.Timestamp.now().floor(freq)
+            return pd.DataFrame({'ds': pd.date_range(start=start, periods=periods, freq=freq)})
+        
+        return self.model.make_future_dataframe(periods=periods, freq=freq, include_history=False)
+    
+    def _evaluate(self, ds: pd.DatetimeIndex) -> pd.DataFrame:
+        # Prophet's components are closed-form in ds, so one predict covers any set of timestamps
+        forecast = self._predict_frame(pd.DataFrame({'ds': ds}))
+        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
 
 
 class ARIMAPredictor(BasePredictor):
     """ARIMA/SARIMA-based time series predictor"""
     
+    model_type = 'SARIMA'
+    artifact_kind = 'sarimax'
+    artifact_packages = ('statsmodels', 'numpy', 'pandas')
+    
     def __init__(self, model_path: str, config: Dict = None):
         """
         Initialize ARIMA predictor
@@ -239,8 +967,19 @@ class ARIMAPredictor(BasePredictor):
         """
         self.config = config or {}
         self.last_values: Optional[pd.Series] = None
+        self.horizon_scale: Optional[np.ndarray] = None
         super().__init__(model_path)
     
+    def _get_state(self) -> Dict:
+        state = super()._get_state()
+        state['horizon_scale'] = self.horizon_scale.tolist() if self.horizon_scale is not None else None
+        return state
+    
+    def _set_state(self, state: Dict):
+        super()._set_state(state)
+        scale = state.get('horizon_scale')
+        self.horizon_scale = np.asarray(scale, dtype=float) if scale else None
+    
     def train(self, data: pd.DataFrame) -> Dict:
         """
         Train ARIMA/SARIMA model
@@ -271,15 +1010,22 @@ class ARIMAPredictor(BasePredictor):
             else:
                 series = data.iloc[:, 0]
             
-            # Store last values for prediction reference
-            self.last_values = series.tail(10)
-            
             # Get ARIMA parameters
-            order = self.config.get('order', (1, 1, 1))
-            seasonal_order = self.config.get('seasonal_order', (1, 1, 1, 7))
+            order = tuple(self.config.get('order', (1, 1, 1)))
+            seasonal_order = tuple(self.config.get('seasonal_order', (1, 1, 1, 7)))
+            
+            search = None
+            if self.config.get('order_selection') == 'auto':
+                from order_search import search_orders
+                search = search_orders(series.values, self.config.get('order_search', {}))
+                if search['best'] is not None:
+                    order = tuple(search['best']['order'])
+                    seasonal_order = tuple(search['best']['seasonal_order'])
+                else:
+                    logger.warning("Order search found no usable candidate, using configured orders")
             
-            # Fit SARIMAX model
-            self.model = SARIMAX(
+            # Fit SARIMAX model (fitted before it replaces the served model)
+            model = SARIMAX(
                 series,
                 order=order,
                 seasonal_order=seasonal_order,
@@ -287,18 +1033,45 @@ class ARIMAPredictor(BasePredictor):
                 enforce_invertibility=False
             )
             
-            self.model = self.model.fit(disp=False)
+            if search is not None and search['best'] is not None:
+                # The search already estimated the winner; a filter pass rebuilds its results
+                fitted_model = model.filter(np.asarray(search['best']['params']))
+            else:
+                fitted_model = model.fit(disp=False)
             
-            self.is_trained = True
-            self.training_metadata = {
+            metadata = {
                 'trained_at': datetime.now().isoformat(),
                 'n_samples': len(data),
                 'order': order,
                 'seasonal_order': seasonal_order,
                 'model_type': 'SARIMA',
-                'aic': float(self.model.aic),
-                'bic': float(self.model.bic)
+                'aic': float(fitted_model.aic),
+                'bic': float(fitted_model.bic),
+                'interval_mode': self.interval_mode,
+                'residual_rmse': self._residual_rmse(fitted_model.resid, order, seasonal_order),
+                'n_updates': 0
             }
+            if search is not None:
+                metadata['order_search'] = {
+                    k: search[k] for k in ('criterion', 'n_candidates', 'statuses', 'workers',
+                                           'duration_ms', 'cached', 'ranking')
+                }
+            dates = self._dates_of(data)
+            if dates is not None:
+                metadata['last_observation'] = dates[-1].isoformat()
+            
+            intervals, horizon_scale = None, None
+            if self.interval_mode != 'sampling':
+                intervals, horizon_scale, quality = self._calibrate_intervals(
+                    fitted_model, data, series, order, seasonal_order)
+                if intervals is not None:
+                    metadata['interval_quality'] = quality
+            
+            # Model, metadata and intervals replace the served ones together
+            self._install_trained(fitted_model, metadata, intervals=intervals,
+                                  horizon_scale=horizon_scale.tolist() if horizon_scale is not None else None)
+            # Store last values for prediction reference
+            self.last_values = series.tail(10)
             
             # Save model
             self._save_model()
@@ -306,7 +1079,7 @@ class ARIMAPredictor(BasePredictor):
             return {
                 'success': True,
                 'n_samples': len(data),
-                'aic': float(self.model.aic),
+                'aic': float(fitted_model.aic),
                 'metadata': self.training_metadata
             }
             
@@ -314,38 +1087,229 @@ class ARIMAPredictor(BasePredictor):
             logger.error(f"ARIMA training error: {e}")
             return {'success': False, 'error': str(e)}
     
-    def predict(self, periods: int, start_date: datetime = None) -> pd.DataFrame:
+    def _calibrate_intervals(self, model: Any, data: pd.DataFrame, series: pd.Series, order: Tuple,
+                             seasonal_order: Tuple) -> Tuple[Optional[ResidualIntervals], Optional[np.ndarray], Optional[Dict]]:
         """
-        Generate predictions
+        Calibrate residual intervals from one-step-ahead training residuals
+        
+        One-step residuals understate multi-step uncertainty, so the offsets are widened by
+        the model's own forecast-variance growth (sqrt(var_h / var_1)), computed once here.
         
-        Args:
-            periods: Number of periods to predict
-            start_date: Start date for predictions
-            
         Returns:
-            DataFrame with predictions
+            (intervals, horizon scale, interval quality), all None without timestamps
         """
-        if not self.is_trained or self.model is None:
-            logger.error("Model not trained")
-            return pd.DataFrame()
+        dates = self._dates_of(data)
+        if dates is None:
+            logger.warning("No timestamps in ARIMA training data; keeping analytic intervals")
+            return None, None, None
         
-        try:
-            # Get forecast
-            forecast = self.model.get_forecast(steps=periods)
-            predictions = forecast.predicted_mean
-            conf_int = forecast.conf_int()
-            
-            # Create result dataframe
-            if start_date is None:
-                start_date = datetime.now()
-            
-            dates = pd.date_range(start=start_date, periods=periods, freq='D')
+        # The first d + D*s residuals are differencing start-up artefacts
+        burn = order[1] + seasonal_order[1] * seasonal_order[3]
+        fitted = np.asarray(model.fittedvalues)[burn:]
+        actual = np.asarray(series, dtype=float)[burn:]
+        
+        intervals, quality = ResidualIntervals.calibrate(
+            dates[burn:], actual, fitted,
+            holdout_fraction=self.config.get('interval_holdout_fraction', 0.2),
+            interval_width=self.config.get('interval_width', 0.95),
+            method=self.interval_mode,
+            season=ResidualIntervals.season_for(dates)
+        )
+        
+        variance = np.asarray(model.get_forecast(steps=self.config.get('interval_max_horizon', 60)).var_pred_mean)
+        return intervals, np.sqrt(variance / variance[0]), quality
+    
+    def _model_to_artifact(self) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+        """
+        Store the specification, estimated parameters and observations only
+        
+        The filter output, smoother output and covariance matrices that make a pickled
+        SARIMAXResults large are recomputed on load by one filter pass.
+        """
+        spec = self.model.model
+        meta = {
+            'order': list(spec.order),
+            'seasonal_order': list(spec.seasonal_order),
+            'enforce_stationarity': bool(spec.enforce_stationarity),
+            'enforce_invertibility': bool(spec.enforce_invertibility),
+            'param_names': list(self.model.param_names),
+        }
+        arrays = {
+            'params': np.asarray(self.model.params, dtype=float),
+            'endog': np.asarray(spec.endog, dtype=float).ravel(),
+        }
+        return meta, arrays, {}
+    
+    def _model_from_artifact(self, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict[str, str]) -> Any:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        spec = SARIMAX(
+            np.array(arrays['endog']),
+            order=tuple(meta['order']),
+            seasonal_order=tuple(meta['seasonal_order']),
+            enforce_stationarity=meta['enforce_stationarity'],
+            enforce_invertibility=meta['enforce_invertibility']
+        )
+        return spec.filter(np.array(arrays['params']))
+    
+    @staticmethod
+    def _dates_of(data: pd.DataFrame) -> Optional[pd.DatetimeIndex]:
+        """Observation dates from a 'ds' column or a DatetimeIndex"""
+        if 'ds' in data.columns:
+            return pd.DatetimeIndex(pd.to_datetime(data['ds']))
+        if isinstance(data.index, pd.DatetimeIndex):
+            return data.index
+        return None
+    
+    @staticmethod
+    def _residual_rmse(residuals, order: Tuple, seasonal_order: Tuple) -> float:
+        """RMSE of one-step residuals, skipping the d + D*s differencing start-up"""
+        burn = order[1] + seasonal_order[1] * seasonal_order[3]
+        residuals = np.asarray(residuals, dtype=float)[burn:]
+        return float(np.sqrt(np.mean(residuals ** 2))) if len(residuals) else 0.0
+    
+    def update(self, data: pd.DataFrame) -> Dict:
+        """
+        Append new observations to the fitted model without re-estimating parameters
+        
+        Rows dated after the last observation seen are run through the state-space filter
+        (results.append with refit=False), which costs milliseconds instead of a full MLE fit.
+        The result says whether a full refit is due: on schedule (refit_interval_days since
+        the last fit) or because the residuals of the appended days have degraded.
+        
+        Args:
+            data: DataFrame with 'ds' and 'y' (or 'value') columns; older rows are ignored
+            
+        Returns:
+            Update result with 'refit_required' and the diagnostics behind it
+        """
+        with self._swap_lock:
+            model, metadata = self.model, self.training_metadata
+        if not self.is_trained or model is None:
+            return {'success': False, 'error': 'Model not trained', 'refit_required': True}
+        
+        last_observation = metadata.get('last_observation')
+        dates = self._dates_of(data)
+        if last_observation is None or dates is None:
+            return {'success': False, 'error': 'Observation dates unavailable', 'refit_required': True}
+        
+        start = datetime.now()
+        column = 'value' if 'value' in data.columns else 'y'
+        
+        # Compare calendar days (daily rows may carry the time of day they were computed at)
+        days = dates.normalize()
+        new_rows = np.asarray(days > pd.Timestamp(last_observation).normalize())
+        new_values = np.asarray(data[column], dtype=float)[new_rows]
+        new_dates = dates[new_rows]
+        
+        appended = 0
+        if len(new_values):
+            try:
+                model = model.append(new_values, refit=False)
+            except Exception as e:
+                logger.error(f"ARIMA update error: {e}")
+                return {'success': False, 'error': str(e), 'refit_required': True}
+            
+            appended = len(new_values)
+            metadata = {
+                **metadata,
+                'last_observation': new_dates[-1].isoformat(),
+                'n_updates': metadata.get('n_updates', 0) + 1,
+                'updated_at': datetime.now().isoformat()
+            }
+            # The extended model and its metadata replace the served ones together
+            self._install_trained(model, metadata)
+            self._save_model()
+        
+        diagnostics = self._update_diagnostics(model, metadata)
+        reasons = []
+        trained_at = pd.Timestamp(metadata['trained_at'])
+        if (pd.Timestamp.now() - trained_at).days >= self.config.get('refit_interval_days', 7):
+            reasons.append('schedule')
+        if diagnostics.get('rmse_ratio', 0) > self.config.get('refit_rmse_ratio', 1.5):
+            reasons.append('residual_rmse')
+        if diagnostics.get('ljung_box_pvalue', 1) < self.config.get('refit_ljung_box_pvalue', 0.01):
+            reasons.append('residual_autocorrelation')
+        
+        return {
+            'success': True,
+            'appended': appended,
+            'refit_required': bool(reasons),
+            'refit_reasons': reasons,
+            'diagnostics': diagnostics,
+            'duration_ms': round((datetime.now() - start).total_seconds() * 1000, 1)
+        }
+    
+    def _update_diagnostics(self, model: Any, metadata: Dict) -> Dict:
+        """Residual checks of a fitted model over its most recent diagnostic_window observations"""
+        window = self.config.get('diagnostic_window', 28)
+        residuals = np.asarray(model.resid, dtype=float)[-window:]
+        baseline = metadata.get('residual_rmse')
+        
+        diagnostics = {'window': len(residuals)}
+        if not len(residuals):
+            return diagnostics
+        
+        rmse = float(np.sqrt(np.mean(residuals ** 2)))
+        diagnostics['recent_rmse'] = round(rmse, 4)
+        if baseline:
+            diagnostics['rmse_ratio'] = round(rmse / baseline, 3)
+        
+        seasonal_period = self.config.get('seasonal_order', (1, 1, 1, 7))[3]
+        if len(residuals) > 2 * seasonal_period:
+            try:
+                from statsmodels.stats.diagnostic import acorr_ljungbox
+                test = acorr_ljungbox(residuals, lags=[seasonal_period])
+                diagnostics['ljung_box_pvalue'] = round(float(test['lb_pvalue'].iloc[0]), 4)
+            except Exception as e:
+                logger.warning(f"Ljung-Box test failed: {e}")
+        return diagnostics
+    
+    def _scale_for(self, periods: int) -> np.ndarray:
+        """Horizon multipliers for 1..periods steps (sqrt growth past the stored horizon)"""
+        scale = self.horizon_scale
+        if periods <= len(scale):
+            return scale[:periods]
+        extra = scale[-1] * np.sqrt(np.arange(len(scale) + 1, periods + 1) / len(scale))
+        return np.concatenate([scale, extra])
+    
+    def predict(self, periods: int, start_date: datetime = None) -> pd.DataFrame:
+        """
+        Generate predictions
+        
+        Args:
+            periods: Number of periods to predict
+            start_date: Start date for predictions
+            
+        Returns:
+            DataFrame with predictions
+        """
+        if not self.is_trained or self.model is None:
+            logger.error("Model not trained")
+            return pd.DataFrame()
+        
+        try:
+            # Create result dates
+            if start_date is None:
+                start_date = datetime.now()
+            
+            dates = pd.date_range(start=start_date, periods=periods, freq='D')
+            
+            if self.interval_mode != 'sampling' and self.intervals is not None:
+                # Point forecast plus calibrated residual offsets
+                yhat = np.asarray(self.model.forecast(steps=periods))
+                lower, upper = self.intervals.apply(dates, yhat, self._scale_for(periods))
+            else:
+                # Get forecast with analytic intervals
+                forecast = self.model.get_forecast(steps=periods)
+                conf_int = np.asarray(forecast.conf_int(alpha=1 - self.config.get('interval_width', 0.95)))
+                yhat = np.asarray(forecast.predicted_mean)
+                lower, upper = conf_int[:, 0], conf_int[:, 1]
             
             result = pd.DataFrame({
                 'ds': dates,
-                'yhat': predictions.values,
-                'yhat_lower': conf_int.iloc[:, 0].values,
-                'yhat_upper': conf_int.iloc[:, 1].values
+                'yhat': yhat,
+                'yhat_lower': lower,
+                'yhat_upper': upper
             })
             
             return result
@@ -355,6 +1319,722 @@ class ARIMAPredictor(BasePredictor):
             return pd.DataFrame()
 
 
+class NumpyForecaster(BasePredictor):
+    """
+    Dependency-free forecaster for hourly and daily count series
+    
+    Methods:
+        seasonal_naive: repeat the last observed week
+        hour_of_week: mean of each hour-of-week (day-of-week for daily data) over recent weeks
+        holt_winters: additive double-seasonal exponential smoothing (daily + weekly cycles,
+                      Taylor 2003), smoothing weights chosen from a small grid
+    
+    Every method reduces to per-bucket state, so prediction is a table lookup and works
+    for any target timestamps.
+    """
+    
+    METHODS = ('seasonal_naive', 'hour_of_week', 'holt_winters')
+    artifact_kind = 'numpy_forecaster'
+    supports_arbitrary_timestamps = True
+    
+    def __init__(self, model_path: str, config: Dict = None):
+        """
+        Initialize NumPy forecaster
+        
+        Args:
+            model_path: Path to save/load model
+            config: Forecaster configuration parameters
+        """
+        self.config = config or {}
+        super().__init__(model_path)
+    
+    def _model_to_artifact(self) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+        arrays = {k: v for k, v in self.model.items() if isinstance(v, np.ndarray)}
+        meta = {k: v for k, v in self.model.items() if k not in arrays}
+        meta['last_ds'] = self.model['last_ds'].isoformat()
+        return {'model': meta}, arrays, {}
+    
+    def _model_from_artifact(self, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict[str, str]) -> Any:
+        model = dict(meta['model'])
+        model['last_ds'] = pd.Timestamp(model['last_ds'])
+        model.update(arrays)
+        return model
+    
+    @property
+    def model_type(self) -> str:
+        method = (self.model or {}).get('method', self.config.get('method', 'holt_winters'))
+        return f'NumPy {method}'
+    
+    @property
+    def interval_mode(self) -> str:
+        # There is nothing to sample from, so 'sampling' means the default residual quantiles
+        mode = super().interval_mode
+        return 'empirical' if mode == 'sampling' else mode
+    
+    def train(self, data: pd.DataFrame) -> Dict:
+        """
+        Fit the forecaster
+        
+        Args:
+            data: DataFrame with 'ds' (datetime) and 'y' (value) columns
+            
+        Returns:
+            Training metrics
+        """
+        if data.empty or 'ds' not in data.columns or 'y' not in data.columns:
+            return {'success': False, 'error': "Data must have 'ds' and 'y' columns"}
+        
+        method = self.config.get('method', 'holt_winters')
+        if method not in self.METHODS:
+            return {'success': False, 'error': f"Unknown method '{method}'"}
+        
+        try:
+            season = ResidualIntervals.season_for(data['ds'])
+            freq = 'h' if season == 'hour_of_week' else 'D'
+            period = 168 if freq == 'h' else 7
+            
+            # Regular grid with gaps filled as zero counts
+            series = data.set_index(pd.to_datetime(data['ds']))['y'].astype(float)
+            series = series.groupby(level=0).sum().asfreq(freq, fill_value=0.0)
+            
+            if len(series) < 2 * period:
+                return {'success': False, 'error': f'Insufficient training data (need {2 * period} periods)'}
+            
+            logger.info(f"Training NumPy {method} forecaster with {len(series)} samples")
+            
+            y = series.values
+            ds = series.index
+            buckets = ResidualIntervals(season=season).bucket(ds)
+            state = {'method': method, 'freq': freq, 'season': season, 'last_ds': ds[-1]}
+            
+            if method == 'seasonal_naive':
+                table = np.zeros(period)
+                table[buckets[-period:]] = y[-period:]
+                state['table'] = table
+                fitted = y[:-period]
+                ds_fit, y_fit = ds[period:], y[period:]
+            elif method == 'hour_of_week':
+                weeks = self.config.get('profile_weeks', 8)
+                recent = slice(-min(len(y), weeks * period), None)
+                counts = np.bincount(buckets[recent], minlength=period)
+                sums = np.bincount(buckets[recent], weights=y[recent], minlength=period)
+                state['table'] = sums / np.maximum(counts, 1)
+                fitted = state['table'][buckets]
+                ds_fit, y_fit = ds, y
+            else:
+                fitted, hw_state = self._fit_holt_winters(y, ds, freq)
+                state.update(hw_state)
+                ds_fit, y_fit = ds[period:], y[period:]
+                fitted = fitted[period:]
+            
+            metadata = {
+                'trained_at': datetime.now().isoformat(),
+                'n_samples': len(series),
+                'date_range': {
+                    'start': ds[0].isoformat(),
+                    'end': ds[-1].isoformat()
+                },
+                'model_type': self.model_type,
+                'interval_mode': self.interval_mode,
+                'mae': round(float(np.mean(np.abs(y_fit - fitted))), 4)
+            }
+            if method == 'holt_winters':
+                metadata['smoothing'] = state['params']
+            
+            intervals, quality = ResidualIntervals.calibrate(
+                ds_fit, y_fit, fitted,
+                holdout_fraction=self.config.get('interval_holdout_fraction', 0.2),
+                interval_width=self.config.get('interval_width', 0.95),
+                method=self.interval_mode,
+                season=season
+            )
+            metadata['interval_quality'] = quality
+            self._install_trained(state, metadata, intervals=intervals)
+            
+            # Save model
+            self._save_model()
+            
+            return {
+                'success': True,
+                'n_samples': len(series),
+                'metadata': self.training_metadata
+            }
+            
+        except Exception as e:
+            logger.error(f"NumPy forecaster training error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _fit_holt_winters(self, y: np.ndarray, ds: pd.DatetimeIndex, freq: str) -> Tuple[np.ndarray, Dict]:
+        """
+        Additive double-seasonal exponential smoothing
+        
+        All grid candidates are filtered in one pass with the state held as (n_candidates,)
+        vectors, so the grid costs about the same as a single fit.
+        
+        Returns:
+            (one-step-ahead fitted values of the best candidate, final state by calendar bucket)
+        """
+        alphas = np.asarray(self.config.get('alpha_grid', [0.02, 0.1, 0.3]))
+        gammas = np.asarray(self.config.get('gamma_grid', [0.05, 0.15, 0.3]))
+        
+        # Hourly data has daily (24) and weekly (168) cycles, daily data only the weekly (7)
+        short, long = (24, 168) if freq == 'h' else (None, 7)
+        
+        grid = np.array([(a, g) for a in alphas for g in gammas])
+        alpha, gamma = grid[:, 0], grid[:, 1]
+        n_candidates = len(grid)
+        
+        # Initial state from the first two weeks
+        init = y[:2 * long]
+        level0 = init.mean()
+        weekly0 = init.reshape(2, long).mean(axis=0) - level0
+        if short:
+            daily0 = weekly0.reshape(long // short, short).mean(axis=0)
+            weekly0 = weekly0 - np.tile(daily0, long // short)
+            daily = np.tile(daily0, (n_candidates, 1))
+        else:
+            daily = None
+        
+        level = np.full(n_candidates, level0)
+        weekly = np.tile(weekly0, (n_candidates, 1))
+        fitted = np.empty((len(y), n_candidates))
+        
+        for t in range(len(y)):
+            w_idx = t % long
+            season = weekly[:, w_idx]
+            if short:
+                d_idx = t % short
+                season = season + daily[:, d_idx]
+            forecast = level + season
+            fitted[t] = forecast
+            error = y[t] - forecast
+            level = level + alpha * error
+            weekly[:, w_idx] += gamma * error
+            if short:
+                daily[:, d_idx] += gamma * error
+        
+        # Score after the initialization window
+        sse = ((y[long:, None] - fitted[long:]) ** 2).sum(axis=0)
+        best = int(np.argmin(sse))
+        
+        # Re-key the final seasonal state by calendar bucket so predictions are lookups
+        positions = np.arange(len(y) - long, len(y))
+        week_buckets = ResidualIntervals(season='hour_of_week' if short else 'day_of_week').bucket(ds[positions])
+        weekly_table = np.zeros(long)
+        weekly_table[week_buckets] = weekly[best, positions % long]
+        daily_table = None
+        if short:
+            daily_table = np.zeros(short)
+            daily_table[ds[positions[-short:]].hour] = daily[best, positions[-short:] % short]
+        
+        state = {
+            'level': float(level[best]),
+            'weekly': weekly_table,
+            'daily': daily_table,
+            'params': {'alpha': float(alpha[best]), 'gamma': float(gamma[best])},
+        }
+        return fitted[:, best], state
+    
+    def _point_forecast(self, ds: pd.DatetimeIndex) -> np.ndarray:
+        """Point forecast for arbitrary timestamps"""
+        state = self.model
+        buckets = ResidualIntervals(season=state['season']).bucket(ds)
+        if state['method'] != 'holt_winters':
+            return state['table'][buckets]
+        yhat = state['level'] + state['weekly'][buckets]
+        if state['daily'] is not None:
+            yhat = yhat + state['daily'][np.asarray(ds.hour)]
+        return yhat
+    
+    def _forecast_frame(self, ds: pd.DatetimeIndex) -> pd.DataFrame:
+        """Point forecast plus residual intervals widened with the horizon"""
+        state = self.model
+        yhat = self._point_forecast(ds)
+        
+        scale = None
+        if state['method'] == 'holt_winters':
+            # h-step variance of additive smoothing grows by (h - 1) * alpha^2 one-step variances
+            steps = np.maximum(1, np.asarray((ds - state['last_ds']) / pd.Timedelta(1, unit=state['freq'])))
+            scale = np.sqrt(1 + (steps - 1) * state['params']['alpha'] ** 2)
+        lower, upper = self.intervals.apply(ds, yhat, scale)
+        
+        return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': lower, 'yhat_upper': upper})
+    
+    def predict(self, periods: int, freq: str = 'H', origin: str = None) -> pd.DataFrame:
+        """
+        Generate predictions
+        
+        Args:
+            periods: Number of periods to predict
+            freq: Frequency ('H' for hourly, 'D' for daily)
+            origin: 'train_end' or 'now' (default: config 'forecast_origin')
+            
+        Returns:
+            DataFrame with predictions
+        """
+        if not self.is_trained or self.model is None:
+            logger.error("Model not trained")
+            return pd.DataFrame()
+        
+        try:
+            origin = origin or self.config.get('forecast_origin', 'train_end')
+            if origin == 'now':
+                start = pd.Timestamp.now().floor(freq)
+            else:
+                start = self.model['last_ds'] + pd.tseries.frequencies.to_offset(freq)
+            ds = pd.date_range(start=start, periods=periods, freq=freq)
+            return self._forecast_frame(ds)
+            
+        except Exception as e:
+            logger.error(f"NumPy forecaster prediction error: {e}")
+            return pd.DataFrame()
+    
+    def _evaluate(self, ds: pd.DatetimeIndex) -> pd.DataFrame:
+        return self._forecast_frame(ds)
+
+
+class ProfileForecaster(NumpyForecaster):
+    """
+    Two-stage forecaster for hourly count series
+    
+    Stage 1 forecasts daily totals with additive Holt-Winters (ETS with a weekly cycle) on
+    about one point per day; stage 2 splits each day into hours with an empirical
+    day-of-week x hour-of-day share matrix averaged over recent weeks. The intraday shape
+    of OPD and lab volumes is very regular, so it is estimated directly instead of fitted.
+    
+    Only complete days are used, so a partial first or last day never biases the totals.
+    """
+    
+    artifact_kind = 'profile_forecaster'
+    
+    @property
+    def model_type(self) -> str:
+        return 'Daily ETS x hourly profile'
+    
+    def train(self, data: pd.DataFrame) -> Dict:
+        """
+        Fit the daily model and the intraday profile
+        
+        Args:
+            data: DataFrame with hourly 'ds' (datetime) and 'y' (value) columns
+            
+        Returns:
+            Training metrics
+        """
+        if data.empty or 'ds' not in data.columns or 'y' not in data.columns:
+            return {'success': False, 'error': "Data must have 'ds' and 'y' columns"}
+        
+        try:
+            # Regular hourly grid with gaps filled as zero counts, trimmed to whole days
+            series = data.set_index(pd.to_datetime(data['ds']))['y'].astype(float)
+            series = series.groupby(level=0).sum().asfreq('h', fill_value=0.0)
+            last_ds = series.index[-1]
+            first_day = series.index[0].ceil('D')
+            end_day = (series.index[-1] + pd.Timedelta(hours=1)).floor('D')
+            series = series[first_day:end_day - pd.Timedelta(hours=1)]
+            
+            n_days = len(series) // 24
+            if n_days < 14:
+                return {'success': False, 'error': 'Insufficient training data (need 14 complete days)'}
+            
+            logger.info(f"Training daily-total x profile forecaster with {n_days} days")
+            
+            hours = series.values.reshape(n_days, 24)
+            totals = hours.sum(axis=1)
+            days = series.index[::24]
+            dow = np.asarray(days.dayofweek)
+            
+            # Stage 1: daily totals
+            fitted_totals, hw_state = self._fit_holt_winters(totals, days, 'D')
+            
+            # Stage 2: share of the day's total falling in each hour, per weekday
+            profile = self._fit_profile(hours, dow)
+            
+            # Forecasts continue after the last observed hour, even if its day was incomplete
+            state = {'method': 'profile', 'freq': 'h', 'season': 'hour_of_week',
+                     'last_ds': last_ds, 'profile': profile}
+            state.update(hw_state)
+            
+            # Hourly fitted values after the daily model's initialization week
+            fitted = (np.maximum(fitted_totals, 0)[:, None] * profile[dow]).ravel()
+            ds_fit, y_fit, fitted = series.index[7 * 24:], series.values[7 * 24:], fitted[7 * 24:]
+            
+            metadata = {
+                'trained_at': datetime.now().isoformat(),
+                'n_samples': len(series),
+                'n_days': n_days,
+                'date_range': {
+                    'start': series.index[0].isoformat(),
+                    'end': series.index[-1].isoformat()
+                },
+                'model_type': self.model_type,
+                'interval_mode': self.interval_mode,
+                'mae': round(float(np.mean(np.abs(y_fit - fitted))), 4),
+                'daily_mae': round(float(np.mean(np.abs(totals[7:] - fitted_totals[7:]))), 4),
+                'smoothing': state['params']
+            }
+            
+            intervals, quality = ResidualIntervals.calibrate(
+                ds_fit, y_fit, fitted,
+                holdout_fraction=self.config.get('interval_holdout_fraction', 0.2),
+                interval_width=self.config.get('interval_width', 0.95),
+                method=self.interval_mode,
+                season='hour_of_week'
+            )
+            metadata['interval_quality'] = quality
+            self._install_trained(state, metadata, intervals=intervals)
+            
+            # Save model
+            self._save_model()
+            
+            return {
+                'success': True,
+                'n_samples': len(series),
+                'metadata': self.training_metadata
+            }
+            
+        except Exception as e:
+            logger.error(f"Profile forecaster training error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _fit_profile(self, hours: np.ndarray, dow: np.ndarray) -> np.ndarray:
+        """
+        Day-of-week x hour-of-day share matrix from the last profile_weeks weeks
+        
+        Weekdays with no volume in the window (e.g. a closed Sunday) fall back to the
+        all-days profile, and that to a flat day, so every row sums to one.
+        
+        Args:
+            hours: (n_days, 24) hourly counts
+            dow: Day of week of each row
+            
+        Returns:
+            (7, 24) array of hourly shares
+        """
+        recent = slice(-min(len(hours), self.config.get('profile_weeks', 8) * 7), None)
+        hours, dow = hours[recent], dow[recent]
+        
+        sums = np.zeros((7, 24))
+        np.add.at(sums, dow, hours)
+        
+        overall = sums.sum(axis=0)
+        overall = overall / overall.sum() if overall.sum() > 0 else np.full(24, 1 / 24)
+        
+        day_totals = sums.sum(axis=1, keepdims=True)
+        return np.where(day_totals > 0, sums / np.where(day_totals > 0, day_totals, 1), overall)
+    
+    def _point_forecast(self, ds: pd.DatetimeIndex) -> np.ndarray:
+        """Daily total for each timestamp's day times that hour's share"""
+        state = self.model
+        dow, hour = np.asarray(ds.dayofweek), np.asarray(ds.hour)
+        daily = np.maximum(state['level'] + state['weekly'][dow], 0)
+        return daily * state['profile'][dow, hour]
+    
+    def _forecast_frame(self, ds: pd.DatetimeIndex) -> pd.DataFrame:
+        """Point forecast plus residual intervals widened with the horizon in days"""
+        state = self.model
+        yhat = self._point_forecast(ds)
+        
+        days_ahead = np.ceil(np.asarray((ds - state['last_ds']) / pd.Timedelta(days=1)))
+        scale = np.sqrt(1 + (np.maximum(1, days_ahead) - 1) * state['params']['alpha'] ** 2)
+        lower, upper = self.intervals.apply(ds, yhat, scale)
+        
+        return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': lower, 'yhat_upper': upper})
+
+
+class GlobalForecaster(BasePredictor):
+    """
+    One model for many related count series (e.g. OPD volume per department)
+    
+    Each series is divided by its mean (scale), so all series share one normalized
+    seasonal regression: a ridge fit of hour-of-week (day-of-week for daily data) indicators
+    plus yearly Fourier terms when the history covers a year. Per-series deviations from the
+    shared seasonal shape are shrunk toward zero, so series with little history borrow from
+    the rest, and a per-series level ratio over the last weeks tracks recent drift.
+    
+    The normal equations only involve per-timestamp sums over series, so fitting costs about
+    the same for 5 or 500 series, and prediction evaluates every series as one matrix.
+    """
+    
+    artifact_kind = 'global_forecaster'
+    model_type = 'Global ridge'
+    
+    def __init__(self, model_path: str, config: Dict = None):
+        """
+        Initialize global forecaster
+        
+        Args:
+            model_path: Path to save/load model
+            config: Forecaster configuration parameters
+        """
+        self.config = config or {}
+        super().__init__(model_path)
+    
+    def _model_to_artifact(self) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+        arrays = {k: v for k, v in self.model.items() if isinstance(v, np.ndarray)}
+        meta = {k: v for k, v in self.model.items() if k not in arrays}
+        meta['last_ds'] = self.model['last_ds'].isoformat()
+        return {'model': meta}, arrays, {}
+    
+    def _model_from_artifact(self, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict[str, str]) -> Any:
+        model = dict(meta['model'])
+        model['last_ds'] = pd.Timestamp(model['last_ds'])
+        model.update(arrays)
+        return model
+    
+    @property
+    def interval_mode(self) -> str:
+        # Residual quantiles only ('sampling' has nothing to simulate from)
+        mode = super().interval_mode
+        return 'empirical' if mode == 'sampling' else mode
+    
+    @property
+    def series_ids(self) -> List[str]:
+        """Series the fitted model knows, in model order"""
+        return list(self.model['series']) if self.model else []
+    
+    @staticmethod
+    def _features(ds: pd.DatetimeIndex, season: str, yearly_order: int) -> np.ndarray:
+        """Shared design matrix: seasonal bucket indicators plus yearly Fourier terms"""
+        buckets = ResidualIntervals(season=season).bucket(ds)
+        n_buckets = 168 if season == 'hour_of_week' else 7
+        columns = [np.eye(n_buckets)[buckets]]
+        if yearly_order:
+            t = np.asarray(ds.dayofyear, dtype=float) / 365.25 * 2 * np.pi
+            for k in range(1, yearly_order + 1):
+                columns.append(np.column_stack([np.sin(k * t), np.cos(k * t)]))
+        return np.hstack(columns)
+    
+    def train(self, data: pd.DataFrame) -> Dict:
+        """
+        Fit all series at once
+        
+        Args:
+            data: Long DataFrame with 'series', 'ds' and 'y' columns (missing periods are
+                  zero counts; a series starts at its first non-zero value)
+            
+        Returns:
+            Training metrics
+        """
+        if data.empty or not {'series', 'ds', 'y'} <= set(data.columns):
+            return {'success': False, 'error': "Data must have 'series', 'ds' and 'y' columns"}
+        
+        try:
+            ds_all = pd.to_datetime(data['ds'])
+            season = ResidualIntervals.season_for(ds_all.drop_duplicates().sort_values())
+            freq = 'h' if season == 'hour_of_week' else 'D'
+            period = 168 if freq == 'h' else 7
+            per_day = 24 if freq == 'h' else 1
+            
+            # Series x time matrix (one bincount-style scatter, no per-series loop)
+            ds_floor = ds_all.dt.floor(freq)
+            index = pd.date_range(ds_floor.min(), ds_floor.max(), freq=freq)
+            series_ids = sorted(data['series'].astype(str).unique())
+            rows = pd.Categorical(data['series'].astype(str), categories=series_ids).codes
+            cols = np.asarray((ds_floor - index[0]) // pd.Timedelta(1, unit=freq), dtype=int)
+            Y = np.zeros((len(series_ids), len(index)))
+            np.add.at(Y, (rows, cols), data['y'].astype(float).values)
+            
+            if len(index) < 2 * period:
+                return {'success': False, 'error': f'Insufficient training data (need {2 * period} periods)'}
+            
+            logger.info(f"Training global forecaster on {len(series_ids)} series x {len(index)} periods")
+            
+            # Each series counts from its first non-zero observation
+            started = np.cumsum(Y > 0, axis=1) > 0
+            mask = started.astype(float)
+            observed = mask.sum(axis=1)
+            scale = np.where(observed > 0, (Y * mask).sum(axis=1) / np.maximum(observed, 1), 0.0)
+            Z = Y / np.where(scale > 0, scale, 1)[:, None]
+            
+            # Shared ridge regression; X'WX and X'Wz only need per-timestamp sums over series
+            yearly_order = self.config.get('yearly_order', 2) if len(index) >= 365 * per_day else 0
+            X = self._features(index, season, yearly_order)
+            weight = mask.sum(axis=0)
+            xtx = X.T @ (X * weight[:, None])
+            xty = X.T @ (Z * mask).sum(axis=0)
+            beta = np.linalg.solve(xtx + self.config.get('ridge_alpha', 1.0) * np.eye(X.shape[1]), xty)
+            base = X @ beta
+            
+            # Per-series seasonal deviations, shrunk toward the shared shape
+            n_buckets = period
+            onehot = X[:, :n_buckets]
+            residual = (Z - base) * mask
+            deviation = (residual @ onehot) / ((mask @ onehot) + self.config.get('seasonal_shrinkage', 4.0))
+            buckets = ResidualIntervals(season=season).bucket(index)
+            fitted = np.maximum(base + deviation[:, buckets], 0)
+            
+            # Recent level relative to the fit, shrunk toward 1
+            recent = slice(-min(len(index), self.config.get('level_weeks', 4) * period), None)
+            prior = self.config.get('level_prior_days', 2) * per_day
+            level = ((Z[:, recent] * mask[:, recent]).sum(axis=1) + prior) / \
+                    ((fitted[:, recent] * mask[:, recent]).sum(axis=1) + prior)
+            level = np.clip(level, 0.2, 5.0)
+            
+            # Residual spread per series; intervals are calibrated on standardized residuals
+            abs_resid = np.abs(Z - fitted) * mask
+            sigma = abs_resid.sum(axis=1) / np.maximum(observed, 1)
+            sigma = np.where(sigma > 0, sigma, 1.0)
+            
+            keep = mask.T.ravel() > 0
+            ds_flat = np.repeat(index.values, len(series_ids))[keep]
+            intervals, quality = ResidualIntervals.calibrate(
+                pd.DatetimeIndex(ds_flat),
+                (Z / sigma[:, None]).T.ravel()[keep],
+                (fitted / sigma[:, None]).T.ravel()[keep],
+                holdout_fraction=self.config.get('interval_holdout_fraction', 0.2),
+                interval_width=self.config.get('interval_width', 0.95),
+                method=self.interval_mode,
+                season=season
+            )
+            
+            model = {
+                'series': series_ids, 'freq': freq, 'season': season, 'yearly_order': yearly_order,
+                'last_ds': index[-1], 'beta': beta, 'deviation': deviation,
+                'scale': scale, 'level': level, 'sigma': sigma,
+            }
+            metadata = {
+                'trained_at': datetime.now().isoformat(),
+                'n_series': len(series_ids),
+                'n_samples': int(observed.sum()),
+                'date_range': {
+                    'start': index[0].isoformat(),
+                    'end': index[-1].isoformat()
+                },
+                'model_type': self.model_type,
+                'interval_mode': self.interval_mode,
+                'mae': round(float(np.abs((Y - fitted * scale[:, None]) * mask).sum() / max(observed.sum(), 1)), 4),
+                'interval_quality': quality
+            }
+            self._install_trained(model, metadata, intervals=intervals)
+            
+            # Save model
+            self._save_model()
+            
+            return {
+                'success': True,
+                'n_series': len(series_ids),
+                'n_samples': int(observed.sum()),
+                'metadata': self.training_metadata
+            }
+            
+        except Exception as e:
+            logger.error(f"Global forecaster training error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def forecast_matrix(self, ds: pd.DatetimeIndex, series: List[str] = None) -> Dict:
+        """
+        Forecast many series for the same timestamps in one evaluation
+        
+        Args:
+            ds: Forecast timestamps
+            series: Series ids (default: all); ids the model does not know are skipped
+            
+        Returns:
+            {'series': [...], 'unknown': [...], 'yhat', 'yhat_lower', 'yhat_upper':
+             arrays of shape (len(series), len(ds))}
+        """
+        state = self.model
+        positions = {sid: i for i, sid in enumerate(state['series'])}
+        requested = state['series'] if series is None else [str(s) for s in series]
+        known = [s for s in requested if s in positions]
+        rows = np.array([positions[s] for s in known], dtype=int)
+        
+        buckets = ResidualIntervals(season=state['season']).bucket(ds)
+        base = self._features(ds, state['season'], state['yearly_order']) @ state['beta']
+        z = np.maximum(base[None, :] + state['deviation'][rows][:, buckets], 0)
+        
+        unit = (state['scale'] * state['level'])[rows][:, None]
+        spread = unit * state['sigma'][rows][:, None]
+        yhat = z * unit
+        
+        return {
+            'series': known,
+            'unknown': [s for s in requested if s not in positions],
+            'yhat': yhat,
+            'yhat_lower': yhat + self.intervals.lower[buckets][None, :] * spread,
+            'yhat_upper': yhat + self.intervals.upper[buckets][None, :] * spread,
+        }
+    
+    def predict(self, periods: int, freq: str = 'H', origin: str = None, series: List[str] = None) -> pd.DataFrame:
+        """
+        Generate predictions for every (or the given) series
+        
+        Args:
+            periods: Number of periods to predict
+            freq: Frequency ('H' for hourly, 'D' for daily)
+            origin: 'train_end' or 'now' (default: config 'forecast_origin')
+            series: Series ids (default: all)
+            
+        Returns:
+            Long DataFrame with 'series', 'ds', 'yhat', 'yhat_lower', 'yhat_upper'
+        """
+        if not self.is_trained or self.model is None:
+            logger.error("Model not trained")
+            return pd.DataFrame()
+        
+        try:
+            origin = origin or self.config.get('forecast_origin', 'train_end')
+            if origin == 'now':
+                start = pd.Timestamp.now().floor(freq)
+            else:
+                start = self.model['last_ds'] + pd.tseries.frequencies.to_offset(freq)
+            ds = pd.date_range(start=start, periods=periods, freq=freq)
+            
+            forecast = self.forecast_matrix(ds, series)
+            return pd.DataFrame({
+                'series': np.repeat(forecast['series'], len(ds)),
+                'ds': np.tile(ds.values, len(forecast['series'])),
+                'yhat': forecast['yhat'].ravel(),
+                'yhat_lower': forecast['yhat_lower'].ravel(),
+                'yhat_upper': forecast['yhat_upper'].ravel(),
+            })
+            
+        except Exception as e:
+            logger.error(f"Global forecaster prediction error: {e}")
+            return pd.DataFrame()
+
+
+def prophet_available() -> bool:
+    """True if the prophet package can be imported"""
+    try:
+        import prophet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_forecaster(backend: str, prophet_path: str, numpy_path: str,
+                      prophet_config: Dict = None, numpy_config: Dict = None,
+                      profile_path: str = None, profile_config: Dict = None) -> BasePredictor:
+    """
+    Build the forecaster for an hourly/daily count series
+    
+    Args:
+        backend: 'prophet', 'numpy', 'profile' or 'auto' (Prophet when installed, NumPy
+                 otherwise); 'prophet' also falls back to NumPy when the package is missing
+        prophet_path: Model file for the Prophet backend
+        numpy_path: Model file for the NumPy backend (kept separate so backends never load
+                    each other's artifacts)
+        prophet_config: ProphetPredictor configuration
+        numpy_config: NumpyForecaster configuration
+        profile_path: Model file for the daily-total x profile backend
+        profile_config: ProfileForecaster configuration
+        
+    Returns:
+        Predictor instance
+    """
+    if backend == 'profile':
+        return ProfileForecaster(model_path=profile_path, config=profile_config)
+    
+    if backend in ('prophet', 'auto') and prophet_available():
+        return ProphetPredictor(model_path=prophet_path, config=prophet_config)
+    
+    if backend == 'prophet':
+        logger.warning("Prophet not installed, falling back to the NumPy forecaster")
+    return NumpyForecaster(model_path=numpy_path, config=numpy_config)
+
+
 def prepare_time_series_data(
     data: List[Dict],
     date_field: str,
@@ -363,7 +2043,10 @@ def prepare_time_series_data(
     freq: str = 'H'
 ) -> pd.DataFrame:
     """
-    Prepare time series data for Prophet/ARIMA
+    Prepare time series data for Prophet/ARIMA from records already in memory
+    
+    Series read from MongoDB should use aggregate_time_series instead, which buckets on
+    the server and only transfers one row per period.
     
     Args:
         data: List of records
@@ -408,3 +2091,147 @@ def prepare_time_series_data(
     })
     
     return result
+
+
+# $dateTrunc units for the supported resampling frequencies
+TRUNC_UNITS = {'H': 'hour', 'h': 'hour', 'D': 'day'}
+
+
+def time_bucket_pipeline(
+    match: Dict,
+    date_field: str,
+    freq: str = 'H',
+    value_field: str = None,
+    aggregation: str = 'count',
+    bucket_expr: Dict = None,
+    series_field: str = None
+) -> List[Dict]:
+    """
+    MongoDB pipeline that counts (or sums/averages) documents per hour or day
+    
+    $dateTrunc needs MongoDB 5.0+; older servers reject the pipeline with OperationFailure.
+    
+    Args:
+        match: Filter selecting the documents
+        date_field: Field containing the datetime
+        freq: 'H' for hourly, 'D' for daily buckets
+        value_field: Field containing the value (for sum/mean aggregation)
+        aggregation: 'count', 'sum', or 'mean'
+        bucket_expr: Optional expression computing the bucket start (overrides the
+                     truncated date_field, e.g. to combine a date and a time field)
+        series_field: Optional field splitting the documents into several series
+        
+    Returns:
+        Pipeline yielding {'_id': bucket start, 'y': value} sorted by bucket, or
+        {'_id': {'series': ..., 'ds': bucket start}, 'y': value} with series_field
+    """
+    if bucket_expr is None:
+        bucket_expr = {'$dateTrunc': {'date': f'${date_field}', 'unit': TRUNC_UNITS[freq]}}
+    if series_field is not None:
+        bucket_expr = {'series': f'${series_field}', 'ds': bucket_expr}
+    
+    if aggregation == 'sum' and value_field:
+        value = {'$sum': f'${value_field}'}
+    elif aggregation == 'mean' and value_field:
+        value = {'$avg': f'${value_field}'}
+    else:
+        value = {'$sum': 1}
+    
+    return [
+        {'$match': match},
+        {'$group': {'_id': bucket_expr, 'y': value}},
+        {'$sort': {'_id': 1}}
+    ]
+
+
+def aggregate_time_series(
+    collection: Any,
+    match: Dict,
+    date_field: str,
+    freq: str = 'H',
+    value_field: str = None,
+    aggregation: str = 'count',
+    bucket_expr: Dict = None
+) -> pd.DataFrame:
+    """
+    Build a time series with a server-side aggregation
+    
+    Only one row per non-empty bucket crosses the network; empty periods between the first
+    and last bucket are filled with zeros here, matching what resampling raw records gives.
+    
+    Args:
+        collection: PyMongo collection
+        match, date_field, freq, value_field, aggregation, bucket_expr: See time_bucket_pipeline
+        
+    Returns:
+        DataFrame with 'ds' and 'y' columns
+        
+    Raises:
+        pymongo.errors.OperationFailure: If the server does not support the pipeline
+    """
+    pipeline = time_bucket_pipeline(match, date_field, freq, value_field, aggregation, bucket_expr)
+    rows = [row for row in collection.aggregate(pipeline) if row['_id'] is not None]
+    
+    if not rows:
+        return pd.DataFrame(columns=['ds', 'y'])
+    
+    series = pd.Series(
+        [row['y'] or 0 for row in rows],
+        index=pd.DatetimeIndex([row['_id'] for row in rows])
+    )
+    return fill_time_series(series, freq)
+
+
+def aggregate_multi_series(
+    collection: Any,
+    match: Dict,
+    date_field: str,
+    series_field: str,
+    freq: str = 'H',
+    bucket_expr: Dict = None
+) -> pd.DataFrame:
+    """
+    Count documents per (series, bucket) with a single server-side aggregation
+    
+    Args:
+        collection: PyMongo collection
+        match, date_field, freq, bucket_expr: See time_bucket_pipeline
+        series_field: Field identifying the series (e.g. 'department')
+        
+    Returns:
+        Long DataFrame with 'series' (string id), 'ds' and 'y' columns; empty buckets are
+        omitted (GlobalForecaster treats them as zero counts)
+        
+    Raises:
+        pymongo.errors.OperationFailure: If the server does not support the pipeline
+    """
+    pipeline = time_bucket_pipeline(match, date_field, freq, bucket_expr=bucket_expr, series_field=series_field)
+    rows = [row for row in collection.aggregate(pipeline)
+            if row['_id'].get('series') is not None and row['_id'].get('ds') is not None]
+    
+    return pd.DataFrame({
+        'series': [str(row['_id']['series']) for row in rows],
+        'ds': pd.to_datetime([row['_id']['ds'] for row in rows]),
+        'y': [row['y'] for row in rows]
+    })
+
+
+def fill_time_series(series: pd.Series, freq: str = 'H') -> pd.DataFrame:
+    """
+    Gap-fill a sparse bucketed series
+    
+    Args:
+        series: Values indexed by bucket start
+        freq: Bucket frequency
+        
+    Returns:
+        DataFrame with 'ds' and 'y' columns covering every period from first to last bucket
+    """
+    series = series.groupby(level=0).sum().sort_index()
+    full_index = pd.date_range(series.index[0], series.index[-1], freq=freq)
+    series = series.reindex(full_index, fill_value=0)
+    
+    return pd.DataFrame({
+        'ds': series.index,
+        'y': series.values
+    })
@@ -7,7 +7,7 @@ import os
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import joblib
 import sys
 
@@ -15,7 +15,9 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.utils import setup_logging
+from shared.artifacts import is_artifact
 from config import Config
+from compact_forest import CompactIsolationForest
 
 logger = setup_logging('anomaly_detector')
 
@@ -28,7 +30,8 @@ class AnomalyDetector:
     
     def __init__(self):
         """Initialize anomaly detector"""
-        self.model: Optional[IsolationForest] = None
+        # sklearn model after training, CompactIsolationForest when loaded from a compact artifact
+        self.model: Optional[Union[IsolationForest, CompactIsolationForest]] = None
         self.config = Config
         self.is_trained = False
         self.normalization_params: Dict = {}
@@ -43,6 +46,17 @@ class AnomalyDetector:
         Returns:
             True if model loaded successfully
         """
+        artifact_path = self.config.get_artifact_path()
+        if is_artifact(artifact_path):
+            try:
+                self.model, meta = CompactIsolationForest.load(artifact_path)
+                self.normalization_params = meta.get('normalization_params', {})
+                self.is_trained = True
+                logger.info(f"Loaded trained model artifact from {artifact_path}")
+                return True
+            except Exception as e:
+                logger.error(f"Error loading model artifact, trying legacy file: {e}")
+        
         model_path = self.config.get_model_path()
         
         if os.path.exists(model_path):
@@ -71,6 +85,21 @@ class AnomalyDetector:
             logger.warning("No model to save")
             return False
         
+        if self.config.MODEL_ARTIFACT_FORMAT == 'compact':
+            try:
+                forest = self.model
+                if not isinstance(forest, CompactIsolationForest):
+                    forest = CompactIsolationForest.from_sklearn(forest)
+                artifact_path = forest.save(
+                    self.config.get_artifact_path(),
+                    {'normalization_params': self.normalization_params}
+                )
+                logger.info(f"Saved model artifact to {artifact_path}")
+                return True
+            except Exception as e:
+                logger.error(f"Error saving model artifact: {e}")
+                return False
+        
         model_path = self.config.get_model_path()
         
         # Ensure directory exists
@@ -313,6 +342,7 @@ class AnomalyDetector:
             'n_estimators': self.model.n_estimators,
             'contamination': self.model.contamination,
             'has_normalization_params': bool(self.normalization_params),
+            'model_format': 'compact' if isinstance(self.model, CompactIsolationForest) else 'sklearn',
             'model_path': self.config.get_model_path()
         }
 
@@ -5,11 +5,12 @@ Provides endpoints for anomaly detection, model training, and health checks
 
 import os
 import sys
+import time
 from datetime import datetime
 from typing import Optional, List
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query, Path
+from fastapi import FastAPI, HTTPException, Query, Path, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -18,6 +19,8 @@ from pydantic import BaseModel
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.utils import setup_logging, success_response, error_response
+from shared.request_capture import RequestCaptureMiddleware
+from shared.deadline import Deadline, StageCostTracker
 from config import Config
 from data_processor import get_data_processor
 from anomaly_detector import get_anomaly_detector
@@ -31,6 +34,9 @@ logger = setup_logging('revenue_leakage_api')
 # Initialize components (lazy loading)
 _components_initialized = False
 
+# Per-process stage timings used to decide what fits in a request deadline
+_stage_costs = StageCostTracker(defaults=Config.DETECTION_STAGE_COST_DEFAULTS)
+
 
 def init_components():
     """Initialize all components lazily"""
@@ -80,6 +86,18 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Optional request capture for load-test replay (see backend/loadtest/replay.py)
+capture_config = Config.REQUEST_CAPTURE_CONFIG
+if capture_config['enabled']:
+    app.add_middleware(
+        RequestCaptureMiddleware,
+        service='revenue-leakage',
+        path=capture_config['path'],
+        sample_rate=capture_config['sample_rate'],
+        salt=capture_config['salt'],
+        keep_fields=capture_config['keep_fields']
+    )
+
 
 # ============================================================
 # Pydantic Models for Request/Response
@@ -90,6 +108,7 @@ class DetectAnomaliesRequest(BaseModel):
     include_rules: bool = True
     include_ml: bool = True
     create_alerts: bool = True
+    deadline_ms: Optional[float] = None
 
 
 class UpdateAnomalyRequest(BaseModel):
@@ -154,7 +173,7 @@ async def health_check():
 # ============================================================
 
 @app.post('/ml/revenue/detect')
-async def detect_anomalies(request: DetectAnomaliesRequest):
+async def detect_anomalies(request: DetectAnomaliesRequest, http_request: Request):
     """
     Run anomaly detection scan
     POST /ml/revenue/detect
@@ -164,46 +183,64 @@ async def detect_anomalies(request: DetectAnomaliesRequest):
         "days": 7,              // Number of days to analyze (default: 7)
         "include_rules": true,  // Include rule-based detection (default: true)
         "include_ml": true,     // Include ML detection (default: true)
-        "create_alerts": true   // Store alerts in database (default: true)
+        "create_alerts": true,  // Store alerts in database (default: true)
+        "deadline_ms": 5000     // Latency budget; also accepted as X-Request-Deadline-Ms header
     }
     
+    Under a deadline, stages run in Config.DETECTION_STAGE_PRIORITY order and any stage whose
+    expected cost no longer fits is skipped; the response is then flagged partial: true.
+    
     Returns detected anomalies and summary statistics
     """
     try:
         init_components()
         
+        deadline_config = Config.DEADLINE_CONFIG
+        deadline = Deadline.from_request(
+            http_request.headers.get(deadline_config['header']),
+            request.deadline_ms,
+            default_ms=deadline_config['default_ms'],
+            max_ms=deadline_config['max_ms'],
+            reserve_ms=deadline_config['reserve_ms']
+        )
+        
         logger.info(f"Starting detection scan for {request.days} days")
         
         ml_anomalies = []
-        rule_anomalies = []
-        
-        # ML-based detection
-        if request.include_ml:
-            detector = get_anomaly_detector()
+        rule_results = {}
+        completed_stages = []
+        skipped_stages = []
+        analyzer = get_pattern_analyzer()
+        
+        for stage in Config.DETECTION_STAGE_PRIORITY:
+            if stage == 'ml_scoring' and not request.include_ml:
+                continue
+            if stage != 'ml_scoring' and not request.include_rules:
+                continue
+            
+            # Checked before every stage: a stage estimated at 0 ms still must not start late
+            if deadline.expired() or not deadline.allows(_stage_costs.estimate(stage)):
+                skipped_stages.append(stage)
+                continue
+            
+            stage_start = time.perf_counter()
             
-            if detector.is_trained:
-                processor = get_data_processor()
-                features, visit_df = processor.get_detection_data(days=request.days)
-                
-                if features.size > 0:
-                    # Normalize features
-                    normalized, _ = processor.normalize_features(features)
-                    
-                    # Get detailed anomalies
-                    ml_anomalies = detector.get_anomaly_details(normalized, visit_df)
-                    
-                    # Add type to ML anomalies
-                    for anomaly in ml_anomalies:
-                        anomaly['type'] = Config.ANOMALY_TYPES['UNUSUAL_PATTERN']
-                    
-                    logger.info(f"ML detection found {len(ml_anomalies)} anomalies")
+            if stage == 'ml_scoring':
+                # ML-based detection
+                ml_anomalies = _run_ml_detection(request.days)
             else:
-                logger.warning("ML model not trained, skipping ML detection")
+                # Rule-based detection
+                rule_results[stage] = analyzer.run_detector(stage, request.days)
+            
+            _stage_costs.record(stage, (time.perf_counter() - stage_start) * 1000)
+            completed_stages.append(stage)
+        
+        if skipped_stages:
+            logger.warning(f"Deadline {deadline.budget_ms}ms: skipped stages {skipped_stages}")
         
-        # Rule-based detection
-        if request.include_rules:
-            analyzer = get_pattern_analyzer()
-            rule_anomalies = analyzer.analyze_all_patterns(days=request.days)
+        # Rule issues in the analyzer's detector order, as analyze_all_patterns returns them
+        rule_anomalies = [issue for stage in analyzer.DETECTORS for issue in rule_results.get(stage, [])]
+        if rule_results:
             logger.info(f"Rule detection found {len(rule_anomalies)} issues")
         
         # Combine anomalies
@@ -231,6 +268,12 @@ async def detect_anomalies(request: DetectAnomaliesRequest):
                 'include_ml': request.include_ml,
                 'include_rules': request.include_rules
             },
+            'partial': bool(skipped_stages),
+            'stages': {
+                'completed': completed_stages,
+                'skipped': skipped_stages,
+                **deadline.to_dict()
+            },
             'summary': {
                 'total_anomalies': len(combined),
                 'ml_anomalies': len(ml_anomalies),
@@ -247,6 +290,34 @@ async def detect_anomalies(request: DetectAnomaliesRequest):
         return JSONResponse(content=error_response(str(e), 'DETECTION_FAILED'), status_code=500)
 
 
+def _run_ml_detection(days: int) -> list:
+    """Score recent visits with the Isolation Forest (empty if the model is not trained)"""
+    detector = get_anomaly_detector()
+    
+    if not detector.is_trained:
+        logger.warning("ML model not trained, skipping ML detection")
+        return []
+    
+    processor = get_data_processor()
+    features, visit_df = processor.get_detection_data(days=days)
+    
+    if features.size == 0:
+        return []
+    
+    # Normalize features
+    normalized, _ = processor.normalize_features(features)
+    
+    # Get detailed anomalies
+    ml_anomalies = detector.get_anomaly_details(normalized, visit_df)
+    
+    # Add type to ML anomalies
+    for anomaly in ml_anomalies:
+        anomaly['type'] = Config.ANOMALY_TYPES['UNUSUAL_PATTERN']
+    
+    logger.info(f"ML detection found {len(ml_anomalies)} anomalies")
+    return ml_anomalies
+
+
 @app.get('/ml/revenue/anomalies')
 async def get_anomalies(
     status: Optional[str] = Query(default=None),
@@ -0,0 +1,204 @@
+"""
+Compact Isolation Forest for Revenue Leakage Detection
+Stores a fitted sklearn IsolationForest as flat node arrays and scores samples with a
+vectorized traversal, so the model can be memory-mapped instead of unpickled
+"""
+
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.artifacts import read_artifact, write_artifact
+
+ARTIFACT_KIND = 'isolation_forest'
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    Expected path length of an unsuccessful BST search over n samples, c(n)
+    (same definition sklearn uses to normalize isolation depths)
+    """
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + np.euler_gamma) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+class CompactIsolationForest:
+    """
+    Array-backed IsolationForest with the scoring interface AnomalyDetector uses
+    (score_samples, decision_function, predict)
+
+    All trees are concatenated into one node table. Each leaf stores its precomputed
+    isolation depth (path length + c(leaf size)), so scoring is a fixed number of
+    vectorized gathers - one per tree level - over an (n_samples, n_trees) node matrix.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.leaf_depth = arrays['leaf_depth']
+        self.roots = arrays['roots']
+
+        self.n_estimators = meta['n_estimators']
+        self.contamination = meta['contamination']
+        self.max_samples_ = meta['max_samples']
+        self.offset_ = meta['offset']
+        self.n_features_in_ = meta['n_features_in']
+        self.max_depth = meta['max_depth']
+        self._normalizer = meta['n_estimators'] * float(average_path_length(np.array([meta['max_samples']]))[0])
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'CompactIsolationForest':
+        """Flatten a fitted sklearn IsolationForest"""
+        lefts, rights, features, thresholds, depths, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+            t = tree.tree_
+            n_nodes = t.node_count
+            left, right = t.children_left.astype(np.int64), t.children_right.astype(np.int64)
+            is_leaf = left == -1
+
+            # Node depths by walking the (topologically ordered) node table from the root
+            depth = np.zeros(n_nodes, dtype=np.int64)
+            for node in range(n_nodes):
+                if not is_leaf[node]:
+                    depth[left[node]] = depth[node] + 1
+                    depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            # Map split features back to input columns; leaves point at column 0 (never used)
+            feature = np.where(is_leaf, 0, np.asarray(tree_features)[np.maximum(t.feature, 0)])
+
+            leaf_depth = np.where(is_leaf, depth + average_path_length(t.n_node_samples), 0.0)
+
+            lefts.append(np.where(is_leaf, -1, left + offset))
+            rights.append(np.where(is_leaf, -1, right + offset))
+            features.append(feature.astype(np.int64))
+            thresholds.append(t.threshold.astype(np.float64))
+            depths.append(leaf_depth.astype(np.float64))
+            roots.append(offset)
+            offset += n_nodes
+
+        arrays = {
+            'children_left': np.concatenate(lefts),
+            'children_right': np.concatenate(rights),
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds),
+            'leaf_depth': np.concatenate(depths),
+            'roots': np.asarray(roots, dtype=np.int64),
+        }
+        meta = {
+            'n_estimators': len(model.estimators_),
+            'contamination': model.contamination,
+            'max_samples': int(model.max_samples_),
+            'offset': float(model.offset_),
+            'n_features_in': int(model.n_features_in_),
+            'max_depth': max_depth,
+        }
+        return cls(arrays, meta)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'children_left': self.children_left,
+            'children_right': self.children_right,
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'leaf_depth': self.leaf_depth,
+            'roots': self.roots,
+        }
+
+    def _meta(self) -> Dict:
+        return {
+            'n_estimators': self.n_estimators,
+            'contamination': self.contamination,
+            'max_samples': self.max_samples_,
+            'offset': self.offset_,
+            'n_features_in': self.n_features_in_,
+            'max_depth': self.max_depth,
+        }
+
+    def save(self, path: str, extra_meta: Optional[Dict] = None) -> str:
+        """Write the forest as an artifact directory"""
+        meta = {'forest': self._meta(), **(extra_meta or {})}
+        return write_artifact(path, ARTIFACT_KIND, meta, self._arrays(),
+                              packages=('scikit-learn', 'numpy'))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Tuple['CompactIsolationForest', Dict]:
+        """
+        Load a forest artifact
+
+        Returns:
+            (forest, artifact meta without the forest header)
+        """
+        header, arrays, _ = read_artifact(path, mmap=mmap)
+        meta = dict(header['meta'])
+        forest = cls(arrays, meta.pop('forest'))
+        return forest, meta
+
+    def score_samples(self, X: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Opposite of the anomaly score (lower = more anomalous), as in sklearn
+
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            chunk_size: Rows scored per pass, bounding the (rows, trees) node matrix
+
+        Returns:
+            Scores array
+        """
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, model expects {self.n_features_in_}")
+
+        # Leaves loop back to themselves (threshold +inf keeps them on the left child), so every
+        # row can take the same number of steps without masking
+        children, threshold = self._traversal_tables()
+
+        scores = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], chunk_size):
+            block = X[start:start + chunk_size]
+            rows = np.arange(block.shape[0])[:, None]
+            node = np.broadcast_to(self.roots, (block.shape[0], len(self.roots))).copy()
+
+            for _ in range(self.max_depth):
+                go_right = block[rows, self.feature[node]] > threshold[node]
+                node = children[2 * node + go_right]
+
+            depths = self.leaf_depth[node].sum(axis=1)
+            scores[start:start + chunk_size] = -(2.0 ** (-depths / self._normalizer))
+        return scores
+
+    def _traversal_tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Interleaved [left, right] children and thresholds with self-looping leaves (cached)"""
+        if getattr(self, '_tables', None) is None:
+            own = np.arange(len(self.children_left))
+            leaf = self.children_left == -1
+            children = np.empty(2 * len(own), dtype=np.int64)
+            children[0::2] = np.where(leaf, own, self.children_left)
+            children[1::2] = np.where(leaf, own, self.children_right)
+            self._tables = (children, np.where(leaf, np.inf, self.threshold))
+        return self._tables
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Shifted scores; negative values are outliers"""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """-1 for anomalies, 1 for normal samples"""
+        return np.where(self.decision_function(X) < 0, -1, 1)
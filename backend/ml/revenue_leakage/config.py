@@ -25,6 +25,9 @@ class Config:
     # Model Configuration
     MODEL_PATH = os.getenv('MODEL_PATH', './models')
     ISOLATION_FOREST_MODEL_FILE = 'isolation_forest.pkl'
+    # 'compact' saves the forest as flat .npy node arrays (memory-mapped on load) in a directory
+    # next to the .pkl path; 'pickle' keeps the joblib file. A legacy .pkl is loaded either way.
+    MODEL_ARTIFACT_FORMAT = os.getenv('MODEL_ARTIFACT_FORMAT', 'compact')
     
     # Isolation Forest Hyperparameters
     MODEL_PARAMS = {
@@ -115,11 +118,51 @@ class Config:
         'other'
     ]
     
+    # Request Deadlines (X-Request-Deadline-Ms header or deadline_ms parameter)
+    DEADLINE_CONFIG = {
+        'header': 'X-Request-Deadline-Ms',
+        'default_ms': float(os.getenv('DEFAULT_DEADLINE_MS', 0)) or None,  # None = no deadline
+        'max_ms': float(os.getenv('MAX_DEADLINE_MS', 120000)),
+        'reserve_ms': float(os.getenv('DEADLINE_RESERVE_MS', 100)),  # kept back for combining/serializing
+    }
+    
+    # Detection stages in priority order; under a deadline, stages that no longer fit are
+    # skipped and the scan is returned with partial: true
+    DETECTION_STAGE_PRIORITY = [
+        'unbilled_services',
+        'unbilled_lab_tests',
+        'unbilled_radiology',
+        'unbilled_medicines',
+        'price_mismatches',
+        'duplicate_billings',
+        'ml_scoring',
+        'delayed_billing',
+    ]
+    
+    # Initial stage cost estimates (ms) before any stage has been timed in this process
+    DETECTION_STAGE_COST_DEFAULTS = {
+        'ml_scoring': 1500,
+    }
+    
+    # Request Capture (opt-in trace of anonymized request metadata for load-test replay)
+    REQUEST_CAPTURE_CONFIG = {
+        'enabled': os.getenv('REQUEST_CAPTURE_ENABLED', 'False').lower() == 'true',
+        'path': os.getenv('REQUEST_CAPTURE_PATH', './captures/revenue-leakage.jsonl'),
+        'sample_rate': float(os.getenv('REQUEST_CAPTURE_SAMPLE_RATE', 1.0)),
+        'salt': os.getenv('REQUEST_CAPTURE_SALT') or None,
+        'keep_fields': [f.strip() for f in os.getenv('REQUEST_CAPTURE_KEEP_FIELDS', 'status,type,models').split(',') if f.strip()],
+    }
+    
     @classmethod
     def get_model_path(cls) -> str:
         """Get full path to trained model file"""
         return os.path.join(cls.MODEL_PATH, cls.ISOLATION_FOREST_MODEL_FILE)
     
+    @classmethod
+    def get_artifact_path(cls) -> str:
+        """Get path to the compact model artifact directory"""
+        return os.path.splitext(cls.get_model_path())[0]
+    
     @classmethod
     def validate_config(cls) -> bool:
         """Validate configuration settings"""
@@ -46,6 +46,17 @@ class PatternAnalyzer:
         except Exception as e:
             logger.error(f"Error loading tariffs: {e}")
     
+    # Rule detectors by stage name, in the order analyze_all_patterns runs them
+    DETECTORS = {
+        'unbilled_services': 'detect_unbilled_services',
+        'unbilled_medicines': 'detect_unbilled_medicines',
+        'unbilled_lab_tests': 'detect_unbilled_lab_tests',
+        'unbilled_radiology': 'detect_unbilled_radiology',
+        'price_mismatches': 'detect_price_mismatches',
+        'duplicate_billings': 'detect_duplicate_billings',
+        'delayed_billing': 'detect_delayed_billing',
+    }
+    
     def analyze_all_patterns(self, days: int = 7) -> List[Dict]:
         """
         Run all pattern detection rules
@@ -61,18 +72,28 @@ class PatternAnalyzer:
         all_issues = []
         
         # Run each detector
-        all_issues.extend(self.detect_unbilled_services(days))
-        all_issues.extend(self.detect_unbilled_medicines(days))
-        all_issues.extend(self.detect_unbilled_lab_tests(days))
-        all_issues.extend(self.detect_unbilled_radiology(days))
-        all_issues.extend(self.detect_price_mismatches(days))
-        all_issues.extend(self.detect_duplicate_billings(days))
-        all_issues.extend(self.detect_delayed_billing(days))
+        for stage in self.DETECTORS:
+            all_issues.extend(self.run_detector(stage, days))
         
         logger.info(f"Pattern analysis complete. Found {len(all_issues)} issues")
         
         return all_issues
     
+    def run_detector(self, stage: str, days: int = 7) -> List[Dict]:
+        """
+        Run a single rule detector by stage name
+        
+        Args:
+            stage: Key of DETECTORS
+            days: Number of days to analyze
+            
+        Returns:
+            List of detected issues
+        """
+        if stage not in self.DETECTORS:
+            raise ValueError(f"Unknown detector stage: {stage}")
+        return getattr(self, self.DETECTORS[stage])(days)
+    
     def detect_unbilled_services(self, days: int = 7) -> List[Dict]:
         """
         Detect services that were provided but not billed
@@ -0,0 +1,137 @@
+"""
+Compact Model Artifacts for Hospital HIS ML Services
+A model artifact is a directory holding meta.json (format version, library versions and
+model metadata), .npy arrays that are memory-mapped on load, and optional JSON/text blobs
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from importlib import metadata as importlib_metadata
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from shared.utils import setup_logging
+
+logger = setup_logging('artifacts')
+
+ARTIFACT_FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+
+
+def library_versions(packages: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Installed versions of the given distributions (None when not installed)"""
+    versions = {}
+    for package in packages:
+        try:
+            versions[package] = importlib_metadata.version(package)
+        except importlib_metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def artifact_dir(model_path: str) -> str:
+    """Artifact directory for a legacy model file path (models/opd_prophet.pkl -> models/opd_prophet)"""
+    root, ext = os.path.splitext(model_path)
+    return root if ext else model_path
+
+
+def is_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def write_artifact(path: str, kind: str, meta: Dict, arrays: Optional[Dict[str, np.ndarray]] = None,
+                   blobs: Optional[Dict[str, str]] = None, packages: Iterable[str] = ('numpy',)) -> str:
+    """
+    Write an artifact directory atomically
+
+    Files are written to a sibling temp directory that then replaces the old artifact, so a
+    concurrent reader sees either the previous or the new model, never a partial one.
+
+    Args:
+        path: Artifact directory
+        kind: Model kind recorded in the header (e.g. 'prophet', 'sarimax')
+        meta: JSON-serializable model metadata
+        arrays: Named arrays stored as <name>.npy
+        blobs: Named text blobs stored as-is (e.g. 'model.json')
+        packages: Distributions whose versions go into the header
+
+    Returns:
+        Artifact directory
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+
+    try:
+        for name, array in (arrays or {}).items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+        for name, text in (blobs or {}).items():
+            with open(os.path.join(tmp_dir, name), 'w') as f:
+                f.write(text)
+
+        header = {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'kind': kind,
+            'created_at': datetime.now().isoformat(),
+            'library_versions': library_versions(packages),
+            'arrays': sorted((arrays or {}).keys()),
+            'blobs': sorted((blobs or {}).keys()),
+            'meta': meta,
+        }
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(header, f, indent=2, default=str)
+
+        # Swap directories: move the old one aside, move the new one in, then clean up
+        old_dir = None
+        if os.path.exists(path):
+            old_dir = tempfile.mkdtemp(prefix='.old-', dir=parent)
+            os.rmdir(old_dir)
+            os.replace(path, old_dir)
+        os.replace(tmp_dir, path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return path
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_artifact(path: str, mmap: bool = True) -> Tuple[Dict, Dict[str, np.ndarray], Dict[str, str]]:
+    """
+    Read an artifact directory
+
+    Args:
+        path: Artifact directory
+        mmap: Memory-map arrays read-only instead of reading them into memory
+
+    Returns:
+        (header, arrays, blobs)
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        header = json.load(f)
+
+    if header.get('format_version', 0) > ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Artifact format {header['format_version']} is newer than supported "
+                         f"({ARTIFACT_FORMAT_VERSION})")
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in header.get('arrays', [])
+    }
+    blobs = {}
+    for name in header.get('blobs', []):
+        with open(os.path.join(path, name)) as f:
+            blobs[name] = f.read()
+
+    saved = {k: v for k, v in header.get('library_versions', {}).items() if v}
+    current = library_versions(saved.keys())
+    mismatched = {k: (v, current[k]) for k, v in saved.items() if current[k] != v}
+    if mismatched:
+        logger.info(f"Artifact {path} was written with different library versions: {mismatched}")
+
+    return header, arrays, blobs
@@ -113,6 +113,11 @@ class DatabaseConnector:
         """Access lab tests collection"""
         return self._db['lab_tests']
     
+    @property
+    def lab_test_masters(self):
+        """Access lab test catalogue (test definitions with their department; mongoose model LabTestMaster)"""
+        return self._db['labtestmasters']
+    
     @property
     def radiology_tests(self):
         """Access radiology tests collection"""
@@ -153,6 +158,11 @@ class DatabaseConnector:
         """Access AI predictions collection"""
         return self._db['ai_predictions']
     
+    @property
+    def ai_forecast_log(self):
+        """Access forecast log collection (served forecasts scored against actuals)"""
+        return self._db['ai_forecast_log']
+    
     def close(self):
         """Close database connection"""
         if self._client:
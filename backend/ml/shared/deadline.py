@@ -0,0 +1,118 @@
+"""
+Request Deadlines for Hospital HIS ML Services
+Lets endpoints decide, stage by stage, whether there is still time to run optional work
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Deadline:
+    """
+    Wall-clock budget for one request
+    A deadline without a budget never expires, so callers that send nothing keep the old behaviour
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None, reserve_ms: float = 0.0):
+        """
+        Initialize deadline
+
+        Args:
+            budget_ms: Total time the caller is willing to wait (None = unbounded)
+            reserve_ms: Time kept back for building and serializing the response
+        """
+        self.budget_ms = budget_ms if budget_ms and budget_ms > 0 else None
+        self.reserve_ms = reserve_ms
+        self._start = time.perf_counter()
+
+    @classmethod
+    def from_request(cls, header_value: Optional[str], param_value: Optional[float] = None,
+                     default_ms: Optional[float] = None, max_ms: Optional[float] = None,
+                     reserve_ms: float = 0.0) -> 'Deadline':
+        """
+        Build a deadline from a request header or parameter (parameter wins)
+
+        Args:
+            header_value: Raw header value in milliseconds
+            param_value: Body/query parameter in milliseconds
+            default_ms: Budget applied when the caller sends none
+            max_ms: Upper clamp for caller-supplied budgets
+            reserve_ms: See __init__
+
+        Returns:
+            Deadline instance
+        """
+        budget = param_value
+        if budget is None and header_value:
+            try:
+                budget = float(header_value)
+            except ValueError:
+                budget = None
+        if budget is None:
+            budget = default_ms
+        if budget and max_ms:
+            budget = min(budget, max_ms)
+        return cls(budget, reserve_ms)
+
+    @property
+    def is_bounded(self) -> bool:
+        return self.budget_ms is not None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def remaining_ms(self) -> float:
+        """Time left before the reserve is reached (inf when unbounded)"""
+        if self.budget_ms is None:
+            return float('inf')
+        return self.budget_ms - self.reserve_ms - self.elapsed_ms()
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def allows(self, estimated_ms: float) -> bool:
+        """True if a stage expected to take estimated_ms fits in the remaining budget"""
+        return estimated_ms <= self.remaining_ms()
+
+    def to_dict(self) -> Dict:
+        return {
+            'deadline_ms': self.budget_ms,
+            'elapsed_ms': round(self.elapsed_ms(), 1),
+        }
+
+
+class StageCostTracker:
+    """
+    Exponentially weighted moving average of stage durations
+    Used to predict whether a stage will fit before starting it
+    """
+
+    def __init__(self, alpha: float = 0.3, defaults: Optional[Dict[str, float]] = None):
+        """
+        Initialize tracker
+
+        Args:
+            alpha: EWMA weight of the newest observation
+            defaults: Initial cost estimates in ms, used until a stage has been observed
+        """
+        self.alpha = alpha
+        self.defaults = defaults or {}
+        self._estimates: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, stage: str, fallback_ms: float = 0.0) -> float:
+        with self._lock:
+            return self._estimates.get(stage, self.defaults.get(stage, fallback_ms))
+
+    def record(self, stage: str, duration_ms: float):
+        with self._lock:
+            previous = self._estimates.get(stage)
+            if previous is None:
+                self._estimates[stage] = duration_ms
+            else:
+                self._estimates[stage] = self.alpha * duration_ms + (1 - self.alpha) * previous
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: round(v, 1) for k, v in self._estimates.items()}
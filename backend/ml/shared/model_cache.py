@@ -0,0 +1,160 @@
+"""
+Bounded Model Cache for Hospital HIS ML Services
+Keeps loaded models keyed by (model type, scope) in LRU order under a memory budget
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from shared.utils import setup_logging
+
+logger = setup_logging('model_cache')
+
+
+class ModelCache:
+    """
+    LRU cache of loaded models with a byte budget
+
+    Models are loaded on first use through the loader passed to get(); concurrent misses
+    for the same key wait for a single load. When the estimated size of the cached models
+    exceeds max_bytes (or the count exceeds max_entries), the least recently used models
+    are dropped - requests already holding one keep using it until they finish.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None,
+                 sizer: Callable[[Any], int] = None):
+        """
+        Initialize cache
+
+        Args:
+            max_bytes: Memory budget for cached models
+            max_entries: Optional cap on the number of cached models
+            sizer: Returns the estimated size of a model in bytes
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sizer = sizer or (lambda model: 0)
+
+        self._entries: 'OrderedDict[Hashable, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_errors = 0
+        self._load_ms: List[float] = []
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Cached model for key, loading it on a miss
+
+        Args:
+            key: Cache key, e.g. ('opd', 'department:...')
+            loader: Builds the model on a miss
+
+        Returns:
+            Model
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry['model']
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # Another request may have finished loading while this one waited
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                        self._hits += 1
+                        return entry['model']
+                    self._misses += 1
+
+                start = time.perf_counter()
+                try:
+                    model = loader()
+                except Exception:
+                    with self._lock:
+                        self._load_errors += 1
+                    raise
+                load_ms = (time.perf_counter() - start) * 1000
+
+                with self._lock:
+                    self._load_ms.append(load_ms)
+                    del self._load_ms[:-1000]
+                self.put(key, model)
+                logger.info(f"Loaded {key} in {load_ms:.1f}ms")
+                return model
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def put(self, key: Hashable, model: Any):
+        """Insert or replace a model (also re-measures it, e.g. after retraining)"""
+        size = max(0, int(self.sizer(model)))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old['bytes']
+            self._entries[key] = {'model': model, 'bytes': size}
+            self._bytes += size
+            self._evict(keep=key)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a model from the cache"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry['bytes']
+            return True
+
+    def values(self) -> List[Any]:
+        """Cached models (for registry polling)"""
+        with self._lock:
+            return [entry['model'] for entry in self._entries.values()]
+
+    def _evict(self, keep: Hashable):
+        """Drop least recently used entries until within budget (never the entry just added)"""
+        while len(self._entries) > 1 and (
+                self._bytes > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._bytes -= entry['bytes']
+            self._evictions += 1
+            logger.info(f"Evicted {key} ({entry['bytes']} bytes)")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters, load latency and memory use"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            load_ms = sorted(self._load_ms)
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'evictions': self._evictions,
+                'load_errors': self._load_errors,
+                'load_ms': {
+                    'count': len(load_ms),
+                    'mean': round(sum(load_ms) / len(load_ms), 2) if load_ms else None,
+                    'p95': round(load_ms[int(0.95 * (len(load_ms) - 1))], 2) if load_ms else None,
+                    'max': round(load_ms[-1], 2) if load_ms else None,
+                },
+                'keys': [list(k) if isinstance(k, tuple) else k for k in reversed(self._entries)],
+            }
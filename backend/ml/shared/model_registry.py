@@ -0,0 +1,212 @@
+"""
+Versioned Model Registry for Hospital HIS ML Services
+Each published model is an immutable version directory; a CURRENT pointer file, replaced
+atomically, names the version every worker should serve
+"""
+
+import json
+import os
+import secrets
+import shutil
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from shared.utils import setup_logging
+
+logger = setup_logging('model_registry')
+
+POINTER_FILE = 'CURRENT'
+VERSION_FILE = 'version.json'
+
+
+class ModelRegistry:
+    """
+    Registry layout for one model:
+
+        <root>/<name>/CURRENT                  version id of the active model
+        <root>/<name>/versions/<id>/           model files (never modified after publish)
+        <root>/<name>/versions/<id>/version.json
+
+    A version is written to a staging directory and renamed into versions/ before the
+    pointer moves, so readers never see a partially written model.
+    """
+
+    def __init__(self, root: str, name: str, keep_versions: int = 10):
+        """
+        Initialize registry
+
+        Args:
+            root: Registry root directory (shared by all models)
+            name: Model name (e.g. 'opd_prophet')
+            keep_versions: Versions kept when publishing; older ones are pruned (the
+                           current version is always kept)
+        """
+        self.name = name
+        self.path = os.path.join(root, name)
+        self.versions_path = os.path.join(self.path, 'versions')
+        self.pointer_path = os.path.join(self.path, POINTER_FILE)
+        self.keep_versions = keep_versions
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.versions_path, version)
+
+    def exists(self, version: str) -> bool:
+        return os.path.isfile(os.path.join(self.version_path(version), VERSION_FILE))
+
+    def pointer_token(self) -> Optional[Tuple[int, int]]:
+        """
+        Cheap change marker for the pointer file (inode, mtime)
+
+        The pointer is replaced by rename, so any publish or rollback changes the inode;
+        pollers compare tokens and only read the pointer when it differs.
+        """
+        try:
+            st = os.stat(self.pointer_path)
+            return st.st_ino, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def current_version(self) -> Optional[str]:
+        """Version id the pointer names, or None if nothing was published yet"""
+        try:
+            with open(self.pointer_path) as f:
+                version = f.read().strip()
+            return version or None
+        except OSError:
+            return None
+
+    def version_info(self, version: str) -> Dict:
+        """Metadata written with a version"""
+        with open(os.path.join(self.version_path(version), VERSION_FILE)) as f:
+            return json.load(f)
+
+    def list_versions(self) -> List[Dict]:
+        """All versions, newest first"""
+        if not os.path.isdir(self.versions_path):
+            return []
+
+        current = self.current_version()
+        versions = []
+        for version in os.listdir(self.versions_path):
+            if version.startswith('.') or not self.exists(version):
+                continue
+            try:
+                info = self.version_info(version)
+            except (OSError, ValueError):
+                continue
+            info['is_current'] = version == current
+            versions.append(info)
+        return sorted(versions, key=lambda v: v['version'], reverse=True)
+
+    def publish(self, write: Callable[[str], None], metadata: Dict = None) -> str:
+        """
+        Write a new version and make it current
+
+        Args:
+            write: Callback that writes the model files into the directory it is given
+            metadata: JSON-serializable version metadata (training metadata, model type...)
+
+        Returns:
+            New version id
+        """
+        # Sortable ids: timestamp (microseconds) plus a random suffix for concurrent publishers
+        version = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{secrets.token_hex(3)}"
+        os.makedirs(self.versions_path, exist_ok=True)
+        staging = os.path.join(self.versions_path, f'.staging-{version}')
+        os.makedirs(staging)
+
+        try:
+            write(staging)
+            info = {'version': version, 'created_at': datetime.now().isoformat(), **(metadata or {})}
+            with open(os.path.join(staging, VERSION_FILE), 'w') as f:
+                json.dump(info, f, indent=2, default=str)
+            os.replace(staging, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._write_pointer(version)
+        logger.info(f"Published {self.name} version {version}")
+        self.prune()
+        return version
+
+    def activate(self, version: str):
+        """
+        Point CURRENT at an existing version (rollback or roll forward)
+
+        Raises:
+            KeyError: If the version does not exist
+        """
+        if not self.exists(version):
+            raise KeyError(f"Unknown {self.name} version '{version}'")
+        self._write_pointer(version)
+        logger.info(f"Activated {self.name} version {version}")
+
+    def previous_version(self) -> Optional[str]:
+        """Newest version older than the current one"""
+        current = self.current_version()
+        older = [v['version'] for v in self.list_versions() if current is None or v['version'] < current]
+        return older[0] if older else None
+
+    def prune(self) -> List[str]:
+        """Delete versions beyond keep_versions (never the current one)"""
+        current = self.current_version()
+        versions = [v['version'] for v in self.list_versions()]
+        removed = [v for v in versions[self.keep_versions:] if v != current]
+        for version in removed:
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+        return removed
+
+    def _write_pointer(self, version: str):
+        tmp_path = f'{self.pointer_path}.{secrets.token_hex(4)}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+
+
+class RegistryPoller:
+    """
+    Background thread that calls refresh() on models every few seconds, so each worker
+    process picks up versions published or activated by another process
+    """
+
+    def __init__(self, targets: Callable[[], Iterable], interval_s: float = 10.0):
+        """
+        Initialize poller
+
+        Args:
+            targets: Returns the objects to refresh (each has a refresh() -> bool method)
+            interval_s: Seconds between polls
+        """
+        self.targets = targets
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='registry-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s)
+            self._thread = None
+
+    def poll(self) -> int:
+        """Refresh all targets once; returns the number of models swapped"""
+        swapped = 0
+        for target in self.targets():
+            try:
+                swapped += bool(target.refresh())
+            except Exception as e:
+                logger.error(f"Model refresh failed: {e}")
+        return swapped
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.poll()
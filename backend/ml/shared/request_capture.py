@@ -0,0 +1,192 @@
+"""
+Request Capture Middleware for Hospital HIS ML Services
+Records anonymized request metadata (route, params, timing, response size) to a JSONL trace
+that backend/loadtest/replay.py can re-issue against another instance
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qsl
+
+from shared.utils import setup_logging
+
+logger = setup_logging('request_capture')
+
+# Values that are safe to keep verbatim in a trace
+_SCALAR_TYPES = (int, float, bool, type(None))
+
+
+class Anonymizer:
+    """
+    Replaces identifying values with keyed hashes
+    Numbers, booleans and allow-listed enum-like fields are kept so traces stay replayable
+    """
+
+    def __init__(self, salt: Optional[str] = None, keep_fields: Iterable[str] = ()):
+        """
+        Initialize anonymizer
+
+        Args:
+            salt: HMAC key; a random per-process salt is used when not set, so hashes are
+                  consistent within one trace but cannot be linked across traces
+            keep_fields: Field names whose string values are recorded as-is
+        """
+        self.salt = (salt or os.urandom(16).hex()).encode()
+        self.keep_fields = set(keep_fields)
+
+    def hash_value(self, value: str) -> str:
+        """Hash a string value (prefix marks it as anonymized for the replay tool)"""
+        digest = hmac.new(self.salt, value.encode(), hashlib.sha256).hexdigest()[:12]
+        return f'anon:{digest}'
+
+    def anonymize(self, value: Any, field: Optional[str] = None) -> Any:
+        """Anonymize a JSON-compatible value recursively"""
+        if isinstance(value, _SCALAR_TYPES):
+            return value
+        if isinstance(value, dict):
+            return {k: self.anonymize(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.anonymize(v, field) for v in value]
+        text = str(value)
+        if field in self.keep_fields:
+            return text
+        # Query strings arrive as text, keep the numeric ones
+        try:
+            float(text)
+            return text
+        except ValueError:
+            return self.hash_value(text)
+
+
+class TraceWriter:
+    """Thread-safe, line-buffered JSONL appender"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def write(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RequestCaptureMiddleware:
+    """
+    Pure ASGI middleware (no response buffering) that records one trace line per HTTP request
+    Request bodies are teed as the endpoint reads them; only JSON bodies are recorded
+    """
+
+    def __init__(self, app, service: str, path: str, sample_rate: float = 1.0,
+                 salt: Optional[str] = None, keep_fields: Iterable[str] = (),
+                 max_body_bytes: int = 65536):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped ASGI application
+            service: Service name stored in every record
+            path: JSONL trace file
+            sample_rate: Fraction of requests to record
+            salt: Anonymization key (see Anonymizer)
+            keep_fields: Field names recorded verbatim
+            max_body_bytes: Larger bodies are recorded by size only
+        """
+        self.app = app
+        self.service = service
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.anonymizer = Anonymizer(salt, keep_fields)
+        self.writer = TraceWriter(path)
+        logger.info(f"Request capture enabled for {service} -> {path} (sample rate {sample_rate})")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        start = time.perf_counter()
+        body_chunks = []
+        body_size = 0
+        status = {'code': 500}
+        response_bytes = 0
+
+        async def capture_receive():
+            nonlocal body_size
+            message = await receive()
+            if message['type'] == 'http.request':
+                chunk = message.get('body', b'')
+                body_size += len(chunk)
+                if body_size <= self.max_body_bytes:
+                    body_chunks.append(chunk)
+            return message
+
+        async def capture_send(message):
+            nonlocal response_bytes
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response_bytes += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                self.writer.write(self._build_record(
+                    scope, started_at, duration_ms, status['code'], response_bytes,
+                    body_size, b''.join(body_chunks)
+                ))
+            except Exception as e:
+                logger.error(f"Error writing capture record: {e}")
+
+    def _build_record(self, scope, started_at: float, duration_ms: float, status: int,
+                      response_bytes: int, request_bytes: int, body: bytes) -> Dict:
+        """Build an anonymized trace record"""
+        route = scope.get('route')
+        route_path = getattr(route, 'path', None) or scope.get('path', '')
+        path_params = self.anonymizer.anonymize(scope.get('path_params') or {})
+
+        query = {}
+        for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+            query[key] = self.anonymizer.anonymize(value, key)
+
+        headers = dict(scope.get('headers') or [])
+        content_type = headers.get(b'content-type', b'').decode('latin-1')
+        json_body = None
+        if body and 'application/json' in content_type and request_bytes <= self.max_body_bytes:
+            try:
+                json_body = self.anonymizer.anonymize(json.loads(body))
+            except ValueError:
+                json_body = None
+
+        return {
+            'ts': round(started_at, 4),
+            'service': self.service,
+            'method': scope.get('method', 'GET'),
+            'route': route_path,
+            'path_params': path_params,
+            'query': query,
+            'body': json_body,
+            'content_type': content_type.split(';')[0] or None,
+            'request_bytes': request_bytes,
+            'status': status,
+            'duration_ms': round(duration_ms, 3),
+            'response_bytes': response_bytes,
+        }
+